@@ -0,0 +1,94 @@
+"""
+Scaling benchmark for the portfolio batch runner.
+Run from the repository root with
+    python -m Benchmarks.bench_BatchRunner [positions]
+A synthetic position file is revalued with 1, 2, 4, ... worker processes up
+to the number of cores; the speed-up relative to one worker should be close
+to the number of workers, since every chunk is parsed, validated, priced
+and written in a worker.  Both the full run (including csv input and
+output) and the pricing of positions held in memory, which are sent to the
+workers in slices, are reported.  The "split+join" column is the time the
+parent spends splitting the file and joining the parts with one worker, the
+serial part of a run.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from Calculations.BatchRunner import BatchRunner
+
+DEFAULT_POSITIONS = 2 * 10 ** 6
+
+
+def syntheticPositions(size: int) -> pd.DataFrame:
+    """Random HH and BRN positions over the next two years of delivery months"""
+    rng = np.random.default_rng(0)
+    ticker = np.where(rng.random(size) < 0.5, "HH", "BRN")
+    months = (np.datetime64("today", "M") + 2 + rng.integers(0, 24, size)).astype(str)
+    forward = np.where(ticker == "HH", 2.17, 80.48)
+    return pd.DataFrame({"ticker": ticker, "deliveryMonth": months,
+                         "strike": np.round(forward * rng.uniform(0.5, 1.5, size), 2),
+                         "isCall": np.where(rng.random(size) < 0.5, "Yes", "No"),
+                         "quantity": rng.integers(-100, 100, size)})
+
+
+def workerCounts():
+    """1, 2, 4, ... up to the number of cores"""
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def pricingSeconds(runner: BatchRunner, positions: pd.DataFrame) -> float:
+    """Seconds to price in-memory positions, excluding file input and output"""
+    if runner.workers == 1:
+        start = time.perf_counter()
+        runner.priceFrame(positions)
+        return time.perf_counter() - start
+    with runner.openPool() as pool:
+        start = time.perf_counter()
+        runner.priceFrame(positions, pool)
+        return time.perf_counter() - start
+
+
+def serialSeconds(runner: BatchRunner, positionFile: str, directory: str) -> float:
+    """Seconds the parent spends splitting a file and joining the priced parts"""
+    start = time.perf_counter()
+    runner._splitFile(positionFile)
+    outputFile = os.path.join(directory, "joined.csv")
+    with open(outputFile, "wb") as output:
+        with open(positionFile, "rb") as source:
+            shutil.copyfileobj(source, output) # Parts of about the same size as the input
+    return time.perf_counter() - start
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_POSITIONS
+    marketData = pd.read_csv("CombinedEnergyFutures.csv")
+    positions = syntheticPositions(size)
+    print(os.cpu_count(), "cores,", f"{size:,}", "positions")
+    print(f"{'workers':>8} {'run (s)':>9} {'speed-up':>9} {'pricing (s)':>12} {'positions/s':>13} {'speed-up':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        positionFile = os.path.join(directory, "positions.csv")
+        positions.to_csv(positionFile, index=False)
+        runBaseline = pricingBaseline = None
+        for workers in workerCounts():
+            runner = BatchRunner(marketData, workers=workers, chunkSize=max(size // 8, 1))
+            summary = runner.run(positionFile, os.path.join(directory, "valuations.csv"))
+            pricing = pricingSeconds(runner, positions)
+            runBaseline = runBaseline or summary["seconds"]
+            pricingBaseline = pricingBaseline or pricing
+            print(f"{workers:>8} {summary['seconds']:>9.3f} {runBaseline / summary['seconds']:>8.2f}x "
+                  f"{pricing:>12.3f} {size / pricing:>13,.0f} {pricingBaseline / pricing:>8.2f}x")
+        serial = serialSeconds(BatchRunner(marketData, workers=1, chunkSize=max(size // 8, 1)), positionFile, directory)
+        print(f"split+join {serial:.3f} s, {serial / runBaseline:.1%} of the one-worker run")
+
+if __name__ == '__main__':
+    main()
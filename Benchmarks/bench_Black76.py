@@ -0,0 +1,54 @@
+"""
+Benchmark comparing the scalar OptionsCalculator.Black76 path with the
+vectorized batchBlack76 pricer.
+Run from the repository root with
+    python -m Benchmarks.bench_Black76
+The scalar path builds one Python object per contract, so for the largest
+sizes it is timed on a sample and extrapolated rather than run in full.
+"""
+import time
+import numpy as np
+from Calculations.OptionsCalculator import OptionsCalculator, batchBlack76
+
+SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+SCALAR_SAMPLE = 10 ** 4 # Largest number of contracts priced one at a time
+
+
+def randomContracts(size: int, seed: int = 0):
+    """Synthetic contracts spread around the money"""
+    rng = np.random.default_rng(seed)
+    price = rng.uniform(1.0, 150.0, size)
+    return (rng.uniform(0.05, 1.0, size), rng.uniform(0.01, 3.0, size), price,
+            price * rng.uniform(0.5, 1.5, size), rng.random(size) < 0.5)
+
+
+def timeScalar(sigma, time_, price, strike, isCall) -> float:
+    """Seconds per contract for the scalar path"""
+    count = min(len(sigma), SCALAR_SAMPLE)
+    start = time.perf_counter()
+    for i in range(count):
+        OptionsCalculator(sigma[i], time_[i], price[i], strike[i]).Black76(isCall[i])
+    return (time.perf_counter() - start) / count
+
+
+def timeBatch(sigma, time_, price, strike, isCall) -> float:
+    """Seconds for one vectorized pass over every contract"""
+    start = time.perf_counter()
+    batchBlack76(sigma, time_, price, strike, isCall)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'contracts':>10} {'scalar (s)':>12} {'batch (s)':>12} {'speed-up':>10}")
+    for size in SIZES:
+        contracts = randomContracts(size)
+        scalarSeconds = timeScalar(*contracts) * size
+        batchSeconds = timeBatch(*contracts)
+        extrapolated = "*" if size > SCALAR_SAMPLE else " "
+        print(f"{size:>10} {scalarSeconds:>11.4f}{extrapolated} {batchSeconds:>12.4f} "
+              f"{scalarSeconds / batchSeconds:>9.0f}x")
+    print("* extrapolated from", SCALAR_SAMPLE, "scalar pricings")
+
+
+if __name__ == '__main__':
+    main()
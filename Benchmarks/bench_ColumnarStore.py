@@ -0,0 +1,72 @@
+"""
+Load time and memory of the columnar store against the csv path.
+Run from the repository root with
+    python -m Benchmarks.bench_ColumnarStore
+Synthetic HH/BRN histories are written both as csv and as a columnar store.
+Each load runs in a fresh interpreter and reports the growth of its resident
+set size (VmRSS) over the load, so that the memory of the interpreter and its
+imports is not counted.  Dates are epoch days, so the largest history stays
+below the year 9999.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+from Data.ColumnarStore import ColumnarStore
+
+SIZES = [10 ** 4, 10 ** 5, 10 ** 6, 2 * 10 ** 6]
+
+LOADERS = {
+    "csv": "df = pd.read_csv(path + '.csv'); total = df['HH'].iloc[-1]",
+    "columnar": "df = ColumnarStore(path).frame(['HH']); total = df['HH'].iloc[-1]",
+}
+
+CHILD = """
+import sys, time
+import pandas as pd
+from Data.ColumnarStore import ColumnarStore
+def rss():
+    with open('/proc/self/status') as status:
+        return next(int(line.split()[1]) for line in status if line.startswith('VmRSS'))
+path = sys.argv[1]
+before = rss()
+start = time.perf_counter()
+{loader}
+seconds = time.perf_counter() - start
+print(seconds, rss() - before)
+"""
+
+
+def syntheticHistory(size: int) -> pd.DataFrame:
+    """Daily prices for both tickers starting in 1970"""
+    rng = np.random.default_rng(0)
+    dates = np.arange(size).astype("datetime64[D]").astype(str)
+    return pd.DataFrame({"DATE": dates,
+                         "HH": 3 * np.exp(np.cumsum(rng.normal(0, 0.01, size))),
+                         "BRN": 80 * np.exp(np.cumsum(rng.normal(0, 0.01, size)))})
+
+
+def measure(loader: str, path: str):
+    """Seconds and RSS growth in MB of one load in a fresh interpreter"""
+    output = subprocess.run([sys.executable, "-c", CHILD.format(loader=loader), path],
+                            capture_output=True, text=True, check=True, cwd=os.getcwd()).stdout.split()
+    return float(output[0]), int(output[1]) / 1024
+
+
+def main():
+    print(f"{'rows':>10} {'loader':>9} {'seconds':>9} {'RSS growth (MB)':>16}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            path = os.path.join(directory, f"history{size}")
+            df = syntheticHistory(size)
+            df.to_csv(path + ".csv", index=False)
+            ColumnarStore.write(path, df)
+            for name, loader in LOADERS.items():
+                seconds, rss = measure(loader, path)
+                print(f"{size:>10} {name:>9} {seconds:>9.4f} {rss:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Memory and speed of a million-contract book held as a ContractBook against
+the same book as Python objects.
+Run from the repository root with
+    python -m Benchmarks.bench_ContractBook
+Memory of the object books is measured with tracemalloc over a sample and
+scaled up to the full book.
+"""
+import datetime
+import time
+import tracemalloc
+import numpy as np
+from Calculations.ContractBook import Contract, ContractBook
+from Calculations.OptionsCalculator import OptionsCalculator
+
+BOOK = 10 ** 6
+OBJECT_SAMPLE = 10 ** 5
+VALUATION_DATE = datetime.date(2023, 6, 16)
+
+
+def randomColumns(size: int, seed: int = 0):
+    """Tickers, strikes, expiries, call flags and quantities of a synthetic book"""
+    rng = np.random.default_rng(seed)
+    ticker = rng.choice(["HH", "BRN"], size)
+    expiry = np.datetime64(VALUATION_DATE, "D") + rng.integers(20, 1000, size)
+    strike = np.where(ticker == "HH", 2.5, 80.0) * rng.uniform(0.5, 1.5, size)
+    return ticker, strike, expiry, rng.random(size) < 0.5, rng.integers(-10, 10, size).astype(float)
+
+
+def _allocated(build) -> int:
+    """Bytes still allocated by what build returns"""
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    ticker, strike, expiry, isCall, quantity = randomColumns(BOOK)
+    start = time.perf_counter()
+    book = ContractBook.fromArrays(ticker, strike, expiry, isCall, quantity)
+    built = time.perf_counter() - start
+    sigma, price = {"HH": 0.6, "BRN": 0.3}, {"HH": 2.5, "BRN": 80.0}
+    start = time.perf_counter()
+    pv = book.black76(sigma, price, VALUATION_DATE)
+    priced = time.perf_counter() - start
+    start = time.perf_counter()
+    hh = book.forTicker("HH", datetime.date(2024, 1, 1), datetime.date(2024, 12, 31))
+    sliced = time.perf_counter() - start
+
+    dates = expiry[:OBJECT_SAMPLE].astype(datetime.date)
+    contracts = _allocated(lambda: [Contract(*row) for row in zip(ticker[:OBJECT_SAMPLE].tolist(),
+                                                                 strike[:OBJECT_SAMPLE].tolist(), dates,
+                                                                 isCall[:OBJECT_SAMPLE].tolist(),
+                                                                 quantity[:OBJECT_SAMPLE].tolist())])
+    calculators = _allocated(lambda: [OptionsCalculator(0.3, 1.0, 80.0, value, 0.05)
+                                      for value in strike[:OBJECT_SAMPLE].tolist()])
+    scale = BOOK / OBJECT_SAMPLE
+    print(f"{BOOK:,} contracts")
+    print(f"{'ContractBook':>20} {book.nbytes / 2 ** 20:>8.1f} MiB")
+    print(f"{'Contract objects':>20} {contracts * scale / 2 ** 20:>8.1f} MiB")
+    print(f"{'OptionsCalculators':>20} {calculators * scale / 2 ** 20:>8.1f} MiB")
+    print(f"Built and validated in {built:.3f}s, priced in {priced:.3f}s ({np.isfinite(pv).sum():,} PVs), "
+          f"{len(hh):,} HH contracts expiring in 2024 sliced in {sliced * 1e6:.0f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark of the forward curve.
+Run from the repository root with
+    python -m Benchmarks.bench_ForwardCurve
+Reports curve evaluations per second for both interpolation methods, and
+the time to price a 36 month strip in one BatchRunner pass against one PV
+call per month.
+"""
+import contextlib
+import io
+import time
+import numpy as np
+import pandas as pd
+from Calculations.BatchRunner import BatchRunner
+from Calculations.ForwardCurve import ForwardCurve
+from Calculations.PVCalculator import PV
+
+SIZES = [10 ** 3, 10 ** 5, 10 ** 7]
+STRIP = 36
+
+
+def main():
+    months = np.datetime64("today", "M") + np.arange(1, 61)
+    prices = 3 + 0.5 * np.sin(np.arange(60) / 6)
+    for method in ("linear", "monotone"):
+        curve = ForwardCurve(months, prices, method)
+        for size in SIZES:
+            tenors = np.random.default_rng(0).uniform(0, curve.tenors[-1], size)
+            start = time.perf_counter()
+            curve.forward(tenors)
+            seconds = time.perf_counter() - start
+            print(f"{method:>9} {size:>9} tenors {seconds:>9.4f} s {size / seconds:>12.0f} per s")
+
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({"HH": 3 * np.exp(np.cumsum(rng.normal(0, 0.02, 1000)))})
+    curve = ForwardCurve(months, prices, "monotone")
+    runner = BatchRunner(df, workers=1, curves={"HH": curve})
+    start = time.perf_counter()
+    runner.priceStrip("HH", months[1:STRIP + 1], 3.0, True)
+    strip = time.perf_counter() - start
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()): # PV prints its inputs
+        for monthsForward in range(2, STRIP + 2):
+            PV(df, "HH", 1, 3.0, True, monthsForward=monthsForward, curve=curve)
+    loop = time.perf_counter() - start
+    print(f"{STRIP} month strip: one pass {strip:.4f} s, PV per month {loop:.4f} s ({loop / strip:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark comparing the closed-form Greeks with bump-and-reprice.
+Run from the repository root with
+    python -m Benchmarks.bench_Greeks
+Bump-and-reprice uses central differences of batchBlack76 for delta, gamma,
+vega, theta and rho, i.e. 9 batch pricings against one analytic pass.
+"""
+import time
+from Calculations.OptionsCalculator import batchBlack76, batchBlack76Greeks
+from Benchmarks.bench_Black76 import randomContracts
+
+SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+BUMP = 1e-4
+
+
+def bumpAndReprice(sigma, time_, price, strike, isCall, rate=0.05) -> dict:
+    """Finite-difference Greeks, as they would be computed without the analytic engine"""
+    pv = batchBlack76(sigma, time_, price, strike, isCall, rate)
+    up = batchBlack76(sigma, time_, price + BUMP, strike, isCall, rate)
+    down = batchBlack76(sigma, time_, price - BUMP, strike, isCall, rate)
+    return {
+        "pv": pv,
+        "delta": (up - down) / (2 * BUMP),
+        "gamma": (up - 2 * pv + down) / (BUMP * BUMP),
+        "vega": (batchBlack76(sigma + BUMP, time_, price, strike, isCall, rate)
+                 - batchBlack76(sigma - BUMP, time_, price, strike, isCall, rate)) / (2 * BUMP),
+        "theta": -(batchBlack76(sigma, time_ + BUMP, price, strike, isCall, rate)
+                   - batchBlack76(sigma, time_ - BUMP, price, strike, isCall, rate)) / (2 * BUMP),
+        "rho": (batchBlack76(sigma, time_, price, strike, isCall, rate + BUMP)
+                - batchBlack76(sigma, time_, price, strike, isCall, rate - BUMP)) / (2 * BUMP),
+    }
+
+
+def timed(function, *args) -> float:
+    """Seconds for one call of function"""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'contracts':>10} {'bump (s)':>10} {'analytic (s)':>13} {'speed-up':>9}")
+    for size in SIZES:
+        contracts = randomContracts(size)
+        bumpSeconds = timed(bumpAndReprice, *contracts)
+        analyticSeconds = timed(batchBlack76Greeks, *contracts)
+        print(f"{size:>10} {bumpSeconds:>10.4f} {analyticSeconds:>13.4f} {bumpSeconds / analyticSeconds:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark of historical simulation against the length of the history.
+Run from the repository root with
+    python -m Benchmarks.bench_HistoricalVaR
+For 1000 HH and BRN positions it reports the time for a first full replay
+of the history, a 250-day 99% backtest, and a rerun after appending one day,
+which only revalues the new day.  The first row replays the stored
+CombinedEnergyFutures.csv; longer histories are synthetic.
+"""
+import time
+import numpy as np
+import pandas as pd
+from MarketData import defaultStore
+from Calculations.HistoricalVaR import HistoricalVaR
+
+POSITIONS = 1000
+LENGTHS = [1000, 5000, 20000]
+
+
+def syntheticHistory(days: int) -> pd.DataFrame:
+    """Random-walk HH and BRN prices on consecutive business days"""
+    rng = np.random.default_rng(days)
+    return pd.DataFrame({"DATE": pd.bdate_range("1950-01-02", periods=days),
+                         "HH": 3 * np.exp(np.cumsum(rng.normal(0, 0.03, days))),
+                         "BRN": 80 * np.exp(np.cumsum(rng.normal(0, 0.015, days)))})
+
+
+def portfolio() -> HistoricalVaR:
+    """Random options on HH and BRN"""
+    rng = np.random.default_rng(0)
+    tickers = np.where(rng.random(POSITIONS) < 0.5, "HH", "BRN")
+    price = np.where(tickers == "HH", 3.0, 80.0)
+    return HistoricalVaR(tickers, rng.uniform(0.2, 0.8, POSITIONS), rng.uniform(0.1, 2.0, POSITIONS), price,
+                         price * rng.uniform(0.7, 1.3, POSITIONS), rng.random(POSITIONS) < 0.5,
+                         rng.integers(-100, 100, POSITIONS))
+
+
+def main():
+    print(f"{'days':>6} {'replay (s)':>11} {'backtest (s)':>13} {'append 1 day (s)':>17}")
+    histories = [("stored", defaultStore.frame())] + [(str(days), syntheticHistory(days)) for days in LENGTHS]
+    for label, history in histories:
+        simulation = portfolio()
+        start = time.perf_counter()
+        simulation.dailyPnL(history.iloc[:-1])
+        replay = time.perf_counter() - start
+        start = time.perf_counter()
+        simulation.backtest(history.iloc[:-1], 0.99, 250)
+        backtest = time.perf_counter() - start
+        start = time.perf_counter()
+        simulation.dailyPnL(history)
+        append = time.perf_counter() - start
+        print(f"{label:>6} {replay:>11.3f} {backtest:>13.3f} {append:>17.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Throughput benchmark for the vectorized implied-volatility solver.
+Run from the repository root with
+    python -m Benchmarks.bench_ImpliedVolatility
+Chains are priced with batchBlack76 at known vols and then inverted.
+Surface-building jobs need at least 10^5 inversions per second.
+"""
+import time
+import numpy as np
+from Calculations.OptionsCalculator import batchBlack76
+from Calculations.ImpliedVolatility import impliedVol, CONVERGED
+from Benchmarks.bench_Black76 import randomContracts
+
+SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+TARGET = 10 ** 5 # inversions per second
+
+
+def main():
+    print(f"{'contracts':>10} {'seconds':>9} {'inversions/s':>13} {'converged':>10} {'max |error|':>12}")
+    for size in SIZES:
+        sigma, time_, price, strike, isCall = randomContracts(size)
+        premium = batchBlack76(sigma, time_, price, strike, isCall)
+        start = time.perf_counter()
+        implied, status = impliedVol(premium, time_, price, strike, isCall)
+        seconds = time.perf_counter() - start
+        converged = status == CONVERGED
+        error = np.max(np.abs(implied[converged] - sigma[converged]))
+        print(f"{size:>10} {seconds:>9.4f} {size / seconds:>13,.0f} {converged.mean():>10.2%} {error:>12.2e}")
+    print("Target throughput:", f"{TARGET:,}", "inversions per second")
+
+
+if __name__ == '__main__':
+    main()
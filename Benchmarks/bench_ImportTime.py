@@ -0,0 +1,45 @@
+"""
+Benchmark of cold-start time: each entry point is imported in a fresh
+interpreter with python -X importtime, which reports the cumulative import
+time of every module.  Run from the repository root with
+    python -m Benchmarks.bench_ImportTime
+The best of several runs is shown, together with the heavy dependencies that
+the import loaded.
+"""
+import subprocess
+import sys
+
+ENTRY_POINTS = ["numpy", "Calculations.OptionsCalculator", "Calculations.PVCalculator",
+                "Calculations.PricingCache", "flask_app", "Calculations.BatchRunner", "pandas", "scipy.stats"]
+HEAVY = ("pandas", "scipy", "arrow")
+RUNS = 5
+
+
+def importTime(module: str, runs: int = RUNS):
+    """
+    Best cumulative import time of a module in seconds over fresh interpreters,
+    and the heavy dependencies it loaded.
+    """
+    check = f"import sys, {module}; print(','.join(name for name in {HEAVY!r} if name in sys.modules))"
+    best, loaded = float("inf"), ""
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", check],
+                                capture_output=True, text=True, check=True)
+        # Lines read "import time: self [us] | cumulative | imported package"
+        for line in result.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module:
+                best = min(best, int(fields[1]) / 1e6)
+        loaded = result.stdout.strip()
+    return best, loaded
+
+
+def main():
+    print(f"{'module':>32} {'import (ms)':>12}  heavy modules loaded")
+    for module in ENTRY_POINTS:
+        seconds, loaded = importTime(module)
+        print(f"{module:>32} {1000 * seconds:>12.1f}  {loaded or '-'}")
+
+
+if __name__ == "__main__":
+    main()
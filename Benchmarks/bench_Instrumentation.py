@@ -0,0 +1,41 @@
+"""
+Benchmark of the instrumentation overhead.
+Run from the repository root with
+    python -m Benchmarks.bench_Instrumentation
+Times an empty timed stage and a full PV with collection off and on, and
+prints the stage breakdown of the PVs collected.
+"""
+import timeit
+from Calculations.PVCalculator import PV
+from Instrumentation import metrics, timed
+from MarketData import defaultStore
+
+REPEATS = 200_000
+PV_REPEATS = 200
+
+
+@timed("empty")
+def empty():
+    pass
+
+
+def main():
+    df = defaultStore.frame()
+    print(f"{'':>10} {'timed call (ns)':>16} {'timer block (ns)':>17} {'PV (us)':>9}")
+    for enabled in (False, True):
+        metrics.reset()
+        metrics.enable(enabled)
+        call = min(timeit.repeat(empty, number=REPEATS, repeat=3)) / REPEATS
+        def block():
+            with metrics.timer("block"):
+                pass
+        blockTime = min(timeit.repeat(block, number=REPEATS, repeat=3)) / REPEATS
+        pv = min(timeit.repeat(lambda: PV(df, "HH", 1, 2.5, True), number=PV_REPEATS, repeat=3)) / PV_REPEATS
+        print(f"{'on' if enabled else 'off':>10} {1e9 * call:>16.0f} {1e9 * blockTime:>17.0f} {1e6 * pv:>9.1f}")
+    print()
+    print(metrics.prometheus())
+    metrics.enable(False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Benchmark of the lattice engine: runtime and error against the number of steps.
+Run from the repository root with
+    python -m Benchmarks.bench_Lattice
+Errors are for European exercise, where Black76 gives the exact value; the
+batch timings are for American exercise on 1000 random contracts.
+"""
+import time
+import numpy as np
+from Calculations.Lattice import latticePrice
+from Calculations.OptionsCalculator import batchBlack76
+from Benchmarks.bench_Black76 import randomContracts
+
+STEPS = [50, 100, 200, 400, 800]
+BATCH = 1000
+
+
+def main():
+    sigma, time_, price, strike, isCall = randomContracts(BATCH)
+    expected = batchBlack76(sigma, time_, price, strike, isCall)
+    print(f"{'lattice':>10} {'steps':>6} {'plain error':>12} {'smoothed error':>15} {'1 option (ms)':>14} "
+          f"{BATCH} options (s)")
+    for lattice in ("binomial", "trinomial"):
+        for steps in STEPS:
+            plain = latticePrice(sigma, time_, price, strike, isCall, steps=steps, lattice=lattice, american=False,
+                                 smoothing=False, richardson=False)
+            smoothed = latticePrice(sigma, time_, price, strike, isCall, steps=steps, lattice=lattice, american=False)
+            start = time.perf_counter()
+            latticePrice(0.2, 1.5, 42.0, 42.0, False, steps=steps, lattice=lattice)
+            single = time.perf_counter() - start
+            start = time.perf_counter()
+            latticePrice(sigma, time_, price, strike, isCall, steps=steps, lattice=lattice)
+            batch = time.perf_counter() - start
+            print(f"{lattice:>10} {steps:>6} {np.abs(plain - expected).max():>12.2e} "
+                  f"{np.abs(smoothed - expected).max():>15.2e} {1000 * single:>14.2f} {batch:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
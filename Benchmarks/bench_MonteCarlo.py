@@ -0,0 +1,32 @@
+"""
+Benchmark of the Monte Carlo engine.
+Run from the repository root with
+    python -m Benchmarks.bench_MonteCarlo
+For an Asian call on Polanitzer's example (daily observation over 1.5 years)
+it reports simulated paths per second and the standard error against the
+number of paths, with and without antithetic and control variates.
+"""
+import time
+from Calculations.MonteCarlo import monteCarlo
+
+PATHS = [10 ** 3, 10 ** 4, 10 ** 5]
+METHODS = {
+    "plain": dict(antithetic=False, controlVariate=False),
+    "antithetic": dict(antithetic=True, controlVariate=False),
+    "control": dict(antithetic=False, controlVariate=True),
+    "both": dict(antithetic=True, controlVariate=True),
+}
+
+
+def main():
+    print(f"{'method':>10} {'paths':>8} {'pv':>8} {'std error':>10} {'paths/s':>11}")
+    for name, options in METHODS.items():
+        for paths in PATHS:
+            start = time.perf_counter()
+            result = monteCarlo(0.2, 1.5, 42.0, 42.0, True, payoff="asian", paths=paths, seed=1, **options)
+            seconds = time.perf_counter() - start
+            print(f"{name:>10} {paths:>8} {result['pv']:>8.4f} {result['stdError']:>10.5f} {paths / seconds:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Micro-benchmark of the normal CDF/PDF kernel against SciPy.
+Run from the repository root with
+    python -m Benchmarks.bench_Numerics
+For each batch size the best of several runs is printed, in nanoseconds per
+value, for normCdf (allocating, and into a preallocated out array), normPdf,
+d1d2, scipy.special.ndtr and scipy.stats.norm.cdf.  SciPy is imported here
+only; the pricers do not need it.
+"""
+import timeit
+import numpy as np
+from scipy.special import ndtr
+from scipy.stats import norm
+from Calculations.Numerics import d1d2, normCdf, normPdf
+
+SIZES = [1, 10, 100, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+
+
+def _nanoseconds(function, size: int) -> float:
+    """Best time of one call, per value"""
+    timer = timeit.Timer(function)
+    number = 1
+    while timer.timeit(number) < 0.02:
+        number *= 2
+    return min(timer.repeat(5, number)) / number / size * 1e9
+
+
+def main():
+    rng = np.random.default_rng(0)
+    columns = ["normCdf", "normCdf out", "normPdf", "d1d2", "ndtr", "norm.cdf"]
+    print(f"{'values':>8}" + "".join(f"{name:>13}" for name in columns) + "   (ns per value)")
+    for size in SIZES:
+        x = rng.normal(0, 2, size) if size > 1 else 0.3
+        out = np.empty(size)
+        sigma, time_ = rng.uniform(0.1, 0.8, size), rng.uniform(0.05, 3, size)
+        price, strike = rng.uniform(50, 100, size), rng.uniform(50, 100, size)
+        if size == 1:
+            sigma, time_, price, strike = 0.3, 0.5, 80.0, 82.0
+        cases = [lambda: normCdf(x), lambda: normCdf(np.atleast_1d(x), out=out), lambda: normPdf(x),
+                 lambda: d1d2(sigma, time_, price, strike), lambda: ndtr(x), lambda: norm.cdf(x)]
+        print(f"{size:>8}" + "".join(f"{_nanoseconds(case, size):>13,.0f}" for case in cases))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark of the scenario engine on 10k positions under 1k scenarios.
+Run from the repository root with
+    python -m Benchmarks.bench_ScenarioEngine
+The grid is 10 forward x 10 vol x 5 decay x 2 rate shocks.  For several
+chunk sizes it reports the run time and the peak memory allocated (numpy
+allocations are traced by tracemalloc), for portfolio totals and for the
+full P&L cube, then the time with a process pool.  The cost of the same grid
+with one OptionsCalculator call per position and scenario is extrapolated
+from a sample.
+"""
+import os
+import time
+import tracemalloc
+import numpy as np
+from Calculations.OptionsCalculator import OptionsCalculator
+from Calculations.ScenarioEngine import ScenarioEngine, shockGrid
+from Benchmarks.bench_Black76 import randomContracts
+
+POSITIONS = 10_000
+CHUNK_SIZES = [10, 100, 1000]
+
+
+def measured(function, *args, **kwargs):
+    """Seconds and peak traced megabytes of one call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    sigma, time_, price, strike, isCall = randomContracts(POSITIONS)
+    quantity = np.random.default_rng(2).integers(-100, 100, POSITIONS)
+    engine = ScenarioEngine(sigma, time_, price, strike, isCall, quantity)
+    grid = shockGrid(forward=np.linspace(-0.3, 0.3, 10), vol=np.linspace(-0.1, 0.1, 10),
+                     decay=[0, 1 / 260, 5 / 260, 21 / 260, 0.25], rate=[0, 0.01])
+    print(f"{POSITIONS} positions x {len(grid)} scenarios = {POSITIONS * len(grid):.1e} revaluations")
+    for byPosition in (False, True):
+        for chunkSize in CHUNK_SIZES:
+            seconds, peak = measured(engine.run, grid, byPosition=byPosition, chunkSize=chunkSize)
+            label = "cube" if byPosition else "totals"
+            print(f"{label:>7} chunk {chunkSize:>5}: {seconds:>7.2f} s, peak {peak:>8.1f} MB")
+    workers = os.cpu_count() or 1
+    if workers > 1:
+        start = time.perf_counter()
+        engine.run(grid, chunkSize=100, workers=workers)
+        print(f"cube with {workers} workers: {time.perf_counter() - start:.2f} s")
+
+    sample = 2000
+    start = time.perf_counter()
+    for i in range(sample):
+        OptionsCalculator(sigma[i], time_[i], price[i], strike[i]).Black76(bool(isCall[i]))
+    perCall = (time.perf_counter() - start) / sample
+    print(f"one OptionsCalculator call per cell: about {perCall * POSITIONS * len(grid):.0f} s (extrapolated)")
+
+
+if __name__ == "__main__":
+    main()
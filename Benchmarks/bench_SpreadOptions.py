@@ -0,0 +1,47 @@
+"""
+Benchmark of the covariance engine and the spread option pricers.
+Run from the repository root with
+    python -m Benchmarks.bench_SpreadOptions
+Compares an incremental daily update with reseeding from the full history of
+CombinedEnergyFutures.csv, and Kirk's approximation on a strike ladder with
+the Monte Carlo check.
+"""
+import time
+import numpy as np
+from Calculations.SpreadOptions import CovarianceEngine, kirkSpread, spreadMonteCarlo
+from MarketData import defaultStore
+
+UPDATES = 1000
+STRIKES = 101
+
+
+def main():
+    df = defaultStore.frame()
+    engine = CovarianceEngine()
+    start = time.perf_counter()
+    engine.seed(df, ["HH", "BRN"])
+    seed = time.perf_counter() - start
+    hh, brn = engine.lastPrice("HH"), engine.lastPrice("BRN")
+    day = np.datetime64(df["DATE"].iloc[-1], "D")
+    start = time.perf_counter()
+    for offset in range(1, UPDATES + 1):
+        engine.update(day + offset, {"HH": hh, "BRN": brn})
+    update = (time.perf_counter() - start) / UPDATES
+    print(f"{len(df)} days: seed {1000 * seed:.2f} ms, update {1e6 * update:.1f} us")
+    print(f"correlation HH/BRN {engine.correlation()[0, 1]:.4f}")
+
+    strikes = np.linspace(-10, 10, STRIKES)
+    inputs = (0.35, 0.3, 0.6, 0.5, 80.0, 78.0, strikes)
+    start = time.perf_counter()
+    kirk = kirkSpread(*inputs)
+    kirkTime = time.perf_counter() - start
+    start = time.perf_counter()
+    simulated = spreadMonteCarlo(*inputs, paths=200_000, seed=1)
+    monteCarloTime = time.perf_counter() - start
+    error = np.abs(simulated["pv"] - kirk)
+    print(f"{STRIKES} strikes: Kirk {1000 * kirkTime:.2f} ms, Monte Carlo {monteCarloTime:.2f} s, "
+          f"largest difference {error.max():.4f} ({(error / simulated['stdError']).max():.1f} standard errors)")
+
+
+if __name__ == "__main__":
+    main()
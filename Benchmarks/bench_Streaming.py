@@ -0,0 +1,54 @@
+"""
+Benchmark of the streaming pipeline: tick to quote latency and throughput.
+Run from the repository root with
+    python -m Benchmarks.bench_Streaming
+Synthetic price lines are produced by a source which hands control back to
+the event loop after every line, as a socket or file tail would.  Each run
+subscribes a number of contracts to each ticker and reports latency
+percentiles (microseconds) and lines processed per second.
+"""
+import asyncio
+import time
+import numpy as np
+import pandas as pd
+from StreamingData import TickPipeline
+
+LINES = 5000
+SUBSCRIPTIONS = [1, 100, 1000, 10000]
+QUEUE_SIZES = [10, 1000]
+
+
+async def syntheticLines(count: int, seed: int = 0):
+    """A header and count lines of random-walk HH and BRN prices"""
+    rng = np.random.default_rng(seed)
+    hh = 3 * np.exp(np.cumsum(rng.normal(0, 0.02, count)))
+    brn = 80 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+    yield "DATE,HH,BRN\n"
+    for row in range(count):
+        yield f"2023-01-01,{hh[row]:.4f},{brn[row]:.4f}\n"
+        await asyncio.sleep(0)
+
+
+def main():
+    rng = np.random.default_rng(1)
+    history = pd.DataFrame({"HH": 3 * np.exp(np.cumsum(rng.normal(0, 0.02, 500))),
+                            "BRN": 80 * np.exp(np.cumsum(rng.normal(0, 0.01, 500)))})
+    print(f"{'contracts':>10} {'queue':>6} {'p50 (us)':>9} {'p99 (us)':>9} {'max (us)':>10} {'lines/s':>9}")
+    for subscriptions in SUBSCRIPTIONS:
+        for queueSize in QUEUE_SIZES:
+            pipeline = TickPipeline(queueSize=queueSize, decay=0.94)
+            pipeline.seed(history, ["HH", "BRN"])
+            for strike in np.linspace(2, 4, subscriptions):
+                pipeline.subscribe("HH", float(strike), True)
+            for strike in np.linspace(60, 100, subscriptions):
+                pipeline.subscribe("BRN", float(strike), False)
+            start = time.perf_counter()
+            asyncio.run(pipeline.run(syntheticLines(LINES)))
+            seconds = time.perf_counter() - start
+            stats = pipeline.latencyStats()
+            print(f"{2 * subscriptions:>10} {queueSize:>6} {stats['p50']:>9.1f} {stats['p99']:>9.1f} "
+                  f"{stats['max']:>10.1f} {LINES / seconds:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
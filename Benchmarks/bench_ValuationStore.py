@@ -0,0 +1,51 @@
+"""
+Benchmark of the valuation store: a full nightly pricing of a book against
+reruns which find nothing changed or only one ticker's prices corrected.
+Run from the repository root with
+    python -m Benchmarks.bench_ValuationStore
+"""
+import datetime
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from Calculations.ValuationStore import ValuationStore
+from MarketData import defaultStore
+
+BOOK = 100_000
+
+
+def randomBook(size: int, seed: int = 0) -> pd.DataFrame:
+    """Distinct HH and BRN contracts on delivery months after the csv ends"""
+    rng = np.random.default_rng(seed)
+    ticker = rng.choice(["HH", "BRN"], size)
+    months = np.datetime64("2023-06", "M") + rng.integers(0, 36, size)
+    forward = np.where(ticker == "HH", 2.5, 80.0)
+    return pd.DataFrame({"ticker": ticker, "deliveryMonth": months.astype(str),
+                         "strike": np.round(forward * rng.uniform(0.5, 1.5, size), 4) + 1e-6 * np.arange(size),
+                         "isCall": rng.random(size) < 0.5, "quantity": rng.integers(-10, 10, size)})
+
+
+def main():
+    df = defaultStore.frame()
+    asOf = df["DATE"].iloc[-1].date()
+    with tempfile.TemporaryDirectory() as directory:
+        store = ValuationStore(os.path.join(directory, "valuations.sqlite"))
+        start = time.perf_counter()
+        store.addContracts(randomBook(BOOK))
+        print(f"add {BOOK} contracts: {time.perf_counter() - start:.2f} s")
+        corrected = df.copy()
+        corrected.loc[corrected.index[-1], "HH"] *= 1.01
+        for label, data in (("full pricing", df), ("nothing changed", df), ("HH corrected", corrected)):
+            start = time.perf_counter()
+            summary = store.recompute(data, asOf)
+            print(f"{label:>16}: {summary['repriced']:>6} repriced in {time.perf_counter() - start:.2f} s")
+        start = time.perf_counter()
+        rows = len(store.valuations(asOf, ticker="BRN", expiryTo=asOf + datetime.timedelta(days=180)))
+        print(f"as-of query ({rows} rows): {1000 * (time.perf_counter() - start):.1f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark showing that the incremental volatility engine has a flat update cost.
+Run from the repository root with
+    python -m Benchmarks.bench_VolatilityEngine
+For each history length the engine is seeded once (vectorized) and then
+timed over a fixed number of new prints.  historicalVol, which rescans the
+whole history, is timed alongside for comparison up to 10^6 rows.
+"""
+import time
+import numpy as np
+import pandas as pd
+from Calculations.VolatilityCalculations import historicalVol
+from Calculations.VolatilityEngine import VolatilityEngine
+
+SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+UPDATES = 10 ** 4
+RESCAN_LIMIT = 10 ** 6 # Largest history rescanned with historicalVol
+
+
+def syntheticPrices(size: int, seed: int = 0) -> np.ndarray:
+    """Geometric random walk of daily prices"""
+    rng = np.random.default_rng(seed)
+    return 50 * np.exp(np.cumsum(rng.normal(0, 0.02, size)))
+
+
+def main():
+    print(f"{'history':>10} {'seed (s)':>9} {'update (us)':>12} {'historicalVol (ms)':>19}")
+    newPrints = syntheticPrices(UPDATES, seed=1)
+    for size in SIZES:
+        df = pd.DataFrame({"HH": syntheticPrices(size)})
+        engine = VolatilityEngine()
+
+        start = time.perf_counter()
+        engine.seed(df, "HH")
+        seedSeconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for price in newPrints:
+            engine.update("HH", float(price))
+            engine.vol("HH", 20)
+        updateMicros = (time.perf_counter() - start) / UPDATES * 1e6
+
+        rescan = "-"
+        if size <= RESCAN_LIMIT:
+            start = time.perf_counter()
+            historicalVol(df, "HH")
+            rescan = f"{(time.perf_counter() - start) * 1e3:.3f}"
+        print(f"{size:>10} {seedSeconds:>9.4f} {updateMicros:>12.2f} {rescan:>19}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark of the volatility surface.
+Run from the repository root with
+    python -m Benchmarks.bench_VolatilitySurface
+Builds a surface of 24 monthly SVI smiles, then reports the cost per point of
+sigma(K, T) queries for chains of increasing size, and the time to fit an
+expiry from scratch against refitting it after its quotes move.
+"""
+import time
+import numpy as np
+from Calculations.VolatilitySurface import VolatilitySurface, sviTotalVariance
+
+EXPIRIES = np.arange(1, 25) / 12
+FORWARD = 80.0
+SIZES = [10 ** 2, 10 ** 4, 10 ** 6]
+
+
+def quotes(time_: float, shift: float = 0.0):
+    """Strikes and vols of a synthetic smile"""
+    strikes = FORWARD * np.exp(np.linspace(-0.6, 0.6, 25))
+    parameters = np.array([0.03 * time_ + shift, 0.05 + 0.02 * time_, -0.35, 0.02, 0.2])
+    return strikes, np.sqrt(sviTotalVariance(parameters, np.log(strikes / FORWARD)) / time_)
+
+
+def main():
+    surface = VolatilitySurface()
+    start = time.perf_counter()
+    for time_ in EXPIRIES:
+        surface.fitExpiry(time_, FORWARD, *quotes(time_))
+    cold = (time.perf_counter() - start) / len(EXPIRIES)
+    start = time.perf_counter()
+    for time_ in EXPIRIES:
+        surface.fitExpiry(time_, FORWARD, *quotes(time_, shift=0.002))
+    warm = (time.perf_counter() - start) / len(EXPIRIES)
+    print(f"fit per expiry: {1000 * cold:.2f} ms from scratch, {1000 * warm:.2f} ms refit")
+
+    rng = np.random.default_rng(0)
+    for size in SIZES:
+        strikes = FORWARD * np.exp(rng.uniform(-0.6, 0.6, size))
+        times = rng.uniform(EXPIRIES[0], EXPIRIES[-1], size)
+        start = time.perf_counter()
+        surface.sigma(strikes, times)
+        seconds = time.perf_counter() - start
+        print(f"{size:>8} points {seconds:>9.5f} s {1e6 * seconds / size:>8.3f} us per point")
+
+
+if __name__ == "__main__":
+    main()
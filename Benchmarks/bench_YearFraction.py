@@ -0,0 +1,48 @@
+"""
+Year fractions from the cumulative business-day index against np.busday_count.
+Run from the repository root with
+    python -m Benchmarks.bench_YearFraction
+The scalar case is one pricing's timeBetween call; the array cases compare
+vectorized counts, with and without a holiday calendar.
+"""
+import datetime
+import time
+import numpy as np
+from Calendar.ExpiryCalendar import exchangeHolidays
+from Calendar.YearFraction import defaultYearFraction
+
+SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+SCALAR_CALLS = 10 ** 4
+
+
+def timed(function, *args) -> float:
+    """Seconds for one call of function"""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    index = defaultYearFraction("BUS/260")
+    date_1, date_2 = datetime.date(2023, 2, 7), datetime.date(2023, 8, 31)
+    busdayMicros = timed(lambda: [np.busday_count(date_1, date_2) for _ in range(SCALAR_CALLS)]) / SCALAR_CALLS * 1e6
+    indexMicros = timed(lambda: [index.yearFraction(date_1, date_2) for _ in range(SCALAR_CALLS)]) / SCALAR_CALLS * 1e6
+    print(f"single pair: busday_count {busdayMicros:.2f} us, index {indexMicros:.2f} us")
+
+    rng = np.random.default_rng(0)
+    for convention in ("BUS/260", "BUS/252"):
+        index = defaultYearFraction(convention)
+        holidays = exchangeHolidays(1990, 2080) if convention == "BUS/252" else []
+        calendar = np.busdaycalendar(holidays=np.array(holidays, dtype="datetime64[D]"))
+        print(convention)
+        print(f"{'pairs':>10} {'busday_count (s)':>17} {'index (s)':>10} {'speed-up':>9}")
+        for size in SIZES:
+            dates_1 = np.datetime64("2023-02-07") + rng.integers(0, 30, size)
+            dates_2 = np.datetime64("2023-03-01") + rng.integers(0, 3650, size)
+            busdaySeconds = timed(lambda: np.busday_count(dates_1, dates_2, busdaycal=calendar))
+            indexSeconds = timed(index.yearFraction, dates_1, dates_2)
+            print(f"{size:>10} {busdaySeconds:>17.4f} {indexSeconds:>10.4f} {busdaySeconds / indexSeconds:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
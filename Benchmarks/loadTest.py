@@ -0,0 +1,84 @@
+"""
+Local load test for the JSON pricing endpoint.
+Run from the repository root with
+    python -m Benchmarks.loadTest [--url URL] [--clients N] [--requests N] [--contracts N]
+Without --url the Flask app is started in this process on a free port with
+the threaded server.  Each client thread posts batches of random contracts
+and the script reports the latency percentiles and requests per second.
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from werkzeug.serving import make_server
+
+
+def randomContracts(count: int, rng: np.random.Generator) -> list:
+    """Random HH and BRN contracts around the current futures values"""
+    contracts = []
+    for _ in range(count):
+        ticker = "HH" if rng.random() < 0.5 else "BRN"
+        forward = 2.17 if ticker == "HH" else 80.48
+        contracts.append({"ticker": ticker, "strike": round(forward * rng.uniform(0.5, 1.5), 2),
+                          "isCall": bool(rng.random() < 0.5)})
+    return contracts
+
+
+def startServer():
+    """Serve the Flask app on a free local port in a background thread"""
+    from flask_app import Flask_App, warmUp
+    warmUp()
+    logging.getLogger("werkzeug").setLevel(logging.ERROR) # No log line per request
+    server = make_server("127.0.0.1", 0, Flask_App, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/api/v1/price"
+
+
+def post(url: str, body: bytes) -> float:
+    """Seconds taken by one request"""
+    start = time.perf_counter()
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        response.read()
+        if response.status != 200:
+            raise RuntimeError("Request failed with status " + str(response.status))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="endpoint to test; by default a local server is started")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client threads")
+    parser.add_argument("--requests", type=int, default=400, help="total requests")
+    parser.add_argument("--contracts", type=int, default=100, help="contracts per request")
+    arguments = parser.parse_args()
+
+    server = None
+    url = arguments.url
+    if url is None:
+        server, url = startServer()
+    rng = np.random.default_rng(0)
+    bodies = [json.dumps({"contracts": randomContracts(arguments.contracts, rng)}).encode()
+              for _ in range(min(arguments.requests, 50))]
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(arguments.clients) as executor:
+            latencies = list(executor.map(lambda i: post(url, bodies[i % len(bodies)]), range(arguments.requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    latencies = np.array(latencies) * 1e3
+    print(f"{arguments.requests} requests of {arguments.contracts} contracts with {arguments.clients} clients")
+    print(f"p50 {np.percentile(latencies, 50):.2f} ms, p99 {np.percentile(latencies, 99):.2f} ms, "
+          f"{arguments.requests / elapsed:.1f} requests/s, "
+          f"{arguments.requests * arguments.contracts / elapsed:,.0f} contracts/s")
+
+
+if __name__ == '__main__':
+    main()
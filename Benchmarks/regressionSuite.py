@@ -0,0 +1,246 @@
+"""
+Performance regression suite for the pricing hot paths.
+Run from the repository root with
+    python -m Benchmarks.regressionSuite [--scale S] [--save FILE] [--compare FILE] [--threshold T]
+Each benchmark times one call of a hot path on synthetic data whose size is
+multiplied by --scale: scalar and batch Black76, historicalVol over several
+history lengths, EnergyCalendar and ExpiryCalendar expiry lookups,
+timeBetween, end-to-end PV and the Flask /price/ route through the test
+client (which prices from CombinedEnergyFutures.csv, with the pricing cache
+emptied before each request).
+Every benchmark is timed as the best of --repeats runs of a loop long enough
+to be measurable, and the results are printed and optionally saved as JSON.
+With --compare the results are checked against a saved baseline: a
+benchmark more than --threshold times slower than its baseline is a
+regression, and the exit status is then 1.  Benchmarks run but absent from
+the baseline, and baseline benchmarks not run, are listed.  Benchmark names
+and sizes depend on --scale, so a baseline recorded at another scale is
+refused with exit status 2, as is one recorded with other numpy or pandas
+versions (which would measure a library upgrade rather than a change to
+the code) and a comparison with no benchmark in common.
+Baselines depend on the machine, so compare against one recorded on the same
+machine; Benchmarks/baseline.json was recorded on a single core at scale 1,
+with the numpy and pandas versions pinned in requirements.txt.
+"""
+import argparse
+import datetime
+import json
+import platform
+import sys
+import timeit
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+BASELINE = "Benchmarks/baseline.json"
+HISTORY_LENGTHS = (1_000, 10_000, 100_000) # Rows of price history at scale 1
+
+
+def syntheticHistory(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Price history laid out like CombinedEnergyFutures.csv, ending today"""
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset(np.datetime64(datetime.date.today(), "D"), np.arange(-rows + 1, 1), roll="backward")
+    return pd.DataFrame({"DATE": dates.astype("datetime64[ns]"),
+                         "HH": 3.0 * np.exp(np.cumsum(rng.normal(0, 0.03, rows))),
+                         "BRN": 80.0 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))})
+
+
+def _scaled(count: int, scale: float) -> int:
+    return max(1, int(count * scale))
+
+
+def benchmarks(scale: float = 1.0) -> Dict[str, Callable[[], Callable[[], object]]]:
+    """
+    The benchmarks by name.  Each entry builds its data when called and
+    returns the function to be timed, so that unselected benchmarks cost nothing.
+    """
+    from Calculations.OptionsCalculator import OptionsCalculator, batchBlack76
+    from Calculations.PVCalculator import PV
+    from Calculations.VolatilityCalculations import historicalVol
+    from Calendar.CalendarComputations import timeBetween
+    from Calendar.EnergyCalendar import EnergyCalendar
+    from Calendar.ExpiryCalendar import defaultCalendar
+    from Benchmarks.bench_Black76 import randomContracts
+
+    def black76Scalar():
+        return lambda: OptionsCalculator(0.3, 0.5, 80.0, 82.0).Black76(True)
+
+    def black76Batch():
+        contracts = randomContracts(_scaled(100_000, scale))
+        return lambda: batchBlack76(*contracts)
+
+    def historicalVolOf(rows):
+        def build():
+            df = syntheticHistory(rows)
+            return lambda: historicalVol(df, "HH")
+        return build
+
+    def energyCalendar():
+        return lambda: EnergyCalendar((2023, 5, 17)).lastBusinessDayEnergy("BRN")
+
+    def expiryCalendar():
+        calendar = defaultCalendar()
+        thisYear = datetime.date.today().year
+        months = np.arange(np.datetime64(f"{thisYear}-01", "M"), np.datetime64(f"{thisYear + 10}-01", "M"))
+        months = np.resize(months, _scaled(10_000, scale))
+        return lambda: calendar.expiries("BRN", months)
+
+    def timeBetweenDates():
+        today = datetime.date.today()
+        expiry = today + datetime.timedelta(days=200)
+        timeBetween(today, expiry) # Builds the shared index outside the timing
+        return lambda: timeBetween(today, expiry)
+
+    def pv():
+        df = syntheticHistory(_scaled(1_000, scale))
+        return lambda: PV(df, "HH", 1, 3.0, True)
+
+    def flaskPrice():
+        from flask_app import Flask_App
+        from Calculations.PricingCache import pvCache
+        client = Flask_App.test_client()
+        form = {"Ticker": "HH", "Strike": "2.5", "Call": "Yes", "Upload": "No"}
+        def request():
+            pvCache.clear()
+            response = client.post('/price/', data=form)
+            if response.status_code != 200:
+                raise RuntimeError("The /price/ route failed")
+        return request
+
+    suite = {"black76.scalar": black76Scalar, "black76.batch": black76Batch}
+    suite.update({f"historicalVol.{_scaled(rows, scale)}": historicalVolOf(_scaled(rows, scale))
+                  for rows in HISTORY_LENGTHS})
+    suite.update({"energyCalendar.expiry": energyCalendar, "expiryCalendar.expiries": expiryCalendar,
+                  "timeBetween": timeBetweenDates, "pv": pv, "flask.price": flaskPrice})
+    return suite
+
+
+def runSuite(scale: float = 1.0, repeats: int = 5, names: Optional[List[str]] = None,
+             minimumTime: float = 0.05) -> dict:
+    """
+    Time the benchmarks.
+    :param scale: multiplies the size of every synthetic dataset
+    :param repeats: timing runs per benchmark, of which the fastest is kept
+    :param names: benchmarks to run, all of them by default
+    :param minimumTime: each timing run loops for at least this many seconds
+    :return: dictionary with the environment under meta and seconds per call by benchmark under results
+    """
+    suite = benchmarks(scale)
+    unknown = [name for name in names or () if name not in suite]
+    if unknown:
+        raise ValueError("Unknown benchmarks: " + ", ".join(unknown))
+    results = {}
+    for name in names or suite:
+        function = suite[name]()
+        function() # Warm up caches and lazy imports
+        timer = timeit.Timer(function)
+        number = 1
+        while timer.timeit(number) < minimumTime:
+            number *= 2
+        results[name] = min(timer.repeat(repeats, number)) / number
+    meta = {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "scale": scale, "date": datetime.date.today().isoformat()}
+    return {"meta": meta, "results": results}
+
+
+def incompatibility(baseline: dict, current: dict) -> Optional[str]:
+    """
+    Why two runs can not be compared: a different scale, or different numpy
+    or pandas versions.  None when they can, or when a run does not record a setting.
+    """
+    for setting, described in (("scale", "at scale"), ("numpy", "with numpy"), ("pandas", "with pandas")):
+        recorded, running = baseline.get("meta", {}).get(setting), current.get("meta", {}).get(setting)
+        if recorded is not None and running is not None and recorded != running:
+            return f"the baseline was recorded {described} {recorded}, not {running}"
+    return None
+
+
+def compare(baseline: dict, current: dict, threshold: float = 1.5) -> List[dict]:
+    """
+    Ratios of current to baseline timings.
+    :param threshold: ratio above which a benchmark counts as regressed
+    :return: one dictionary per benchmark with name, status, baseline, current, ratio and regressed;
+    status is "compared" for benchmarks in both, "new" for those only in current (baseline and
+    ratio None) and "missing" for those only in the baseline (current and ratio None)
+    """
+    if threshold <= 1:
+        raise ValueError("The regression threshold must be greater than 1")
+    reason = incompatibility(baseline, current)
+    if reason is not None:
+        raise ValueError("Can not compare: " + reason)
+    rows = []
+    for name, seconds in current["results"].items():
+        if name in baseline["results"]:
+            ratio = seconds / baseline["results"][name]
+            rows.append({"name": name, "status": "compared", "baseline": baseline["results"][name],
+                         "current": seconds, "ratio": ratio, "regressed": ratio > threshold})
+        else:
+            rows.append({"name": name, "status": "new", "baseline": None, "current": seconds, "ratio": None,
+                         "regressed": False})
+    for name, seconds in baseline["results"].items():
+        if name not in current["results"]:
+            rows.append({"name": name, "status": "missing", "baseline": seconds, "current": None, "ratio": None,
+                         "regressed": False})
+    return rows
+
+
+def _format(seconds: float) -> str:
+    """Seconds in the most readable unit"""
+    for unit, factor in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= factor:
+            return f"{seconds / factor:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for the synthetic data sizes")
+    parser.add_argument("--repeats", type=int, default=5, help="timing runs per benchmark")
+    parser.add_argument("--only", nargs="+", help="benchmarks to run")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=1.5, help="slowdown ratio counted as a regression")
+    arguments = parser.parse_args(argv)
+
+    current = runSuite(arguments.scale, arguments.repeats, arguments.only)
+    if arguments.save:
+        with open(arguments.save, "w") as output:
+            json.dump(current, output, indent=2)
+    if not arguments.compare:
+        for name, seconds in current["results"].items():
+            print(f"{name:>28} {_format(seconds):>12}")
+        return 0
+
+    with open(arguments.compare) as baselineFile:
+        baseline = json.load(baselineFile)
+    reason = incompatibility(baseline, current)
+    if reason is not None:
+        print("Can not compare: " + reason)
+        return 2
+    if arguments.only:
+        # Baseline benchmarks left out on purpose are not missing
+        baseline = {**baseline, "results": {name: seconds for name, seconds in baseline["results"].items()
+                                            if name in arguments.only}}
+    rows = compare(baseline, current, arguments.threshold)
+    if not any(row["status"] == "compared" for row in rows):
+        print("Can not compare: no benchmark is in both the baseline and this run")
+        return 2
+    print(f"{'benchmark':>28} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for row in rows:
+        if row["status"] == "compared":
+            flag = "  REGRESSION" if row["regressed"] else ""
+            print(f"{row['name']:>28} {_format(row['baseline']):>12} {_format(row['current']):>12} "
+                  f"{row['ratio']:>7.2f}{flag}")
+        elif row["status"] == "new":
+            print(f"{row['name']:>28} {'-':>12} {_format(row['current']):>12} {'':>7}  NEW (not in the baseline)")
+        else:
+            print(f"{row['name']:>28} {_format(row['baseline']):>12} {'-':>12} {'':>7}  MISSING (not run)")
+    regressed = [row["name"] for row in rows if row["regressed"]]
+    if regressed:
+        print(f"{len(regressed)} benchmark(s) slower than {arguments.threshold}x the baseline: " + ", ".join(regressed))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+"""
+Batch revaluation of large portfolios.
+PV prices one option at a time and repeats the data lookup, the volatility
+estimate and the calendar work for each of them.  The runner here splits a
+position file into chunks of whole lines and, for every chunk:
+  1. validates the positions in bulk,
+  2. groups them by (ticker, delivery month) so that sigma, the forward and
+     the time to expiry are computed once per group and broadcast back,
+  3. prices the chunk with the vectorized Black76 kernel,
+  4. writes the priced chunk to a csv part, the parts being joined in order.
+With several workers each chunk goes through all four steps in a pool
+process, which reads its own byte range of the file, so the parent only
+splits the file and joins the parts.  The forward and historical vol of
+every ticker are computed once in the parent and shared with the workers.
+The position file is a csv with the columns
+    ticker, deliveryMonth (YYYY-MM), strike, isCall (Yes/No or True/False), quantity
+and optionally sigma and T columns whose non-empty values override the
+historical vol and the calendar time to expiry.  Quoted fields must not
+contain line breaks, since the file is split at line breaks.
+Positions which cannot be priced get a NaN PV and an error message rather
+than stopping the whole run.
+"""
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import time
+from multiprocessing import Pool
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from Calculations.CallFlags import CALL_FLAG_ERROR, callFlag
+from Calculations.ForwardCurve import ForwardCurve
+from Calculations.OptionsCalculator import batchBlack76
+from Calculations.VolatilityCalculations import historicalVol
+from Calendar.ExpiryCalendar import EXPIRY_MONTHS_BACK, defaultCalendar
+from Calendar.YearFraction import defaultYearFraction
+
+POSITION_COLUMNS = ["ticker", "deliveryMonth", "strike", "isCall", "quantity"]
+# Columns added to the positions by priceFrame
+_PRICED_COLUMNS = ["sigma", "time", "expiry", "forward", "pv", "value", "error"]
+# Lines read to estimate the bytes per position when splitting a file
+_SAMPLE_LINES = 1000
+
+# Runner inside each worker process
+_workerRunner = None
+
+
+def _attachWorker(settings: dict, tickerInputs: dict):
+    """Pool initializer: one runner per worker, sharing the parent's per-ticker forward and sigma"""
+    global _workerRunner
+    _workerRunner = BatchRunner(workers=1, **settings)
+    _workerRunner._tickerInputs = tickerInputs
+
+
+def _priceSlice(positions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Price a slice of an in-memory position frame in a worker.
+    Text columns arrive as categoricals, which pickle as integer codes, and
+    only the priced columns are sent back.
+    """
+    categorical = [column for column, dtype in positions.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    positions = positions.astype({column: object for column in categorical})
+    priced = _workerRunner.priceFrame(positions)[_PRICED_COLUMNS]
+    return priced.astype({"error": "category"})
+
+
+def _priceRange(task) -> dict:
+    """Price a byte range of a position file in a worker"""
+    return _workerRunner._priceRange(*task)
+
+
+def parseCallFlags(flags: pd.Series) -> np.ndarray:
+    """
+    Vectorized version of the yes/no validation of the web form, see CallFlags.callFlag.
+    :param flags: Yes/No strings (only the first letter matters) or booleans
+    :return: float array with 1 for calls, 0 for puts and NaN for anything else, including missing flags
+    """
+    if flags.dtype == bool:
+        return flags.to_numpy(dtype=np.float64)
+    if pd.api.types.infer_dtype(flags, skipna=True) != "string":
+        # Mixed types are parsed one by one, since factorize would merge True with 1
+        return np.array([callFlag(flag) for flag in flags], dtype=np.float64)
+    # Only a handful of distinct spellings occur, so each is parsed once;
+    # missing flags get code -1, which picks the trailing NaN
+    codes, uniques = pd.factorize(flags)
+    parsed = np.array([callFlag(flag) for flag in uniques] + [np.nan], dtype=np.float64)
+    return parsed[codes]
+
+
+def parseNumbers(values: pd.Series) -> np.ndarray:
+    """
+    Numbers, or strings of numbers, as floats.
+    :param values: series of numeric inputs
+    :return: float array with NaN for anything else, including missing values and booleans,
+    which JSON true and false would otherwise turn into 1 and 0
+    """
+    if values.dtype == bool:
+        return np.full(len(values), np.nan)
+    numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+    if values.dtype == object:
+        numbers[values.map(lambda value: isinstance(value, (bool, np.bool_))).to_numpy(dtype=bool)] = np.nan
+    return numbers
+
+
+class BatchRunner:
+    """
+    Portfolio revaluation against one market data snapshot.
+    Market inputs are derived once per (ticker, delivery month) and cached
+    for the lifetime of the runner.
+    """
+
+    def __init__(self, marketData: pd.DataFrame, workers: Optional[int] = None, chunkSize: int = 10 ** 6,
+                 sliceSize: int = 50_000, rate: float = 0.05, valuationDate: Optional[datetime.date] = None,
+                 curves: Optional[Dict[str, ForwardCurve]] = None):
+        """
+        :param marketData: price history with one column per ticker, as in CombinedEnergyFutures.csv
+        :param workers: number of pricing processes; 1 prices in this process
+        :param chunkSize: positions read from the file and priced together
+        :param sliceSize: positions priced by one task of the pool
+        :param rate: interest rate
+        :param valuationDate: pricing date, today by default
+        :param curves: forward curve per ticker; tickers without one use their last price for every delivery month
+        """
+        self.marketData = marketData
+        self.workers = workers or os.cpu_count() or 1
+        self.chunkSize = chunkSize
+        self.sliceSize = sliceSize
+        self.rate = rate
+        self.valuationDate = valuationDate or datetime.datetime.now().date()
+        self.calendar = defaultCalendar()
+        self.yearFraction = defaultYearFraction("BUS/260")
+        self.curves = curves or {}
+        self._tickerInputs = {} # ticker -> (forward, sigma)
+
+    def _forwardAndSigma(self, ticker: str):
+        """Forward and historical vol of a ticker, computed once"""
+        if ticker not in self._tickerInputs:
+            forward = self.marketData[ticker].iloc[-1]
+            self._tickerInputs[ticker] = (forward, historicalVol(self.marketData, ticker))
+        return self._tickerInputs[ticker]
+
+    def marketInputs(self, positions: pd.DataFrame) -> pd.DataFrame:
+        """
+        Per-position sigma, time to expiry, forward, expiry and validation errors.
+        The work is done once per (ticker, delivery month) group and broadcast back.
+        :param positions: dataframe with the POSITION_COLUMNS
+        """
+        missing = [column for column in POSITION_COLUMNS if column not in positions.columns]
+        if missing:
+            raise ValueError("Missing position columns: " + ", ".join(missing))
+        count = len(positions)
+        error = np.full(count, "", dtype=object)
+
+        # Group codes from the codes of the two key columns, without building string keys.
+        # Missing keys become "" so that they form their own invalid group.
+        tickerCodes, tickers = pd.factorize(positions["ticker"].fillna("").astype(str))
+        monthCodes, months = pd.factorize(positions["deliveryMonth"].fillna("").astype(str))
+        inverse, groupKeys = pd.factorize(tickerCodes * len(months) + monthCodes)
+        groups = [(tickers[key // len(months)], months[key % len(months)]) for key in groupKeys]
+        groupSigma, groupTime, groupPrice = (np.full(len(groups), np.nan) for _ in range(3))
+        groupExpiry = np.full(len(groups), np.datetime64("NaT"), dtype="datetime64[D]")
+        groupError = np.full(len(groups), "", dtype=object)
+        for position, (ticker, month) in enumerate(groups):
+            try:
+                if not ticker:
+                    raise ValueError("The ticker is missing")
+                if not month:
+                    raise ValueError("The delivery month is missing")
+                if ticker not in self.marketData.columns or ticker not in EXPIRY_MONTHS_BACK:
+                    raise ValueError("Currently there is no pricing available for this ticker")
+                expiry = self.calendar.expiries(ticker, np.datetime64(month, "M"))
+                T = self.yearFraction.yearFraction(np.datetime64(self.valuationDate, "D"), expiry)
+                if T < 0:
+                    raise ValueError("Error -- time to expiry can not be negative")
+                groupPrice[position], groupSigma[position] = self._forwardAndSigma(ticker)
+                if ticker in self.curves:
+                    groupPrice[position] = self.curves[ticker].forwardForMonths(np.datetime64(month, "M"))
+                groupTime[position], groupExpiry[position] = T, expiry
+            except ValueError as err:
+                groupError[position] = str(err)
+
+        error[:] = groupError[inverse]
+        sigma, T = groupSigma[inverse], groupTime[inverse]
+        # Optional per-position overrides of the market inputs
+        for column, values in (("sigma", sigma), ("T", T)):
+            if column in positions.columns:
+                given = positions[column].notna().to_numpy()
+                values[given] = parseNumbers(positions[column])[given]
+        strike = parseNumbers(positions["strike"])
+        isCall = parseCallFlags(positions["isCall"])
+        error[(error == "") & positions["strike"].notna().to_numpy() & np.isnan(strike)] = "Strike must be a number"
+        error[(error == "") & ~(np.isfinite(strike) & (strike > 0))] = "Strike must be positive"
+        error[(error == "") & np.isnan(isCall)] = CALL_FLAG_ERROR
+        error[(error == "") & ~(np.isfinite(sigma) & (sigma > 0))] = "Can not price -- error found in sigma"
+        error[(error == "") & ~(np.isfinite(T) & (T >= 0))] = "Error -- time to expiry can not be negative"
+        return pd.DataFrame({"sigma": sigma, "time": T, "price": groupPrice[inverse],
+                             "strike": strike, "isCall": isCall, "expiry": groupExpiry[inverse], "error": error},
+                            index=positions.index)
+
+    def priceFrame(self, positions: pd.DataFrame, pool: Optional[Pool] = None) -> pd.DataFrame:
+        """
+        Price positions held in memory.
+        :param positions: dataframe with the POSITION_COLUMNS
+        :param pool: process pool from openPool; when given, slices of sliceSize
+        positions are validated and priced in the workers
+        :return: the positions with sigma, time, expiry, pv, value and error columns added
+        """
+        if pool is not None and len(positions):
+            text = [column for column, dtype in positions.dtypes.items() if dtype == object]
+            compact = positions.astype({column: "category" for column in text})
+            slices = [compact.iloc[start:start + self.sliceSize] for start in range(0, len(compact), self.sliceSize)]
+            priced = pd.concat(pool.map(_priceSlice, slices))
+            result = positions.copy()
+            for column in _PRICED_COLUMNS:
+                result[column] = priced[column].to_numpy()
+            return result
+
+        inputs = self.marketInputs(positions)
+        valid = (inputs["error"] == "").to_numpy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pv = batchBlack76(inputs["sigma"], inputs["time"], inputs["price"], inputs["strike"],
+                              inputs["isCall"] > 0, self.rate)
+        pv = np.where(valid, pv, np.nan)
+
+        result = positions.copy()
+        result["sigma"], result["time"], result["expiry"] = inputs["sigma"], inputs["time"], inputs["expiry"]
+        result["forward"] = inputs["price"]
+        result["pv"] = pv
+        result["value"] = pv * pd.to_numeric(positions["quantity"], errors="coerce").to_numpy(dtype=np.float64)
+        result["error"] = inputs["error"]
+        return result
+
+    def priceStrip(self, ticker: str, deliveryMonths, strikes, isCall, quantity=1) -> pd.DataFrame:
+        """
+        Price options on a strip of delivery months in one pass, each off the
+        forward for its own month when the ticker has a curve.
+        :param ticker: ticker string
+        :param deliveryMonths: array-like of delivery months ("YYYY-MM" strings or datetime64[M])
+        :param strikes: one strike for the whole strip or one per month
+        :param isCall: one flag for the whole strip or one per month
+        :param quantity: one quantity for the whole strip or one per month
+        :return: as priceFrame, one row per delivery month
+        """
+        months = np.asarray(deliveryMonths, dtype="datetime64[M]").ravel()
+        count = len(months)
+        positions = pd.DataFrame({
+            "ticker": ticker, "deliveryMonth": months.astype(str),
+            "strike": np.broadcast_to(strikes, count), "isCall": np.broadcast_to(isCall, count),
+            "quantity": np.broadcast_to(quantity, count),
+        })
+        return self.priceFrame(positions)
+
+    def priceContracts(self, contracts: List[dict], monthsForward: int = 6) -> List[dict]:
+        """
+        Price a list of contracts as received by the JSON API.
+        Each contract has a ticker, strike and isCall and optionally a
+        deliveryMonth (by default monthsForward months after the valuation date),
+        a quantity (by default 1) and sigma and T overrides.
+        Contracts are validated and priced together; every contract is answered,
+        in order, and one which cannot be priced (including one without a call
+        flag or with a ticker which is not a string) gets a null pv and an error message.
+        :return: one dictionary per contract with pv, sigma, T, expiry and error
+        """
+        if not all(isinstance(contract, dict) for contract in contracts):
+            raise ValueError("Every contract must be a JSON object")
+        # One row per contract, even for contracts without any fields
+        positions = pd.DataFrame(contracts, index=range(len(contracts)))
+        delivery = np.datetime64(self.valuationDate, "M") + monthsForward
+        defaults = {"ticker": None, "strike": np.nan, "isCall": None, "quantity": 1, "deliveryMonth": str(delivery)}
+        for column, default in defaults.items():
+            if column not in positions.columns:
+                positions[column] = default
+            else:
+                positions[column] = positions[column].where(positions[column].notna(), default)
+
+        priced = self.priceFrame(positions)
+        # Missing tickers already have their error; other values must be strings
+        badTicker = positions["ticker"].map(lambda ticker: not isinstance(ticker, str) and pd.notna(ticker))
+        priced.loc[badTicker.to_numpy(dtype=bool), "error"] = "The ticker must be a string"
+        results = []
+        for row in priced.itertuples(index=False):
+            valid = not row.error
+            results.append({
+                "ticker": _jsonValue(row.ticker), "strike": _jsonValue(row.strike), "isCall": _jsonValue(row.isCall),
+                "deliveryMonth": _jsonValue(row.deliveryMonth),
+                "pv": _jsonFloat(row.pv) if valid else None,
+                "sigma": _jsonFloat(row.sigma), "T": _jsonFloat(row.time),
+                "expiry": None if pd.isna(row.expiry) else str(row.expiry.date()),
+                "error": row.error or None,
+            })
+        return results
+
+    def openPool(self) -> Pool:
+        """
+        Pool of self.workers processes, each with a runner sharing the forward
+        and sigma of every ticker, which are computed here once.
+        """
+        for ticker in self.marketData.columns:
+            if ticker in EXPIRY_MONTHS_BACK:
+                self._forwardAndSigma(ticker)
+        settings = {"marketData": self.marketData, "chunkSize": self.chunkSize, "sliceSize": self.sliceSize,
+                    "rate": self.rate, "valuationDate": self.valuationDate, "curves": self.curves}
+        return Pool(self.workers, initializer=_attachWorker, initargs=(settings, self._tickerInputs))
+
+    def run(self, positionFile: str, outputFile: str) -> dict:
+        """
+        Revalue every position in a file, writing the results to a csv.
+        :param positionFile: csv with the POSITION_COLUMNS
+        :param outputFile: csv of the priced positions, in the order of the file
+        :return: summary with the number of positions, invalid positions, total value and seconds
+        """
+        start = time.perf_counter()
+        names, ranges = self._splitFile(positionFile)
+        if self.workers == 1:
+            summaries = [self._priceRange(positionFile, names, first, last, outputFile, number == 0)
+                         for number, (first, last) in enumerate(ranges)]
+        else:
+            with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(outputFile))) as directory:
+                parts = [os.path.join(directory, f"part{number}.csv") for number in range(len(ranges))]
+                tasks = [(positionFile, names, first, last, part, number == 0)
+                         for number, ((first, last), part) in enumerate(zip(ranges, parts))]
+                pool = self.openPool()
+                try:
+                    summaries = pool.map(_priceRange, tasks, chunksize=1)
+                finally:
+                    pool.close()
+                    pool.join()
+                with open(outputFile, "wb") as output:
+                    for part in parts:
+                        with open(part, "rb") as source:
+                            shutil.copyfileobj(source, output)
+        summary = {"positions": 0, "invalid": 0, "value": 0.0}
+        for partSummary in summaries:
+            for key in summary:
+                summary[key] += partSummary[key]
+        summary["seconds"] = time.perf_counter() - start
+        return summary
+
+    def _splitFile(self, positionFile: str):
+        """
+        Column names of a position file and the byte ranges of its chunks.
+        Ranges end at line breaks and hold about chunkSize positions each,
+        with at least one range per worker.  A file without positions has a
+        single empty range, so that the output still gets its header; an
+        empty file is read as having the POSITION_COLUMNS.
+        """
+        with open(positionFile, "rb") as source:
+            header = source.readline()
+            dataStart = source.tell()
+            sample = [source.readline() for _ in range(_SAMPLE_LINES)]
+            size = source.seek(0, os.SEEK_END)
+            names = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist() if header.strip() else POSITION_COLUMNS
+            sampleBytes = sum(len(line) for line in sample)
+            sampleLines = sum(1 for line in sample if line)
+            if sampleLines == 0:
+                return names, [(dataStart, size)]
+            chunkBytes = max(1, self.chunkSize * sampleBytes // sampleLines)
+            count = max(-(-(size - dataStart) // chunkBytes), self.workers)
+            bounds = [dataStart]
+            for number in range(1, count):
+                target = dataStart + (size - dataStart) * number // count
+                if target <= bounds[-1]:
+                    continue
+                source.seek(target - 1)
+                source.readline() # Move to the start of the next line
+                if bounds[-1] < source.tell() < size:
+                    bounds.append(source.tell())
+            bounds.append(size)
+        return names, list(zip(bounds[:-1], bounds[1:]))
+
+    def _priceRange(self, positionFile: str, names: list, first: int, last: int, outputFile: str,
+                    header: bool) -> dict:
+        """
+        Price the positions in bytes [first, last) of a file and write them to
+        outputFile, starting it when header is set and appending otherwise.
+        :return: summary with the number of positions, invalid positions and total value
+        """
+        with open(positionFile, "rb") as source:
+            source.seek(first)
+            data = source.read(last - first)
+        positions = pd.read_csv(io.BytesIO(data), header=None, names=names)
+        priced = self.priceFrame(positions)
+        priced.to_csv(outputFile, mode="w" if header else "a", header=header, index=False)
+        return {"positions": len(priced), "invalid": int(priced["pv"].isna().sum()),
+                "value": float(priced["value"].sum())}
+
+
+def _jsonFloat(value):
+    """Floats for JSON output, with NaN and infinities (not valid JSON) as None"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if np.isfinite(value) else None
+
+
+def _jsonValue(value):
+    """Echoed inputs for JSON output, with missing values (None, NaN, NaT) as None and NumPy scalars as Python ones"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return _jsonFloat(value)
+    return None if value is None or value is pd.NaT else value
@@ -0,0 +1,24 @@
+"""
+Validation of the call/put flag of a contract, shared by every batch path.
+Like the web form, a flag is a call when it starts with Y (yes) and a put
+when it starts with N (no); booleans and True/False strings are accepted
+too.  Anything else, including a missing flag (None, NaN or an empty
+string), is invalid rather than a put.
+"""
+import math
+import numpy as np
+
+CALL_FLAG_ERROR = "call_or_put was  not answered by yes or no."
+_CALL_FLAGS = {"Y": 1.0, "T": 1.0, "N": 0.0, "F": 0.0}
+
+
+def callFlag(flag) -> float:
+    """
+    :param flag: boolean, or string of which only the first letter matters
+    :return: 1 for a call, 0 for a put and NaN for anything else
+    """
+    if isinstance(flag, (bool, np.bool_)):
+        return float(flag)
+    if not isinstance(flag, str):
+        return math.nan
+    return _CALL_FLAGS.get(flag.strip()[:1].upper(), math.nan)
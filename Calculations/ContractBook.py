@@ -0,0 +1,384 @@
+"""
+Compact array-backed books of option contracts.
+An OptionsCalculator per position costs a Python object and five boxed
+floats, about 140 bytes, so a book of a million positions is slow to build
+and walk and several times larger than its data.  A ContractBook holds the
+whole book in one NumPy structured array of CONTRACT_DTYPE, 24 bytes per
+contract (plus 8 for its input row):
+    strike      float64
+    quantity    float64
+    expiry      int32, days since 1970-01-01 (epoch days), or NO_EXPIRY
+    ticker      int16, index into the book's sorted list of tickers
+    isCall      bool
+Contracts are kept sorted by ticker and then expiry, so the contracts of one
+ticker, or of one ticker between two expiries, are a slice of the array and
+are returned as views.  Each column is a view of the array as well and is
+handed to batchBlack76 and batchBlack76Greeks without being copied.
+Validation applies the checks of PV and of the web form's yes/no validation
+to every contract at once.  Books read from positions keep the contracts on
+tickers the expiry calendar does not know, with NO_EXPIRY, so that errors
+can report them contract by contract.
+Contract is the scalar counterpart for single trades, with __slots__ so that
+it carries no per-instance dictionary.
+"""
+import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Sequence, Union
+import numpy as np
+from Calculations.CallFlags import CALL_FLAG_ERROR, callFlag
+from Calculations.OptionsCalculator import OptionsCalculator, batchBlack76, batchBlack76Greeks
+from Calendar.YearFraction import defaultYearFraction
+
+if TYPE_CHECKING: # pandas is only needed to read and write dataframes
+    import pandas as pd
+
+CONTRACT_DTYPE = np.dtype([("strike", np.float64), ("quantity", np.float64), ("expiry", np.int32),
+                           ("ticker", np.int16), ("isCall", np.bool_)], align=True)
+_EPOCH = np.datetime64("1970-01-01", "D")
+NO_EXPIRY = np.iinfo(np.int32).min # Expiry of contracts on tickers without an expiry calendar
+_NO_PRICING = "Currently there is no pricing available for this ticker"
+
+
+def callFlags(flags) -> np.ndarray:
+    """
+    Vectorized CallFlags.callFlag, without pandas.
+    :param flags: booleans, or strings of which only the first letter matters (Yes/No, True/False)
+    :return: float array with 1 for calls, 0 for puts and NaN for anything else, including missing flags
+    """
+    flags = np.asarray(flags)
+    if flags.dtype == bool:
+        return flags.astype(np.float64)
+    if flags.dtype.kind == "U":
+        # Only a handful of distinct spellings occur, so each is parsed once
+        uniques, codes = np.unique(flags, return_inverse=True)
+        parsed = np.array([callFlag(flag) for flag in uniques.tolist()], dtype=np.float64)
+        return parsed[codes.reshape(flags.shape)]
+    # Mixed objects, such as strings with None or NaN for missing flags
+    return np.array([callFlag(flag) for flag in flags.ravel().tolist()], dtype=np.float64).reshape(flags.shape)
+
+
+def _missingTickers(ticker: np.ndarray) -> np.ndarray:
+    """True for each ticker which is not a non-empty string (None, NaN or "")"""
+    if ticker.dtype.kind == "U":
+        return ticker == ""
+    return np.array([not (isinstance(value, str) and value != "") for value in ticker.ravel().tolist()],
+                    dtype=bool).reshape(ticker.shape)
+
+
+def _validationErrors(missingTicker: np.ndarray, strike: np.ndarray, isCall: np.ndarray,
+                      missingExpiry: np.ndarray, quantity: np.ndarray) -> np.ndarray:
+    """Message per contract for the checks that do not depend on market data, empty for valid contracts"""
+    error = np.full(len(strike), "", dtype=object)
+    error[missingTicker] = "The ticker is missing"
+    error[(error == "") & ~(np.isfinite(strike) & (strike > 0))] = "Strike must be positive"
+    error[(error == "") & np.isnan(isCall)] = CALL_FLAG_ERROR
+    error[(error == "") & missingExpiry] = "Every contract needs an expiry date"
+    error[(error == "") & ~np.isfinite(quantity)] = "Quantity must be a finite number"
+    return error
+
+
+class Contract:
+    """
+    A single option contract, validated as PV validates its inputs.
+    """
+    __slots__ = ("ticker", "strike", "expiry", "isCall", "quantity")
+
+    def __init__(self, ticker: str, strike: float, expiry: datetime.date, isCall: Union[bool, str],
+                 quantity: float = 1.0):
+        """
+        :param ticker: ticker string, for example "HH"
+        :param strike: strike, which must be positive
+        :param expiry: expiry date of the option
+        :param isCall: True for a call and False for a put, or Yes/No as typed in the web form
+        :param quantity: number of contracts held, negative when short
+        """
+        if not (isinstance(ticker, str) and ticker != ""):
+            raise ValueError("The ticker is missing")
+        strike, quantity, flag = float(strike), float(quantity), callFlag(isCall)
+        if not (np.isfinite(strike) and strike > 0):
+            raise ValueError("Strike must be positive")
+        if np.isnan(flag):
+            raise ValueError(CALL_FLAG_ERROR)
+        if not np.isfinite(quantity):
+            raise ValueError("Quantity must be a finite number")
+        self.ticker = str(ticker)
+        self.strike = strike
+        self.expiry = expiry if type(expiry) is datetime.date else np.datetime64(expiry, "D").astype(datetime.date)
+        self.isCall = flag == 1.0
+        self.quantity = quantity
+
+    def __repr__(self) -> str:
+        return (f"Contract({self.ticker!r}, {self.strike!r}, {self.expiry!r}, {self.isCall!r}, "
+                f"{self.quantity!r})")
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Contract):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def time(self, valuationDate: datetime.date) -> float:
+        """Time to expiry in years under the BUS/260 convention used by BatchRunner"""
+        T = float(defaultYearFraction("BUS/260").yearFraction(valuationDate, self.expiry))
+        if T < 0:
+            raise ValueError("Error -- time to expiry can not be negative")
+        return T
+
+    def calculator(self, sigma: float, price: float, valuationDate: datetime.date,
+                   rate: float = 0.05) -> OptionsCalculator:
+        """
+        OptionsCalculator for this contract.
+        :param sigma: annualized volatility
+        :param price: value of the future
+        :param valuationDate: pricing date, from which the time to expiry is measured
+        :param rate: interest rate
+        """
+        return OptionsCalculator(sigma, self.time(valuationDate), price, self.strike, rate)
+
+    def pv(self, sigma: float, price: float, valuationDate: datetime.date, rate: float = 0.05) -> float:
+        """Black76 PV of one contract; parameters as in calculator"""
+        return self.calculator(sigma, price, valuationDate, rate).Black76(self.isCall)
+
+
+class ContractBook:
+    """
+    A book of contracts held as one structured array, sorted by ticker and expiry.
+    Build one with fromArrays, fromPositions or fromContracts.
+    """
+
+    def __init__(self, records: np.ndarray, tickers: Sequence[str], rows: Optional[np.ndarray] = None):
+        """
+        :param records: array of CONTRACT_DTYPE sorted by ticker code and then expiry
+        :param tickers: ticker of each code, sorted
+        :param rows: position of each contract in the input it was built from, by default its position in records
+        """
+        if records.dtype != CONTRACT_DTYPE:
+            raise ValueError("Contract records must have the CONTRACT_DTYPE layout")
+        self.records = records
+        self.tickers = tuple(tickers)
+        self.rows = np.arange(len(records)) if rows is None else rows
+        # Contracts of ticker code i are records[bounds[i]:bounds[i + 1]]
+        self._bounds = np.searchsorted(records["ticker"], np.arange(len(self.tickers) + 1))
+
+    @classmethod
+    def fromArrays(cls, ticker, strike, expiry, isCall, quantity=1.0) -> "ContractBook":
+        """
+        Validate and store contracts given column by column.
+        Arguments broadcast together, so for example one ticker may be given for a whole ladder.
+        :param ticker: ticker strings, which must not be missing or empty
+        :param strike: strikes, which must be positive and finite
+        :param expiry: expiry dates, as anything convertible to datetime64[D]
+        :param isCall: booleans, or Yes/No strings as in the web form
+        :param quantity: numbers of contracts held
+        :return: the book; rows gives the input position of each contract
+        """
+        return cls._fromColumns(ticker, strike, expiry, isCall, quantity)
+
+    @classmethod
+    def _fromColumns(cls, ticker, strike, expiry, isCall, quantity, unpriced=None) -> "ContractBook":
+        """fromArrays, except that contracts flagged in unpriced are kept without an expiry (NaT)"""
+        ticker, strike, expiry, isCall, quantity = np.broadcast_arrays(
+            np.asarray(ticker), np.asarray(strike, dtype=np.float64),
+            np.asarray(expiry, dtype="datetime64[D]"), callFlags(isCall), np.asarray(quantity, dtype=np.float64))
+        ticker, strike, expiry, isCall, quantity = (column.ravel() for column in
+                                                    (ticker, strike, expiry, isCall, quantity))
+        noExpiry = np.isnat(expiry)
+        unpriced = np.zeros(len(expiry), dtype=bool) if unpriced is None else unpriced & noExpiry
+        error = _validationErrors(_missingTickers(ticker), strike, isCall, noExpiry & ~unpriced, quantity)
+        invalid = np.flatnonzero(error != "")
+        if len(invalid):
+            raise ValueError(error[invalid[0]])
+        tickers, codes = np.unique(ticker.astype(str), return_inverse=True)
+        if len(tickers) > np.iinfo(np.int16).max:
+            raise ValueError("Too many tickers for one contract book")
+        days = np.where(noExpiry, NO_EXPIRY, (expiry - _EPOCH).astype(np.int64)).astype(np.int32)
+        order = np.lexsort((days, codes))
+        records = np.empty(len(order), dtype=CONTRACT_DTYPE)
+        records["strike"], records["quantity"] = strike[order], quantity[order]
+        records["expiry"], records["ticker"], records["isCall"] = days[order], codes[order], isCall[order] > 0
+        return cls(records, tickers.tolist(), order)
+
+    @classmethod
+    def fromPositions(cls, positions: "pd.DataFrame", calendar=None) -> "ContractBook":
+        """
+        Book of a position dataframe as read by BatchRunner, with expiries from the expiry calendar.
+        Contracts on tickers which the calendar does not know are kept with
+        NO_EXPIRY, and errors reports that there is no pricing for them.
+        :param positions: dataframe with ticker, deliveryMonth (YYYY-MM), strike, isCall and quantity columns
+        :param calendar: ExpiryCalendar, the shared default calendar if omitted
+        """
+        from Calculations.BatchRunner import POSITION_COLUMNS
+        from Calendar.ExpiryCalendar import defaultCalendar
+        missing = [column for column in POSITION_COLUMNS if column not in positions.columns]
+        if missing:
+            raise ValueError("Missing position columns: " + ", ".join(missing))
+        calendar = calendar or defaultCalendar()
+        ticker = positions["ticker"].to_numpy(dtype=object)
+        missingTicker = _missingTickers(ticker)
+        if missingTicker.any():
+            raise ValueError("The ticker is missing")
+        ticker = ticker.astype(str)
+        months = np.asarray(positions["deliveryMonth"], dtype="datetime64[M]")
+        expiry = np.full(len(positions), np.datetime64("NaT"), dtype="datetime64[D]")
+        unpriced = np.zeros(len(positions), dtype=bool)
+        for name in np.unique(ticker).tolist():
+            mask = ticker == name
+            try:
+                expiry[mask] = calendar.expiries(name, months[mask])
+            except ValueError:
+                unpriced |= mask
+        return cls._fromColumns(ticker, positions["strike"].to_numpy(), expiry, positions["isCall"].to_numpy(),
+                                positions["quantity"].to_numpy(), unpriced)
+
+    @classmethod
+    def fromContracts(cls, contracts: Iterable[Contract]) -> "ContractBook":
+        """Book of single contracts"""
+        contracts = list(contracts)
+        return cls.fromArrays([contract.ticker for contract in contracts], [contract.strike for contract in contracts],
+                              np.array([contract.expiry for contract in contracts], dtype="datetime64[D]"),
+                              np.array([contract.isCall for contract in contracts], dtype=bool),
+                              [contract.quantity for contract in contracts])
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index):
+        """A Contract for an integer index, a view of the book for a slice"""
+        if isinstance(index, slice):
+            if index.step not in (None, 1):
+                raise ValueError("Contract book slices must be contiguous")
+            return ContractBook(self.records[index], self.tickers, self.rows[index])
+        record = self.records[index]
+        expiry = None if record["expiry"] == NO_EXPIRY else (_EPOCH + int(record["expiry"])).astype(datetime.date)
+        return Contract(self.tickers[record["ticker"]], record["strike"], expiry, bool(record["isCall"]),
+                        record["quantity"])
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the contract records and their input rows"""
+        return self.records.nbytes + self.rows.nbytes
+
+    @property
+    def strike(self) -> np.ndarray:
+        return self.records["strike"]
+
+    @property
+    def quantity(self) -> np.ndarray:
+        return self.records["quantity"]
+
+    @property
+    def isCall(self) -> np.ndarray:
+        return self.records["isCall"]
+
+    @property
+    def tickerCodes(self) -> np.ndarray:
+        return self.records["ticker"]
+
+    def expiries(self) -> np.ndarray:
+        """Expiry dates as datetime64[D] (a converted copy of the epoch days), NaT for NO_EXPIRY"""
+        days = self.records["expiry"]
+        expiries = _EPOCH + days.astype(np.int64)
+        expiries[days == NO_EXPIRY] = np.datetime64("NaT")
+        return expiries
+
+    def forTicker(self, ticker: str, expiryFrom: Optional[datetime.date] = None,
+                  expiryTo: Optional[datetime.date] = None) -> "ContractBook":
+        """
+        View of the contracts on one ticker, optionally only those expiring between two dates inclusive.
+        Contracts with NO_EXPIRY sort first and are left out when either date is given.
+        An unknown ticker gives an empty book.
+        """
+        if ticker not in self.tickers:
+            return self[0:0]
+        code = self.tickers.index(ticker)
+        start, stop = self._bounds[code], self._bounds[code + 1]
+        days = self.records["expiry"][start:stop]
+        if expiryFrom is not None:
+            start += np.searchsorted(days, _epochDay(expiryFrom), side="left")
+        elif expiryTo is not None:
+            start += np.searchsorted(days, NO_EXPIRY, side="right")
+        if expiryTo is not None:
+            stop = self._bounds[code] + np.searchsorted(days, _epochDay(expiryTo), side="right")
+        return self[int(start):int(max(start, stop))]
+
+    def forExpiries(self, expiryFrom: Optional[datetime.date] = None,
+                    expiryTo: Optional[datetime.date] = None) -> "ContractBook":
+        """
+        Contracts of every ticker expiring between two dates inclusive.
+        Expiries are only sorted within a ticker, so this is a copy rather than a view.
+        """
+        parts = [self.forTicker(ticker, expiryFrom, expiryTo) for ticker in self.tickers]
+        return ContractBook(np.concatenate([part.records for part in parts]) if parts else self.records[:0],
+                            self.tickers, np.concatenate([part.rows for part in parts]) if parts else self.rows[:0])
+
+    def errors(self, available: Optional[Iterable[str]] = None,
+               valuationDate: Optional[datetime.date] = None) -> np.ndarray:
+        """
+        The validation of PV applied to every contract.
+        :param available: tickers with market data; by default every ticker is accepted
+        :param valuationDate: contracts expiring before this date are rejected; by default expiries are not checked
+        :return: object array with an error message per contract, empty for valid contracts
+        """
+        count = len(self)
+        error = _validationErrors(np.zeros(count, dtype=bool), self.strike, np.zeros(count), np.zeros(count, dtype=bool),
+                                  self.quantity)
+        unpriced = self.records["expiry"] == NO_EXPIRY
+        error[(error == "") & unpriced] = _NO_PRICING
+        if available is not None:
+            available = set(available)
+            known = np.array([ticker in available for ticker in self.tickers], dtype=bool)
+            error[(error == "") & ~known[self.tickerCodes]] = _NO_PRICING
+        if valuationDate is not None:
+            expired = ~unpriced & (self.records["expiry"] < _epochDay(valuationDate))
+            error[(error == "") & expired] = "Error -- time to expiry can not be negative"
+        return error
+
+    def times(self, valuationDate: datetime.date) -> np.ndarray:
+        """Times to expiry in years under the BUS/260 convention used by BatchRunner, NaN for NO_EXPIRY"""
+        expiries = self.expiries()
+        priced = ~np.isnat(expiries)
+        times = np.full(len(expiries), np.nan)
+        times[priced] = defaultYearFraction("BUS/260").yearFraction(np.datetime64(valuationDate, "D"), expiries[priced])
+        return times
+
+    def _perContract(self, values) -> np.ndarray:
+        """Values given per ticker (a dictionary) or per contract, as an array per contract"""
+        if isinstance(values, dict):
+            byCode = np.array([values.get(ticker, np.nan) for ticker in self.tickers], dtype=np.float64)
+            return byCode[self.tickerCodes]
+        return np.asarray(values, dtype=np.float64)
+
+    def black76(self, sigma: Union[Dict[str, float], np.ndarray], price: Union[Dict[str, float], np.ndarray],
+                valuationDate: datetime.date, rate: float = 0.05) -> np.ndarray:
+        """
+        Black76 PV of every contract, with the strike and call columns passed to batchBlack76 without copying.
+        :param sigma: volatility by ticker, or per contract
+        :param price: value of the future by ticker, or per contract
+        :param valuationDate: pricing date, from which times to expiry are measured
+        :param rate: interest rate
+        :return: PV per contract, in book order
+        """
+        return batchBlack76(self._perContract(sigma), self.times(valuationDate), self._perContract(price),
+                            self.strike, self.isCall, rate)
+
+    def greeks(self, sigma: Union[Dict[str, float], np.ndarray], price: Union[Dict[str, float], np.ndarray],
+               valuationDate: datetime.date, rate: float = 0.05) -> dict:
+        """PV and Greeks of every contract as in batchBlack76Greeks; parameters as in black76"""
+        return batchBlack76Greeks(self._perContract(sigma), self.times(valuationDate), self._perContract(price),
+                                  self.strike, self.isCall, rate)
+
+    def frame(self) -> "pd.DataFrame":
+        """The book as a dataframe, one row per contract in book order"""
+        import pandas as pd
+        return pd.DataFrame({"ticker": np.array(self.tickers, dtype=object)[self.tickerCodes],
+                             "strike": self.strike, "expiry": self.expiries(), "isCall": self.isCall,
+                             "quantity": self.quantity, "row": self.rows})
+
+
+def _epochDay(date) -> int:
+    """Days since 1970-01-01 of a date"""
+    return int((np.datetime64(date, "D") - _EPOCH).astype(np.int64))
@@ -0,0 +1,111 @@
+"""
+Forward curve of one commodity across delivery months.
+PV uses the last price of a single column as the forward for every expiry.
+A ForwardCurve instead holds one futures price per delivery month and
+interpolates between them in log-price, against the time in years from the
+valuation date to the start of each delivery month:
+    linear      piecewise linear in log-price
+    monotone    monotone cubic (Fritsch-Carlson) in log-price, which is smooth
+                and never overshoots between two quotes
+The interpolation coefficients are computed once when the curve is built, so
+evaluating the curve at any number of tenors is one np.searchsorted followed
+by a cubic polynomial evaluated on arrays.  The curve is flat beyond its
+first and last quotes.
+"""
+import datetime
+from typing import Optional
+import numpy as np
+from Calendar.YearFraction import defaultYearFraction
+
+METHODS = ("linear", "monotone")
+
+
+class ForwardCurve:
+    """
+    Futures prices by delivery month with precomputed interpolation.
+    """
+
+    def __init__(self, deliveryMonths, prices, method: str = "linear",
+                 valuationDate: Optional[datetime.date] = None):
+        """
+        :param deliveryMonths: array-like of delivery months, converted to datetime64[M]
+        (for example "2024-01" strings)
+        :param prices: futures price for each delivery month
+        :param method: one of METHODS
+        :param valuationDate: date from which tenors are measured, today by default
+        """
+        if method not in METHODS:
+            raise ValueError("Unknown interpolation method " + method)
+        months = np.asarray(deliveryMonths, dtype="datetime64[M]").ravel()
+        prices = np.asarray(prices, dtype=float).ravel()
+        if len(months) == 0 or len(months) != len(prices):
+            raise ValueError("The curve needs one price for each delivery month")
+        if np.any(~(prices > 0)):
+            raise ValueError("Value of future must be positive")
+        order = np.argsort(months)
+        months, prices = months[order], prices[order]
+        if np.any(months[1:] == months[:-1]):
+            raise ValueError("Each delivery month can only be quoted once")
+
+        self.method = method
+        self.valuationDate = valuationDate or datetime.date.today()
+        self.months = months
+        self.prices = prices
+        self.tenors = self.tenorOf(months)
+        self._coefficients = _coefficients(self.tenors, np.log(prices), method)
+
+    @classmethod
+    def flat(cls, price: float, valuationDate: Optional[datetime.date] = None) -> "ForwardCurve":
+        """The same forward for every delivery month, which is how PV prices without a curve"""
+        valuationDate = valuationDate or datetime.date.today()
+        return cls([np.datetime64(valuationDate, "M")], [price], valuationDate=valuationDate)
+
+    def tenorOf(self, deliveryMonths) -> np.ndarray:
+        """Years from the valuation date to the first day of each delivery month"""
+        starts = np.asarray(deliveryMonths, dtype="datetime64[M]").astype("datetime64[D]")
+        return defaultYearFraction().yearFraction(np.datetime64(self.valuationDate, "D"), starts)
+
+    def forward(self, tenors) -> np.ndarray:
+        """
+        Forward prices at any tenors.
+        :param tenors: years from the valuation date, scalar or array
+        :return: numpy array with the shape of tenors
+        """
+        tenors = np.clip(np.asarray(tenors, dtype=float), self.tenors[0], self.tenors[-1])
+        if len(self.tenors) == 1:
+            return np.full(tenors.shape, self.prices[0])
+        interval = np.clip(np.searchsorted(self.tenors, tenors, side="right") - 1, 0, len(self.tenors) - 2)
+        a, b, c, d = (coefficient[interval] for coefficient in self._coefficients)
+        h = tenors - self.tenors[interval]
+        return np.exp(a + h * (b + h * (c + h * d)))
+
+    def forwardForMonths(self, deliveryMonths) -> np.ndarray:
+        """Forward prices for delivery months, quoted or not"""
+        return self.forward(self.tenorOf(deliveryMonths))
+
+
+def _coefficients(x: np.ndarray, y: np.ndarray, method: str):
+    """
+    Cubic coefficients (a, b, c, d) of each interval [x_i, x_i+1], so that
+    y = a + b h + c h^2 + d h^3 with h = x - x_i.  Linear interpolation has c = d = 0.
+    """
+    if len(x) < 2:
+        return tuple(np.zeros(0) for _ in range(4))
+    h = np.diff(x)
+    delta = np.diff(y) / h
+    if method == "linear":
+        return y[:-1], delta, np.zeros_like(h), np.zeros_like(h)
+
+    # Fritsch-Carlson slopes: zero at local extrema, otherwise a weighted
+    # harmonic mean of the neighbouring secants, which keeps each piece monotone
+    slopes = np.empty_like(y)
+    slopes[0], slopes[-1] = delta[0], delta[-1]
+    if len(x) > 2:
+        w1, w2 = 2 * h[1:] + h[:-1], h[1:] + 2 * h[:-1]
+        sameSign = delta[:-1] * delta[1:] > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            harmonic = (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:])
+        slopes[1:-1] = np.where(sameSign, harmonic, 0.0)
+    c = (3 * delta - 2 * slopes[:-1] - slopes[1:]) / h
+    d = (slopes[:-1] + slopes[1:] - 2 * delta) / (h * h)
+    return y[:-1], slopes[:-1], c, d
@@ -0,0 +1,171 @@
+"""
+Historical simulation VaR, expected shortfall and backtesting.
+Every day of the stored price history is replayed against the current
+portfolio: the forward of each position moves by its ticker's log return on
+that day and time moves on by the horizon, and the positions are fully
+revalued with Black76.  The P&L is also attributed to the Greeks,
+    delta * dF + gamma * dF^2 / 2 + theta * dt
+with the remainder reported as unexplained.
+As in historicalVol, a missing price removes the returns on either side of
+it, so the days around a gap are left out rather than replayed as no move
+followed by a catch-up jump.
+Days are revalued as a (days, positions) array in chunks of days.  Results
+are cached per date, so after one day is appended to the history a rerun
+only revalues that day; the history is taken to be append-only.
+VaR and ES are reported as positive losses at a confidence level.  The
+backtest compares each day's P&L with the VaR of the preceding window of
+days, vectorized with a sliding window view.
+"""
+from typing import Optional
+import numpy as np
+import pandas as pd
+from Calculations.BatchRunner import parseCallFlags
+from Calculations.OptionsCalculator import batchBlack76, batchBlack76Greeks
+
+DAYS_IN_YEAR = 260
+COMPONENTS = ("pnl", "delta", "gamma", "theta", "unexplained")
+
+
+class HistoricalVaR:
+    """
+    Historical simulation of one portfolio over a price history.
+    """
+
+    def __init__(self, tickers, sigma, time, price, strike, isCall, quantity=1.0, rate: float = 0.05,
+                 horizon: float = 1 / DAYS_IN_YEAR, chunkDays: int = 250):
+        """
+        Positions as arrays (or scalars) of equal length.
+        :param tickers: ticker of each position, matching the columns of the history
+        :param sigma: annualized volatility
+        :param time: time to expiry in years
+        :param price: current forward
+        :param strike: strike
+        :param isCall: True for calls and False for puts
+        :param quantity: number of options held, negative for short positions
+        :param rate: interest rate
+        :param horizon: years that pass in each replayed day
+        :param chunkDays: days revalued together, bounding memory to chunkDays * positions values
+        """
+        arrays = np.broadcast_arrays(np.asarray(tickers, dtype=object).ravel(),
+                                     *(np.asarray(value, dtype=float).ravel()
+                                       for value in (sigma, time, price, strike, quantity)),
+                                     np.asarray(isCall, dtype=bool).ravel())
+        tickers, self.sigma, self.time, self.price, self.strike, self.quantity, self.isCall = \
+            (np.array(array) for array in arrays)
+        if np.any(self.time <= horizon):
+            raise ValueError("Every position must expire after the horizon")
+        self.tickerCodes, self.tickers = pd.factorize(pd.Series(tickers, dtype=object))
+        self.rate = rate
+        self.horizon = horizon
+        self.chunkDays = chunkDays
+        greeks = batchBlack76Greeks(self.sigma, self.time, self.price, self.strike, self.isCall, rate)
+        self.greeks = {name: self.quantity * greeks[name] for name in ("pv", "delta", "gamma", "theta")}
+        self._cache = pd.DataFrame(columns=list(COMPONENTS), dtype=float) # Indexed by date
+        self.computedDays = 0
+
+    @classmethod
+    def fromPriced(cls, priced: pd.DataFrame, rate: float = 0.05, **options) -> "HistoricalVaR":
+        """Simulation of the positions priced by BatchRunner.priceFrame which have a PV"""
+        priced = priced[priced["pv"].notna()]
+        isCall = priced["isCall"]
+        if isCall.dtype != bool:
+            isCall = parseCallFlags(isCall) > 0
+        return cls(priced["ticker"], priced["sigma"], priced["time"], priced["forward"], priced["strike"],
+                   isCall, pd.to_numeric(priced["quantity"]), rate, **options)
+
+    def _returns(self, history: pd.DataFrame) -> pd.DataFrame:
+        """Daily log returns of the portfolio's tickers, dated by the later day, on days with every price"""
+        missing = [ticker for ticker in self.tickers if ticker not in history.columns]
+        if missing:
+            raise ValueError("The data source does not correspond to your ticker: " + ", ".join(missing))
+        prices = history[list(self.tickers)]
+        if "DATE" in history.columns:
+            prices = prices.set_axis(pd.DatetimeIndex(history["DATE"]))
+        returns = np.log(prices).diff().iloc[1:]
+        return returns.dropna()
+
+    def _revalue(self, logReturns: np.ndarray) -> np.ndarray:
+        """COMPONENTS for each row of ticker log returns"""
+        move = np.exp(logReturns[:, self.tickerCodes]) # (days, positions)
+        price = self.price * move
+        values = self.quantity * batchBlack76(self.sigma, self.time - self.horizon, price, self.strike,
+                                              self.isCall, self.rate)
+        change = price - self.price
+        delta = change @ self.greeks["delta"]
+        gamma = 0.5 * (change * change) @ self.greeks["gamma"]
+        theta = np.full(len(move), self.horizon * self.greeks["theta"].sum())
+        pnl = values.sum(axis=1) - self.greeks["pv"].sum()
+        return np.column_stack((pnl, delta, gamma, theta, pnl - delta - gamma - theta))
+
+    def dailyPnL(self, history: pd.DataFrame) -> pd.DataFrame:
+        """
+        Portfolio P&L and its attribution for every day of the history.
+        Days already computed are read from the cache.
+        :param history: prices sorted by date, with a DATE column and a column per ticker
+        :return: dataframe indexed by date with the COMPONENTS as columns
+        """
+        returns = self._returns(history)
+        dates = returns.index
+        new = ~dates.isin(self._cache.index)
+        if new.any():
+            newReturns = returns.to_numpy()[new]
+            rows = [self._revalue(newReturns[start:start + self.chunkDays])
+                    for start in range(0, len(newReturns), self.chunkDays)]
+            computed = pd.DataFrame(np.concatenate(rows), index=dates[new], columns=list(COMPONENTS))
+            self._cache = computed if self._cache.empty else pd.concat([self._cache, computed])
+            self.computedDays += len(computed)
+        return self._cache.reindex(dates)
+
+    def var(self, history: pd.DataFrame, confidence: float = 0.99, window: Optional[int] = None) -> dict:
+        """
+        VaR and expected shortfall from the replayed days.
+        :param confidence: for example 0.99 for the loss exceeded on 1% of days
+        :param window: number of most recent days used, or None for the whole history
+        :return: dictionary with var, es (both positive losses) and the number of days
+        """
+        pnl = self.dailyPnL(history)["pnl"].to_numpy()
+        if window is not None:
+            pnl = pnl[-window:]
+        if len(pnl) == 0:
+            raise ValueError("Not enough data to determine VaR")
+        var, es = _varAndEs(pnl[None, :], confidence)
+        return {"var": float(var[0]), "es": float(es[0]), "days": len(pnl)}
+
+    def backtest(self, history: pd.DataFrame, confidence: float = 0.99, window: int = 250) -> pd.DataFrame:
+        """
+        Compare the P&L of each day with the VaR and ES of the window of days before it.
+        :return: dataframe indexed by date with pnl, var, es and exception columns,
+        starting on the first day with a full window.  Its attrs hold a summary
+        with the number and rate of exceptions and Kupiec's likelihood ratio.
+        """
+        pnl = self.dailyPnL(history)["pnl"]
+        values = pnl.to_numpy()
+        if len(values) <= window:
+            raise ValueError("Not enough data to backtest")
+        windows = np.lib.stride_tricks.sliding_window_view(values[:-1], window)
+        var, es = _varAndEs(windows, confidence)
+        result = pd.DataFrame({"pnl": values[window:], "var": var, "es": es}, index=pnl.index[window:])
+        result["exception"] = result["pnl"] < -result["var"]
+        result.attrs["summary"] = _kupiec(int(result["exception"].sum()), len(result), 1 - confidence)
+        return result
+
+
+def _varAndEs(windows: np.ndarray, confidence: float):
+    """VaR and ES of each row of P&L, as positive losses"""
+    if not 0 < confidence < 1:
+        raise ValueError("The confidence level must lie between 0 and 1")
+    quantile = np.quantile(windows, 1 - confidence, axis=1)
+    tail = windows <= quantile[:, None]
+    es = -(windows * tail).sum(axis=1) / tail.sum(axis=1)
+    return -quantile, es
+
+
+def _kupiec(exceptions: int, days: int, probability: float) -> dict:
+    """Kupiec's proportion of failures test; the ratio is chi-squared with one degree of freedom"""
+    rate = exceptions / days
+    def logLikelihood(p):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.nan_to_num((days - exceptions) * np.log1p(-p)) + np.nan_to_num(exceptions * np.log(p))
+    ratio = -2 * (logLikelihood(probability) - logLikelihood(rate))
+    return {"days": days, "exceptions": exceptions, "expected": probability * days, "rate": rate,
+            "kupiecRatio": float(ratio)}
@@ -0,0 +1,138 @@
+"""
+Implied volatility for Black76, backed out from market premiums.
+Whole option chains are inverted in one vectorized call: every contract
+starts from the Corrado-Miller approximation and is then refined with
+Halley steps (Newton with a vega/volga correction) that are safeguarded
+by a bracket, falling back to bisection whenever a step leaves the bracket.
+Each contract carries a status so that callers can tell converged vols
+from quotes that violate the no-arbitrage bounds or failed to converge.
+"""
+from typing import Tuple
+import numpy as np
+from Calculations.Numerics import d1d2, normCdf, normPdf
+
+# Status codes reported per contract
+CONVERGED = 0
+NOT_CONVERGED = 1
+ARBITRAGE = 2 # Premium outside the no-arbitrage bounds (or non-positive inputs)
+INDETERMINATE = 3 # Time value too small relative to the future to say anything about sigma
+
+# Time values below this fraction of the future are lost in rounding
+MIN_TIME_VALUE = 1e-12
+
+
+def impliedVol(premium, time, price, strike, isCall, rate=0.05, tolerance: float = 1e-10,
+               maxIterations: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Invert the Black76 formula for sigma.
+    All arguments broadcast together as in batchBlack76.
+    The solver works on the undiscounted call price as a function of the
+    total volatility s = sigma * sqrt(T), which is increasing in s, so a
+    bracket [low, high] around the root can always be maintained.
+    Puts are turned into calls by put-call parity.
+    :param premium: market premiums (present values)
+    :param time: times to expiry in years
+    :param price: current values of the futures
+    :param strike: strikes
+    :param isCall: True for calls and False for puts
+    :param rate: interest rates
+    :param tolerance: convergence threshold on the price relative to the option's time value
+    :param maxIterations: iteration limit before a contract is reported as NOT_CONVERGED
+    :return: tuple of (sigma array, status array); sigma is nan unless the status is CONVERGED
+    Deep in- or out-of-the-money quotes whose time value is lost in rounding
+    are reported as INDETERMINATE rather than given an arbitrary sigma.
+    """
+    premium, time, price, strike, rate, isCall = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (premium, time, price, strike, rate)),
+        np.asarray(isCall, dtype=bool))
+    shape = premium.shape
+    premium, time, price, strike, rate, isCall = (x.ravel() for x in (premium, time, price, strike, rate, isCall))
+
+    # Undiscounted call premium via put-call parity: C - P = F - K
+    forwardPremium = premium * np.exp(rate * time)
+    callPremium = np.where(isCall, forwardPremium, forwardPremium + price - strike)
+
+    # A call is worth at least its intrinsic value and less than the future
+    intrinsic = np.maximum(price - strike, 0.0)
+    valid = (time > 0) & (price > 0) & (strike > 0) & (callPremium > intrinsic) & (callPremium < price)
+
+    sigma = np.full(premium.shape, np.nan)
+    status = np.full(premium.shape, ARBITRAGE, dtype=np.int8)
+    indeterminate = valid & (callPremium - intrinsic <= MIN_TIME_VALUE * price)
+    status[indeterminate] = INDETERMINATE
+    index = np.flatnonzero(valid & ~indeterminate)
+    if index.size:
+        total, converged = _solveTotalVol(callPremium[index], price[index], strike[index], tolerance, maxIterations)
+        status[index] = np.where(converged, CONVERGED, NOT_CONVERGED)
+        sigma[index[converged]] = total[converged] / np.sqrt(time[index[converged]])
+    return sigma.reshape(shape), status.reshape(shape)
+
+
+def _undiscountedCall(total: np.ndarray, price: np.ndarray, strike: np.ndarray):
+    """Undiscounted Black76 call price, d1 and d2 as functions of the total volatility"""
+    d1, d2, _ = d1d2(total, 1.0, price, strike)
+    return price * normCdf(d1) - strike * normCdf(d2), d1, d2
+
+
+def _initialGuess(callPremium: np.ndarray, price: np.ndarray, strike: np.ndarray) -> np.ndarray:
+    """
+    Corrado-Miller approximation to the total volatility.
+    It is exact enough near the money to converge in a couple of Halley steps;
+    elsewhere the bracket keeps the iteration safe.
+    """
+    halfMoneyness = (price - strike) / 2
+    excess = callPremium - halfMoneyness
+    root = np.sqrt(np.maximum(excess * excess - (price - strike) ** 2 / np.pi, 0.0))
+    guess = np.sqrt(2 * np.pi) / (price + strike) * (excess + root)
+    return np.where(np.isfinite(guess) & (guess > 0), guess, 1.0)
+
+
+def _solveTotalVol(callPremium: np.ndarray, price: np.ndarray, strike: np.ndarray,
+                   tolerance: float, maxIterations: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Safeguarded Halley iteration for total volatility on inputs already known
+    to be inside the no-arbitrage bounds.
+    Only contracts which are still active are recomputed on each pass.
+    """
+    total = _initialGuess(callPremium, price, strike)
+    low = np.zeros_like(total)
+    high = np.maximum(2 * total, 1.0)
+    # Widen the upper end until it is above the root.  The call price tends to
+    # the future as the volatility grows, so this terminates for valid inputs.
+    for _ in range(10):
+        below = _undiscountedCall(high, price, strike)[0] < callPremium
+        if not below.any():
+            break
+        high = np.where(below, 4 * high, high)
+
+    converged = np.zeros(total.shape, dtype=bool)
+    active = np.arange(total.size)
+    for _ in range(maxIterations):
+        s, F, K, target = total[active], price[active], strike[active], callPremium[active]
+        value, d1, d2 = _undiscountedCall(s, F, K)
+        error = value - target
+
+        # Shrink the bracket using the sign of the error
+        low[active] = np.where(error < 0, s, low[active])
+        high[active] = np.where(error > 0, s, high[active])
+
+        # Converge relative to the time value, which is all that carries information about sigma
+        timeValue = target - np.maximum(F - K, 0.0)
+        done = np.abs(error) <= tolerance * timeValue
+        # Halley step: vega = F n(d1) and volga = vega * d1 * d2 / s
+        vega = F * normPdf(d1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = error / vega
+            step = newton / (1 - 0.5 * newton * d1 * d2 / s)
+        candidate = s - step
+        lo, hi = low[active], high[active]
+        outside = ~np.isfinite(candidate) | (candidate <= lo) | (candidate >= hi)
+        candidate = np.where(outside, (lo + hi) / 2, candidate)
+        done |= np.abs(candidate - s) <= tolerance * np.maximum(s, 1.0)
+
+        total[active] = np.where(done, s, candidate)
+        converged[active[done]] = True
+        active = active[~done]
+        if not active.size:
+            break
+    return total, converged
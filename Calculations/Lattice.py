@@ -0,0 +1,128 @@
+"""
+Lattice pricing of American (and European) options on futures.
+Futures have no drift under the pricing measure, so the tree is recombining
+with up and down moves of the same size in log-price:
+    binomial    Cox-Ross-Rubinstein, u = exp(sigma * sqrt(dt)), i + 1 nodes at step i
+    trinomial   Boyle, u = exp(sigma * sqrt(2 * dt)), 2 * i + 1 nodes at step i
+Backward induction is vectorized over the nodes of each time slice and over a
+batch of contracts, using one array of option values and one of node prices
+per contract which are overwritten slice by slice, so memory is O(steps)
+per contract rather than O(steps ** 2).
+With smoothing the slice before expiry is valued with Black76 (the
+binomial Black-Scholes method), which removes the odd-even oscillation of
+the plain tree; Richardson extrapolation 2 * V(N) - V(N / 2) then gives
+close to second order convergence in the number of steps.
+"""
+from typing import TYPE_CHECKING
+import numpy as np
+from Calculations.OptionsCalculator import batchBlack76
+from Calculations.PVCalculator import PVInputs
+
+if TYPE_CHECKING: # Callers pass dataframes, but the lattice itself does not need pandas
+    import pandas as pd
+
+LATTICES = ("binomial", "trinomial")
+
+
+def latticePrice(sigma, time, price, strike, isCall, rate=0.05, steps: int = 200, lattice: str = "binomial",
+                 american: bool = True, smoothing: bool = True, richardson: bool = True) -> np.ndarray:
+    """
+    Lattice value of a batch of options with the same number of steps.
+    :param sigma: annualized volatility, scalar or array
+    :param time: time to expiry in years, scalar or array
+    :param price: current value of the future, scalar or array
+    :param strike: strike, scalar or array
+    :param isCall: True for calls and False for puts, scalar or boolean array
+    :param rate: interest rate, scalar or array
+    :param steps: number of time steps in the tree
+    :param lattice: one of LATTICES
+    :param american: allow early exercise; False gives European values (for checks against Black76)
+    :param smoothing: value the last slice before expiry with Black76
+    :param richardson: extrapolate from steps and steps // 2
+    :return: numpy array of present values with the broadcast shape of the inputs
+    """
+    if lattice not in LATTICES:
+        raise ValueError("Unknown lattice " + lattice)
+    if steps < (4 if richardson else 2):
+        raise ValueError("Too few steps for the lattice")
+    arrays = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (sigma, time, price, strike, rate)),
+                                 np.asarray(isCall, dtype=bool))
+    shape = arrays[0].shape
+    sigma, time, price, strike, rate, isCall = (np.ravel(array) for array in arrays)
+    if np.any(sigma <= 0) or np.any(time <= 0) or np.any(price <= 0) or np.any(strike <= 0):
+        raise ValueError("Can not price -- inputs must be positive")
+
+    value = _induct(sigma, time, price, strike, isCall, rate, steps, lattice, american, smoothing)
+    if richardson:
+        coarse = _induct(sigma, time, price, strike, isCall, rate, steps // 2, lattice, american, smoothing)
+        value = 2 * value - coarse
+    return value.reshape(shape)
+
+
+def _induct(sigma: np.ndarray, time: np.ndarray, price: np.ndarray, strike: np.ndarray, isCall: np.ndarray,
+            rate: np.ndarray, steps: int, lattice: str, american: bool, smoothing: bool) -> np.ndarray:
+    """
+    Backward induction over one tree per contract.  Inputs are 1-D arrays of
+    the same length; nodes are rows and contracts are columns, so that each
+    slice of the tree is a contiguous block of memory.
+    """
+    dt = time / steps
+    discount = np.exp(-rate * dt)
+    sign = np.where(isCall, 1.0, -1.0)
+    binomial = lattice == "binomial"
+    if binomial:
+        up = np.exp(sigma * np.sqrt(dt))
+        pUp = (1 - 1 / up) / (up - 1 / up)
+        pUp, pDown = discount * pUp, discount * (1 - pUp)
+        # Node j at expiry is price * u ** (2j - steps)
+        exponents = 2 * np.arange(steps + 1) - steps
+    else:
+        up = np.exp(sigma * np.sqrt(2 * dt))
+        half = np.exp(sigma * np.sqrt(dt / 2))
+        pUp = ((1 - 1 / half) / (half - 1 / half)) ** 2
+        pDown = ((half - 1) / (half - 1 / half)) ** 2
+        pUp, pMiddle, pDown = discount * pUp, discount * (1 - pUp - pDown), discount * pDown
+        # Node j at expiry is price * u ** (j - steps)
+        exponents = np.arange(2 * steps + 1) - steps
+
+    # The arrays of the tree, overwritten slice by slice
+    prices = price * np.exp(np.outer(exponents, np.log(up)))
+    values = np.maximum(sign * (prices - strike), 0.0)
+    scratch = np.empty_like(values)
+    exercise = np.empty_like(values)
+
+    for step in range(steps - 1, -1, -1):
+        nodes = step + 1 if binomial else 2 * step + 1
+        if binomial:
+            # Node j at this step sits between nodes j and j + 1 of the next one
+            prices[:nodes] *= up
+        else:
+            prices[:nodes] = prices[1:nodes + 1]
+        current, buffer = values[:nodes], scratch[:nodes]
+        if smoothing and step == steps - 1:
+            current[...] = batchBlack76(sigma, dt, prices[:nodes], strike, isCall, rate)
+        else:
+            # Later nodes are combined first so that current can be overwritten in place
+            np.multiply(values[1:nodes + 1], pMiddle if not binomial else pUp, out=buffer)
+            if not binomial:
+                np.multiply(values[2:nodes + 2], pUp, out=exercise[:nodes])
+                buffer += exercise[:nodes]
+            current *= pDown
+            current += buffer
+        if american:
+            payoff = exercise[:nodes]
+            np.subtract(prices[:nodes], strike, out=payoff)
+            payoff *= sign
+            np.maximum(current, payoff, out=current)
+    return values[0]
+
+
+def americanPV(df: "pd.DataFrame", ticker: str, monthsBack: int, strike: float, isCall: bool, rate: float = 0.05,
+               monthsForward: int = 6, **options) -> float:
+    """
+    PV of an American option, with the market inputs of PV.
+    :param options: further keyword arguments of latticePrice (steps, lattice, ...)
+    Other parameters are as in PV.
+    """
+    price, sigma, expiryDate, T = PVInputs(df, ticker, monthsBack, strike, monthsForward)
+    return float(latticePrice(sigma, T, price, strike, isCall, rate, **options))
@@ -0,0 +1,143 @@
+"""
+Monte Carlo pricing for path-dependent options on energy futures.
+Futures follow driftless geometric Brownian motion under the pricing measure,
+dF = sigma * F * dW, observed on `steps` equally spaced dates up to expiry.
+Supported payoffs:
+    european   max(F_T - K, 0) for calls, max(K - F_T, 0) for puts
+    asian      the same on the arithmetic average of the observed prices
+               (the monthly-average options common in energy books)
+    barrier    european payoff knocked out (or in) if any observed price
+               crosses the barrier (up-and-out, up-and-in, down-and-out, down-and-in)
+Paths are simulated as NumPy arrays of shape (paths in chunk, steps), so the
+memory used is bounded by chunkSize * steps whatever the number of paths.
+Variance is reduced with antithetic pairs and with the European payoff as a
+control variate, its exact mean being the Black76 price.
+"""
+from typing import TYPE_CHECKING, Optional
+import numpy as np
+from Calculations.OptionsCalculator import batchBlack76
+from Calculations.PVCalculator import PVInputs
+
+if TYPE_CHECKING: # Callers pass dataframes, but the simulation itself does not need pandas
+    import pandas as pd
+
+PAYOFFS = ("european", "asian", "barrier")
+BARRIER_TYPES = ("up-and-out", "up-and-in", "down-and-out", "down-and-in")
+DAYS_IN_YEAR = 260 # Daily observation by default, as in the calendar computations
+
+
+def monteCarlo(sigma: float, time: float, price: float, strike: float, isCall: bool, rate: float = 0.05,
+               payoff: str = "european", paths: int = 100_000, steps: Optional[int] = None,
+               barrier: Optional[float] = None, barrierType: str = "up-and-out", antithetic: bool = True,
+               controlVariate: bool = True, seed: Optional[int] = None, chunkSize: int = 20_000) -> dict:
+    """
+    Monte Carlo value of one option.
+    :param sigma: annualized volatility
+    :param time: time to expiry in years
+    :param price: current value of the future
+    :param strike: strike
+    :param isCall: True for a call and False for a put
+    :param rate: interest rate
+    :param payoff: one of PAYOFFS
+    :param paths: number of simulated paths (antithetic pairs count as two)
+    :param steps: observation dates; 1 for european and daily otherwise by default
+    :param barrier: barrier level, required for barrier payoffs
+    :param barrierType: one of BARRIER_TYPES
+    :param antithetic: simulate each normal draw together with its negative
+    :param controlVariate: use the European payoff, whose mean is the Black76 value, as a control
+    :param seed: seed for reproducible results (for a given chunkSize)
+    :param chunkSize: paths simulated at a time, bounding the memory used
+    :return: dictionary with the pv, its standard error, the number of paths
+    and the control variate coefficient
+    """
+    if payoff not in PAYOFFS:
+        raise ValueError("Unknown payoff " + payoff)
+    if payoff == "barrier" and (barrier is None or barrierType not in BARRIER_TYPES):
+        raise ValueError("Barrier payoffs need a barrier level and a valid barrier type")
+    if sigma <= 0 or time <= 0 or price <= 0 or strike <= 0 or paths < 2:
+        raise ValueError("Can not price -- inputs must be positive")
+    if steps is None:
+        steps = 1 if payoff == "european" else max(1, int(round(time * DAYS_IN_YEAR)))
+
+    rng = np.random.default_rng(seed)
+    discount = np.exp(-rate * time)
+    sign = 1.0 if isCall else -1.0
+    dt = time / steps
+    drift, diffusion = -0.5 * sigma * sigma * dt, sigma * np.sqrt(dt)
+
+    # Running sums over independent samples of the payoff x and control y
+    sums = dict.fromkeys(("n", "x", "y", "xx", "yy", "xy"), 0.0)
+    drawsPerSample = 2 if antithetic else 1
+    remaining = paths // drawsPerSample
+    while remaining > 0:
+        count = min(remaining, max(1, chunkSize // drawsPerSample))
+        remaining -= count
+        normals = rng.standard_normal((count, steps))
+        x, y = _samplePayoffs(normals, price, strike, sign, drift, diffusion, payoff, barrier, barrierType)
+        if antithetic:
+            np.negative(normals, out=normals)
+            xAnti, yAnti = _samplePayoffs(normals, price, strike, sign, drift, diffusion, payoff, barrier, barrierType)
+            x, y = (x + xAnti) / 2, (y + yAnti) / 2
+        sums["n"] += count
+        sums["x"] += x.sum()
+        sums["y"] += y.sum()
+        sums["xx"] += np.dot(x, x)
+        sums["yy"] += np.dot(y, y)
+        sums["xy"] += np.dot(x, y)
+
+    n = sums["n"]
+    meanX, meanY = sums["x"] / n, sums["y"] / n
+    varX = max(sums["xx"] / n - meanX * meanX, 0.0)
+    varY = max(sums["yy"] / n - meanY * meanY, 0.0)
+    covXY = sums["xy"] / n - meanX * meanY
+
+    beta, estimate, variance = 0.0, meanX, varX
+    if controlVariate and varY > 0:
+        # The undiscounted Black76 value is the exact mean of the control
+        exact = float(batchBlack76(sigma, time, price, strike, isCall, rate)) / discount
+        beta = covXY / varY
+        estimate = meanX - beta * (meanY - exact)
+        variance = max(varX - covXY * covXY / varY, 0.0)
+
+    return {
+        "pv": discount * estimate,
+        "stdError": discount * np.sqrt(variance / max(n - 1, 1)),
+        "paths": int(n * drawsPerSample),
+        "controlBeta": beta,
+    }
+
+
+def _samplePayoffs(normals: np.ndarray, price: float, strike: float, sign: float, drift: float, diffusion: float,
+                   payoff: str, barrier: Optional[float], barrierType: str):
+    """
+    Undiscounted payoffs for one block of paths and the matching European
+    payoffs used as the control.  The block of normals is not modified.
+    """
+    paths = normals * diffusion
+    paths += drift
+    np.cumsum(paths, axis=1, out=paths)
+    paths += np.log(price)
+    np.exp(paths, out=paths)
+
+    terminal = paths[:, -1]
+    european = np.maximum(sign * (terminal - strike), 0.0)
+    if payoff == "european":
+        return european, european
+    if payoff == "asian":
+        return np.maximum(sign * (paths.mean(axis=1) - strike), 0.0), european
+    # Barrier, monitored on the observation dates
+    crossed = paths.max(axis=1) >= barrier if barrierType.startswith("up") else paths.min(axis=1) <= barrier
+    alive = ~crossed if barrierType.endswith("out") else crossed
+    return european * alive, european
+
+
+def monteCarloPV(df: "pd.DataFrame", ticker: str, monthsBack: int, strike: float, isCall: bool,
+                 payoff: str = "asian", rate: float = 0.05, monthsForward: int = 6, **options) -> dict:
+    """
+    Monte Carlo counterpart of PV: sigma comes from historicalVol, the future
+    from the last price and T from the energy calendar, exactly as in PV.
+    :param options: further keyword arguments of monteCarlo (paths, steps, barrier, seed, ...)
+    Other parameters are as in PV.
+    """
+    price, sigma, expiryDate, T = PVInputs(df, ticker, monthsBack, strike, monthsForward)
+    return monteCarlo(sigma, T, price, strike, isCall, rate, payoff, **options)
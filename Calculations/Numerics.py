@@ -0,0 +1,262 @@
+"""
+Normal distribution functions and Black76 d1/d2 for the pricers, depending only on NumPy.
+scipy.stats takes most of a second to import, which every short-lived
+worker would pay before its first Black76 price, and norm.cdf costs about
+30us per call on a scalar.  Instead:
+  - single values use math.erfc,
+  - arrays use W. J. Cody's rational approximations of erf and erfc
+    (Math. Comp. 23 (1969), as in his CALERF routine), evaluated on blocks
+    of BLOCK values so that the working arrays stay in cache.
+Every element goes through the same operations whatever the size of its
+array, so the value for an x does not depend on the batch (or chunk) it is
+evaluated in.  Arrays of up to SMALL_ARRAY values, for which the cost of
+the ufunc calls would dominate, run the rational functions in Python floats
+instead; these round exactly like NumPy's elementwise arithmetic and share
+its exp, so both give identical results.
+normCdf(x) = erfc(-x / sqrt(2)) / 2.  exp(-z^2) is taken as
+exp(-s^2) exp(-(z - s)(z + s)), with s = z rounded down to a multiple of
+1/16 and exp(-s^2) from a table, so that rounding z^2 does not cost the
+lower tail its relative accuracy.  normCdf agrees with
+0.5 * math.erfc(-x * sqrt(1/2)) to a relative difference of 1.2e-15
+for -37 <= x <= 8.  Against 0.5 * math.erfc(-x / sqrt(2)) the largest
+relative differences are
+    -8 <= x           1.1e-14
+    -20 <= x < -8     1.1e-13
+    -37 <= x < -20    4e-13
+which is the rounding of x / sqrt(2) magnified by the exp of its square;
+below -37 N(x) is subnormal.
+normPdf is exp(-x^2 / 2) / sqrt(2 pi) to within a few ulps.
+The array functions take an optional out array, so that large batches can
+be evaluated into preallocated memory.
+"""
+import math
+import numpy as np
+
+SMALL_ARRAY = 32
+BLOCK = 4096 # Values evaluated together by the array kernel
+_SQRT_HALF = math.sqrt(0.5)
+_INV_SQRT_2PI = 1 / math.sqrt(2 * math.pi)
+_INV_SQRT_PI = 1 / math.sqrt(math.pi)
+_CENTRAL = 0.46875 # erf is approximated directly for |z| up to here, erfc beyond
+_MIDDLE = 4.0 # and erfc by a rational function of 1 / z^2 beyond here
+_LARGEST = 40.0 # |z| is capped here, where exp(-z^2) is 0, so that infinities give 0 and 1
+_TABLE_SIZE = 641 # exp(-s^2) for s = 0, 1/16, ..., _LARGEST
+_EXP_SQUARES = np.exp(-np.square(np.arange(_TABLE_SIZE) / 16.0))
+
+# Coefficients of Cody's approximations: erf on |z| <= _CENTRAL,
+_ERF_NUMERATOR = (3.16112374387056560e00, 1.13864154151050156e02, 3.77485237685302021e02,
+                  3.20937758913846947e03, 1.85777706184603153e-1)
+_ERF_DENOMINATOR = (2.36012909523441209e01, 2.44024637934444173e02, 1.28261652607737228e03,
+                    2.84423683343917062e03)
+# erfc(z) exp(z^2) on _CENTRAL < z <= _MIDDLE,
+_MIDDLE_NUMERATOR = (5.64188496988670089e-1, 8.88314979438837594e00, 6.61191906371416295e01,
+                     2.98635138197400131e02, 8.81952221241769090e02, 1.71204761263407058e03,
+                     2.05107837782607147e03, 1.23033935479799725e03, 2.15311535474403846e-8)
+_MIDDLE_DENOMINATOR = (1.57449261107098347e01, 1.17693950891312499e02, 5.37181101862009858e02,
+                       1.62138957456669019e03, 3.29079923573345963e03, 4.36261909014324716e03,
+                       3.43936767414372164e03, 1.23033935480374942e03)
+# and erfc(z) exp(z^2) z on z > _MIDDLE
+_TAIL_NUMERATOR = (3.05326634961232344e-1, 3.60344899949804439e-1, 1.25781726111229246e-1,
+                   1.60837851487422766e-2, 6.58749161529837803e-4, 1.63153871373020978e-2)
+_TAIL_DENOMINATOR = (2.56852019228982242e00, 1.87295284992346725e00, 5.27905102951428412e-1,
+                     6.05183413124413191e-2, 2.33520497626869185e-3)
+
+
+# The rational functions below take Python floats or NumPy arrays and do
+# the same operations in the same order on both; on arrays they work in
+# place on the arrays they create.
+
+def _erfCentral(z):
+    """erf(z) for |z| <= _CENTRAL"""
+    square = z * z
+    numerator = _ERF_NUMERATOR[4] * square
+    denominator = square + _ERF_DENOMINATOR[0]
+    denominator *= square
+    numerator += _ERF_NUMERATOR[0]
+    numerator *= square
+    for i in range(1, 3):
+        numerator += _ERF_NUMERATOR[i]
+        numerator *= square
+        denominator += _ERF_DENOMINATOR[i]
+        denominator *= square
+    numerator += _ERF_NUMERATOR[3]
+    numerator *= z
+    denominator += _ERF_DENOMINATOR[3]
+    numerator /= denominator
+    return numerator
+
+
+def _erfcMiddle(y):
+    """erfc(y) exp(y^2) for _CENTRAL < y <= _MIDDLE"""
+    numerator = _MIDDLE_NUMERATOR[8] * y
+    denominator = y + _MIDDLE_DENOMINATOR[0]
+    denominator *= y
+    numerator += _MIDDLE_NUMERATOR[0]
+    numerator *= y
+    for i in range(1, 7):
+        numerator += _MIDDLE_NUMERATOR[i]
+        numerator *= y
+        denominator += _MIDDLE_DENOMINATOR[i]
+        denominator *= y
+    numerator += _MIDDLE_NUMERATOR[7]
+    denominator += _MIDDLE_DENOMINATOR[7]
+    numerator /= denominator
+    return numerator
+
+
+def _erfcTail(y):
+    """erfc(y) exp(y^2) for y > _MIDDLE"""
+    inverseSquare = y * y
+    inverseSquare = 1.0 / inverseSquare
+    numerator = _TAIL_NUMERATOR[5] * inverseSquare
+    denominator = inverseSquare + _TAIL_DENOMINATOR[0]
+    denominator *= inverseSquare
+    numerator += _TAIL_NUMERATOR[0]
+    numerator *= inverseSquare
+    for i in range(1, 4):
+        numerator += _TAIL_NUMERATOR[i]
+        numerator *= inverseSquare
+        denominator += _TAIL_DENOMINATOR[i]
+        denominator *= inverseSquare
+    numerator += _TAIL_NUMERATOR[4]
+    numerator *= inverseSquare
+    denominator += _TAIL_DENOMINATOR[4]
+    numerator /= denominator
+    numerator = _INV_SQRT_PI - numerator
+    numerator /= y
+    return numerator
+
+
+def _halfTail(ratio: np.ndarray, index: np.ndarray, split: np.ndarray) -> np.ndarray:
+    """
+    erfc(y) / 2 from erfc(y) exp(y^2), in place in ratio.  exp(-y^2) is
+    exp(-s^2) exp((s + y)(s - y)) for s = index / 16, y rounded down to a
+    multiple of 1/16, with exp(-s^2) from _EXP_SQUARES and split = (s + y)(s - y).
+    """
+    np.exp(split, out=split)
+    ratio *= _EXP_SQUARES[index]
+    ratio *= split
+    ratio *= 0.5
+    return ratio
+
+
+def _normCdfSmall(values: list) -> np.ndarray:
+    """normCdf of a few Python floats, with the operations of _normCdfBlock"""
+    result, tails, ratios, indices, splits = [], [], [], [], []
+    for x in values:
+        z = x * _SQRT_HALF
+        y = min(abs(z), _LARGEST)
+        if y <= _CENTRAL:
+            erf = _erfCentral(z)
+            erf *= 0.5
+            erf += 0.5
+            result.append(erf)
+            continue
+        tails.append(len(result))
+        result.append(z)
+        # NaN goes to the tail, which returns NaN
+        ratios.append(_erfcMiddle(y) if y <= _MIDDLE else _erfcTail(y))
+        scaled = y * 16.0
+        index = int(scaled) if scaled <= _TABLE_SIZE - 1 else _TABLE_SIZE - 1
+        rounded = index * 0.0625
+        indices.append(index)
+        splits.append((rounded + y) * (rounded - y))
+    result = np.array(result)
+    if tails:
+        halfTail = _halfTail(np.array(ratios), np.array(indices, dtype=np.intp), np.array(splits))
+        negative = result[tails] < 0
+        np.subtract(1.0, halfTail, out=halfTail, where=~negative)
+        result[tails] = halfTail
+    return result
+
+
+def _normCdfBlock(x: np.ndarray, out: np.ndarray):
+    """normCdf of a 1-d block of x written into out"""
+    z = np.multiply(x, _SQRT_HALF)
+    y = np.abs(z)
+    np.minimum(y, _LARGEST, out=y)
+    # Most values are usually in the middle range, which is evaluated on the
+    # whole block and then replaced in the other two; NaN goes to the tail
+    halfTail = _erfcMiddle(y)
+    tail = np.flatnonzero(~(y <= _MIDDLE))
+    if len(tail):
+        halfTail[tail] = _erfcTail(y[tail])
+    scaled = np.multiply(y, 16.0)
+    np.fmin(scaled, _TABLE_SIZE - 1, out=scaled)
+    index = scaled.astype(np.intp)
+    rounded = np.multiply(index, 0.0625, out=scaled)
+    split = rounded + y
+    rounded -= y
+    split *= rounded
+    _halfTail(halfTail, index, split)
+    # N(x) is erfc(|x| / sqrt 2) / 2 for x < 0 and one minus that otherwise
+    np.subtract(1.0, halfTail, out=out)
+    np.copyto(out, halfTail, where=z < 0)
+    central = np.flatnonzero(y <= _CENTRAL)
+    if len(central):
+        erf = _erfCentral(z[central])
+        erf *= 0.5
+        erf += 0.5
+        out[central] = erf
+
+
+def normCdf(x, out=None):
+    """
+    Standard normal cumulative distribution function.
+    :param x: float or array-like
+    :param out: optional float64 array with the shape of x to hold the result
+    :return: float for a float input without out, otherwise a numpy array of the shape of x
+    """
+    if out is None and isinstance(x, (float, int)):
+        return 0.5 * math.erfc(-x * _SQRT_HALF)
+    x = np.asarray(x, dtype=float)
+    if out is None:
+        out = np.empty(x.shape)
+    if x.size <= SMALL_ARRAY:
+        out[...] = _normCdfSmall(x.ravel().tolist()).reshape(x.shape)
+        return out
+    flat, result = x.reshape(-1), out.reshape(-1) # result is a copy when out is not contiguous
+    for start in range(0, flat.size, BLOCK):
+        _normCdfBlock(flat[start:start + BLOCK], result[start:start + BLOCK])
+    if not np.shares_memory(result, out):
+        out[...] = result.reshape(out.shape)
+    return out
+
+
+def normPdf(x, out=None):
+    """
+    Standard normal density.
+    :param x: float or array-like
+    :param out: optional float64 array with the shape of x to hold the result
+    :return: float for a float input without out, otherwise a numpy array of the shape of x
+    """
+    if out is None and isinstance(x, (float, int)):
+        return _INV_SQRT_2PI * math.exp(-0.5 * x * x)
+    x = np.asarray(x, dtype=float)
+    out = np.multiply(x, x, out=out)
+    out *= -0.5
+    np.exp(out, out=out)
+    out *= _INV_SQRT_2PI
+    return out
+
+
+def d1d2(sigma, time, price, strike):
+    """
+    Black76 d1 and d2 together with the total volatility sigma * sqrt(time):
+        d1 = (log(F / K) + sigma^2 T / 2) / (sigma sqrt T),   d2 = d1 - sigma sqrt T
+    Valid scalars are computed with math and anything else with NumPy,
+    broadcast as in batchBlack76 (so that degenerate inputs give inf or nan
+    rather than raising).
+    With time = 1, sigma is the total volatility, as used by implied vol solvers.
+    :return: tuple (d1, d2, totalVol) of floats or numpy arrays
+    """
+    if all(isinstance(value, (float, int)) and value > 0 for value in (sigma, time, price, strike)):
+        totalVol = sigma * math.sqrt(time)
+        d1 = math.log(price / strike) / totalVol + totalVol / 2
+        return d1, d1 - totalVol, totalVol
+    sigma, time, price, strike = (np.asarray(value, dtype=float) for value in (sigma, time, price, strike))
+    totalVol = sigma * np.sqrt(time)
+    d1 = np.log(price / strike)
+    d1 = d1 / totalVol
+    d1 += 0.5 * totalVol
+    return d1, d1 - totalVol, totalVol
@@ -1,13 +1,24 @@
 from Calculations.OptionsCalculator import OptionsCalculator
 from Calculations.VolatilityCalculations import historicalVol
 from Calendar.CalendarComputations import timeBetween
-from Calendar.EnergyCalendar import EnergyCalendar
-import pandas as pd
+from Calendar.ExpiryCalendar import defaultCalendar
+from Calculations.ForwardCurve import ForwardCurve
+from Data.ColumnarStore import ColumnarStore
+from Instrumentation import metrics, timed
 import numpy as np
 import datetime
+import logging
+from typing import TYPE_CHECKING, Optional, Tuple
 
+if TYPE_CHECKING: # Callers pass dataframes, but pricing itself does not need pandas
+    import pandas as pd
 
-def PV(df: pd.DataFrame, ticker: str, monthsBack: int, strike: float, isCall: bool, rate: float = 0.05, monthsForward: int = 6 ) -> float:
+logger = logging.getLogger(__name__)
+
+
+@timed("pv")
+def PV(df: "pd.DataFrame", ticker: str, monthsBack: int, strike: float, isCall: bool, rate: float = 0.05, monthsForward: int = 6,
+       curve: Optional[ForwardCurve] = None) -> float:
     """
     Use the OptionsCalculator class together with the Calendar class to compute the PV of the options
     :param: df is the DataFrame containing the price.  This is used for both the current value of the future and
@@ -21,46 +32,83 @@ def PV(df: pd.DataFrame, ticker: str, monthsBack: int, strike: float, isCall: bo
     For example, if now is February 23, then a delivery date in April 23 would be two months forward.
     To simplify early versions of the web form, user input is minimised and therefore a default value of
     6 months forward is preset.
+    :param curve: forward curve of the ticker.  When given, the value of the future
+    is read from the curve at the delivery month instead of being the last price in df.
     Standard quant notation is used for all parameters.
     No formal testing (other than user observations) but the earlier functions have been unit-tested.
     """
+    K, sigma, expiryDate, T = PVInputs(df, ticker, monthsBack, strike, monthsForward, curve)
+
+    # Now all the elements are in place to price via the option calculator
+    with metrics.timer("pv.black76"):
+        option = OptionsCalculator(sigma, T, K, strike, rate)
+        return option.Black76(isCall)
+
+
+def PVInputs(df: "pd.DataFrame", ticker: str, monthsBack: int, strike: float, monthsForward: int = 6,
+             curve: Optional[ForwardCurve] = None) -> Tuple[float, float, datetime.date, float]:
+    """
+    Validate the request and gather the market inputs used by PV: the value
+    of the future, the historical sigma, the expiry date and T.
+    Other pricers (for example the Monte Carlo engine) share this step so that
+    they price off exactly the same inputs as Black76.
+    Parameters are as in PV.
+    :return: tuple of (future value, sigma, expiry date, T)
+    """
     if not ticker in df.columns:
         raise ValueError("Can not price -- inconsistent information")
 
     if strike <= 0:
         raise ValueError("Strike must be positive")
 
+    today = datetime.datetime.now().date()
     # Present value of future is final entry of dataframe
-    K = df[ticker].iloc[-1]
-    print("K =", K)
+    # unless a curve gives a forward for the delivery month
+    with metrics.timer("pv.forward"):
+        if curve is None:
+            K = df[ticker].iloc[-1]
+        else:
+            K = float(curve.forwardForMonths(np.datetime64(today, "M") + monthsForward))
+    logger.debug("K = %s", K)
     if K <= 0:
         raise ValueError("Value of future must be positive")
     # Sigma comes form historical volatilities
-    sigma = historicalVol(df, ticker)
-    print("The value of sigma is", sigma)
+    with metrics.timer("pv.vol"):
+        sigma = historicalVol(df, ticker)
+    logger.debug("The value of sigma is %s", sigma)
     if sigma < 0 or np.isnan(sigma):
         raise ValueError("Can not price -- error found in sigma")
 
     # Use the calendar to find T -- the time to expiry
-    # First consider the beginning of the current month
-    today = datetime.datetime.now().date()
-    # EnergyCalendar is constructed via a tuple
-    todaytuple = tuple(today.timetuple())[0:3]
-    calendar = EnergyCalendar(todaytuple)
-    # For the expiry time, we shift monthsForward months
-    # forward when considering the delivery date and then
-    # monthsBack months back.
-    combinedShift = monthsForward - monthsBack
-    expiryDate = calendar.lastBusinessDayOfMonth(combinedShift)
+    # The precomputed calendar is shared between requests
+    with metrics.timer("pv.calendar"):
+        calendar = defaultCalendar()
+        # For the expiry time, we shift monthsForward months
+        # forward when considering the delivery date and then
+        # monthsBack months back.
+        combinedShift = monthsForward - monthsBack
+        expiryYear, expiryMonth = divmod(today.year * 12 + today.month - 1 + combinedShift, 12)
+        expiryDate = calendar.lastBusinessDayOfMonth(expiryYear, expiryMonth + 1)
+        T = timeBetween(today, expiryDate)
     # The expiry date is crucial information which should be
-    # given to the user.  A more sophisticated application
-    # would do something more than just a raw print statement.
-    print("The expiry date is", expiryDate)
-    T = timeBetween(today, expiryDate)
-    print("T is", T)
+    # given to the user; it is logged and returned to callers.
+    logger.debug("The expiry date is %s", expiryDate)
+    logger.debug("T is %s", T)
     if T < 0:
         raise ValueError("Error -- time to expiry can not be negative")
 
-    # Now all the elements are in place to price via the option calculator
-    option = OptionsCalculator(sigma, T, K, strike, rate)
-    return option.Black76(isCall)
+    return K, sigma, expiryDate, T
+
+
+def PVFromColumnarStore(directory: str, ticker: str, monthsBack: int, strike: float, isCall: bool,
+                        rate: float = 0.05, monthsForward: int = 6) -> float:
+    """
+    PV of an option priced from a columnar store (see Data/ColumnarStore.py)
+    instead of a parsed csv.  The ticker's prices are memory-mapped rather than copied.
+    :param directory: columnar store directory
+    The other parameters are as in PV.
+    """
+    store = ColumnarStore(directory)
+    if ticker not in store.tickers:
+        raise ValueError("Can not price -- inconsistent information")
+    return PV(store.frame([ticker]), ticker, monthsBack, strike, isCall, rate, monthsForward)
@@ -0,0 +1,157 @@
+"""
+Memoization of option prices.
+The web form asks for the same (ticker, strike, call/put) combinations many
+times a day, and each request would otherwise recompute the historical vol,
+the expiry and T and reprice.  A PricingCache keeps the results keyed on the
+pricing inputs, with floats quantized to a tolerance so that inputs which
+differ only by rounding noise share an entry.
+Entries are evicted least recently used first once the cache is full, and
+optionally after a time to live.  Prices that depend on market data are
+stamped with the data version (see MarketData.MarketDataStore.version) and
+the valuation date, which is also part of their key, and the cache empties
+itself when the stamp changes, so new prices are never answered from old
+entries, even when a request on the old data finishes after the change.
+"""
+import collections
+import datetime
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Hashable, Optional
+from Calculations.OptionsCalculator import OptionsCalculator
+from Calculations.PVCalculator import PV
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class PricingCache:
+    """
+    Bounded LRU cache with an optional time to live.
+    Instances are shared between Flask threads, so all access goes through a lock.
+    """
+
+    def __init__(self, maxEntries: int = 10_000, ttl: Optional[float] = None, tolerance: float = 1e-8):
+        """
+        :param maxEntries: number of results kept before the least recently used is evicted
+        :param ttl: seconds after which an entry is recomputed, or None to keep entries until evicted
+        :param tolerance: floats are rounded to a multiple of tolerance in keys
+        """
+        if maxEntries < 1 or tolerance <= 0:
+            raise ValueError("The cache needs a positive size and tolerance")
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self.tolerance = tolerance
+        self._entries = collections.OrderedDict() # key -> (expiry time, value, size in bytes)
+        self._lock = threading.Lock()
+        self._version = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, *inputs) -> tuple:
+        """Cache key for pricing inputs, with floats quantized to the tolerance"""
+        return tuple(round(value / self.tolerance) if isinstance(value, float) else value for value in inputs)
+
+    def setVersion(self, version: Hashable):
+        """
+        Stamp the cache with the version of the data its results depend on.
+        A different stamp from the current one empties the cache.
+        """
+        with self._lock:
+            if version != self._version:
+                self._clear()
+                self._version = version
+
+    def lookup(self, key: tuple, compute: Callable[[], object]):
+        """
+        The cached value for key, or the value of compute() which is then cached.
+        Exceptions from compute are not cached, and neither are values computed
+        while the version stamp changed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            version = self._version
+        # Computed outside the lock so that other requests are not held up
+        value = compute()
+        size = sys.getsizeof(key) + sum(sys.getsizeof(item) for item in key) + sys.getsizeof(value)
+        with self._lock:
+            if self._version != version:
+                # Computed from the data of the previous stamp
+                return value
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[2]
+            self._entries[key] = (None if self.ttl is None else now + self.ttl, value, size)
+            self.bytes += size
+            while len(self._entries) > self.maxEntries:
+                self.bytes -= self._entries.popitem(last=False)[1][2]
+                self.evictions += 1
+        return value
+
+    def stats(self) -> dict:
+        """Counters, hit ratio and approximate memory used by the entries"""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": self.hits / requests if requests else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+            }
+
+    def _clear(self):
+        """Drop every entry; the lock must be held"""
+        self._entries.clear()
+        self.bytes = 0
+
+    def clear(self):
+        """Forget every entry and reset the counters"""
+        with self._lock:
+            self._clear()
+            self._version = None
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+# Caches shared by the Flask app
+pvCache = PricingCache()
+black76Cache = PricingCache(maxEntries=100_000)
+
+
+def cachedPV(df: "pd.DataFrame", version: Optional[Hashable], ticker: str, monthsBack: int, strike: float,
+             isCall: bool, rate: float = 0.05, monthsForward: int = 6, cache: PricingCache = pvCache) -> float:
+    """
+    PV, answered from the cache when the same option was priced on the same data today.
+    :param version: version stamp of the data in df, or None for data that
+    is not versioned (for example freshly uploaded data), which is never cached
+    :param cache: cache to use
+    Other parameters are as in PV.
+    """
+    if version is None:
+        return PV(df, ticker, monthsBack, strike, isCall, rate, monthsForward)
+    # T depends on today's date as well as on the data
+    stamp = (version, datetime.date.today())
+    cache.setVersion(stamp)
+    key = cache.key(stamp, ticker, monthsBack, float(strike), bool(isCall), float(rate), monthsForward)
+    return cache.lookup(key, lambda: PV(df, ticker, monthsBack, strike, isCall, rate, monthsForward))
+
+
+def cachedBlack76(sigma: float, time: float, price: float, strike: float, isCall: bool, rate: float = 0.05,
+                  cache: PricingCache = black76Cache) -> float:
+    """
+    OptionsCalculator.Black76 memoized on its quantized inputs.
+    These do not depend on market data, so the cache is never stamped.
+    """
+    key = cache.key(float(sigma), float(time), float(price), float(strike), bool(isCall), float(rate))
+    return cache.lookup(key, lambda: OptionsCalculator(sigma, time, price, strike, rate).Black76(isCall))
@@ -0,0 +1,180 @@
+"""
+Scenario and stress revaluation of option portfolios.
+A scenario shifts the market inputs of every position at once:
+    forward     relative shift of the forward (0.1 is +10%)
+    vol         absolute shift of sigma (0.05 is +5 vol points)
+    decay       time passed in years, which shortens every time to expiry
+    rate        absolute shift of the interest rate
+Every position is fully revalued with Black76 under every scenario.  The
+positions form one axis and a chunk of scenarios the other, so each chunk is
+a single broadcast batchBlack76 call; chunking over scenarios bounds the
+memory to chunkSize * positions values whatever the number of scenarios.
+Chunks can be spread over a process pool, in which case the positions are
+sent to each worker once and the P&L cube is written into shared memory.
+Options which expire within a scenario are worth their intrinsic value.
+Any other option whose vol a scenario shifts to zero or below can not be
+priced and has a NaN P&L in that scenario, as does the portfolio total.
+"""
+import itertools
+from multiprocessing import Pool, shared_memory
+from typing import Optional
+import numpy as np
+import pandas as pd
+from Calculations.BatchRunner import parseCallFlags
+from Calculations.OptionsCalculator import batchBlack76
+
+SHOCKS = ("forward", "vol", "decay", "rate")
+
+# Positions and the shared output inside each worker process
+_workerState = {}
+
+
+def shockGrid(forward=(0.0,), vol=(0.0,), decay=(0.0,), rate=(0.0,)) -> pd.DataFrame:
+    """
+    Every combination of the given shocks.
+    :return: dataframe with one row per scenario and the SHOCKS as columns,
+    indexed by a MultiIndex over the shock values so that results can be
+    reshaped into a cube (see ScenarioEngine.cube)
+    """
+    axes = [np.asarray(values, dtype=float).ravel() for values in (forward, vol, decay, rate)]
+    index = pd.MultiIndex.from_product(axes, names=SHOCKS)
+    return pd.DataFrame(list(itertools.product(*axes)), columns=list(SHOCKS), index=index)
+
+
+def _revalue(positions: dict, baseRate: float, shocks: dict) -> np.ndarray:
+    """
+    Values of every position (columns) under every scenario (rows).
+    :param positions: arrays sigma, time, price, strike, isCall
+    :param shocks: arrays forward, vol, decay, rate, one value per scenario
+    """
+    column = {name: np.asarray(values, dtype=float)[:, None] for name, values in shocks.items()}
+    sigma = positions["sigma"] + column["vol"]
+    time = positions["time"] - column["decay"]
+    price = positions["price"] * (1 + column["forward"])
+    expired = time <= 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = batchBlack76(sigma, np.where(expired, 1.0, time), price, positions["strike"],
+                              positions["isCall"], baseRate + column["rate"])
+    values = np.where(sigma > 0, values, np.nan)
+    if np.any(expired):
+        intrinsic = np.maximum(np.where(positions["isCall"], price - positions["strike"],
+                                        positions["strike"] - price), 0.0)
+        values = np.where(expired, intrinsic, values)
+    return values
+
+
+def _attachScenarioWorker(positions: dict, baseRate: float, outputName: Optional[str], shape: tuple):
+    """Pool initializer: keep the positions and map the output block once per worker"""
+    _workerState.update(positions=positions, baseRate=baseRate, block=None)
+    if outputName is not None:
+        block = shared_memory.SharedMemory(name=outputName)
+        _workerState["block"] = block
+        _workerState["output"] = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+
+
+def _revalueChunk(task) -> Optional[np.ndarray]:
+    """P&L of one chunk of scenarios, written to the shared cube or returned as portfolio totals"""
+    start, stop, shocks = task
+    state = _workerState
+    pnl = state["positions"]["quantity"] * (_revalue(state["positions"], state["baseRate"], shocks)
+                                            - state["positions"]["pv"])
+    if state["block"] is None:
+        return pnl.sum(axis=1)
+    state["output"][start:stop] = pnl
+    return None
+
+
+class ScenarioEngine:
+    """
+    Full revaluation of one portfolio under grids of scenarios.
+    """
+
+    def __init__(self, sigma, time, price, strike, isCall, quantity=1.0, rate: float = 0.05):
+        """
+        Base market inputs of the positions, as arrays (or scalars) of equal length.
+        :param sigma: annualized volatility
+        :param time: time to expiry in years
+        :param price: forward
+        :param strike: strike
+        :param isCall: True for calls and False for puts
+        :param quantity: number of options held, negative for short positions
+        :param rate: base interest rate
+        """
+        arrays = np.broadcast_arrays(*(np.asarray(value, dtype=float).ravel()
+                                       for value in (sigma, time, price, strike, quantity)),
+                                     np.asarray(isCall, dtype=bool).ravel())
+        names = ("sigma", "time", "price", "strike", "quantity", "isCall")
+        self.positions = {name: np.ascontiguousarray(array) for name, array in zip(names, arrays)}
+        self.rate = rate
+        self.positions["pv"] = batchBlack76(self.positions["sigma"], self.positions["time"], self.positions["price"],
+                                            self.positions["strike"], self.positions["isCall"], rate)
+
+    @classmethod
+    def fromPriced(cls, priced: pd.DataFrame, rate: float = 0.05) -> "ScenarioEngine":
+        """
+        Engine for positions priced by BatchRunner.priceFrame; positions
+        which could not be priced are left out.
+        """
+        valid = priced["pv"].notna()
+        priced = priced[valid]
+        isCall = priced["isCall"]
+        if isCall.dtype != bool:
+            isCall = parseCallFlags(isCall) > 0
+        return cls(priced["sigma"], priced["time"], priced["forward"], priced["strike"], isCall,
+                   pd.to_numeric(priced["quantity"]), rate)
+
+    @property
+    def size(self) -> int:
+        """Number of positions"""
+        return len(self.positions["pv"])
+
+    def run(self, scenarios: pd.DataFrame, byPosition: bool = True, chunkSize: int = 20,
+            workers: int = 1) -> np.ndarray:
+        """
+        P&L of the portfolio under each scenario, relative to the base values.
+        :param scenarios: dataframe with any of the SHOCKS as columns, e.g. from shockGrid
+        :param byPosition: return the P&L of every position; otherwise only portfolio totals
+        :param chunkSize: scenarios revalued together
+        :param workers: processes revaluing chunks in parallel; 1 revalues in this process
+        :return: array of shape (scenarios, positions), or (scenarios,) for totals
+        """
+        unknown = [column for column in scenarios.columns if column not in SHOCKS]
+        if unknown:
+            raise ValueError("Unknown shocks: " + ", ".join(unknown))
+        count = len(scenarios)
+        shocks = {name: scenarios[name].to_numpy(dtype=float) if name in scenarios.columns else np.zeros(count)
+                  for name in SHOCKS}
+        tasks = [(start, min(start + chunkSize, count),
+                  {name: values[start:start + chunkSize] for name, values in shocks.items()})
+                 for start in range(0, count, chunkSize)]
+        shape = (count, self.size)
+
+        if workers <= 1:
+            result = np.empty(shape) if byPosition else np.empty(count)
+            for start, stop, chunk in tasks:
+                pnl = self.positions["quantity"] * (_revalue(self.positions, self.rate, chunk) - self.positions["pv"])
+                result[start:stop] = pnl if byPosition else pnl.sum(axis=1)
+            return result
+
+        block = shared_memory.SharedMemory(create=True, size=max(count * self.size * 8, 1)) if byPosition else None
+        try:
+            with Pool(workers, initializer=_attachScenarioWorker,
+                      initargs=(self.positions, self.rate, block.name if block else None, shape)) as pool:
+                totals = pool.map(_revalueChunk, tasks)
+            if block is None:
+                return np.concatenate(totals)
+            return np.ndarray(shape, dtype=np.float64, buffer=block.buf).copy()
+        finally:
+            if block is not None:
+                block.close()
+                block.unlink()
+
+    @staticmethod
+    def cube(pnl: np.ndarray, scenarios: pd.DataFrame) -> np.ndarray:
+        """
+        Reshape results for a shockGrid into one axis per shock.
+        :return: array of shape (forward, vol, decay, rate) or (forward, vol, decay, rate, positions)
+        """
+        if not isinstance(scenarios.index, pd.MultiIndex):
+            raise ValueError("Only scenarios built with shockGrid can be reshaped into a cube")
+        return pnl.reshape(tuple(scenarios.index.levshape) + pnl.shape[1:])
@@ -0,0 +1,331 @@
+"""
+Spread options across tickers and across delivery months.
+historicalVol and PV treat each ticker on its own.  CovarianceEngine instead
+keeps the covariance matrix of the daily log returns of several tickers,
+over a rolling window or the full history, and updates it incrementally:
+  - a new day of prices is a multivariate Welford update of the running
+    means and co-moment matrix, O(tickers^2) however long the history is,
+    with the oldest day removed by the same update run backwards;
+  - a new ticker only adds one row and column, computed from its returns on
+    the stored dates, without recomputing the rest of the matrix.
+As in historicalVol, the population covariance is annualized with 260
+business days.
+An option on the spread F1 - F2 pays max(F1 - F2 - K, 0) for a call and
+max(K - F1 + F2, 0) for a put at expiry.  Kirk's approximation treats
+F2 + K as lognormal, so that the spread option is a Black76 option on F1
+struck at F2 + K with the volatility
+    sigma^2 = sigma1^2 - 2 rho sigma1 sigma2 w + sigma2^2 w^2,  w = F2 / (F2 + K)
+and needs F2 + K > 0.  spreadMonteCarlo simulates the two futures jointly
+at expiry as a check.  Both price a whole ladder of strikes in one call.
+A calendar spread is the same option on two delivery months of one
+commodity, with forwards read from a ForwardCurve.
+"""
+import math
+from collections import deque
+from typing import TYPE_CHECKING, Iterable, Optional
+import numpy as np
+from Calculations.ForwardCurve import ForwardCurve
+from Calculations.OptionsCalculator import batchBlack76
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DAYS_IN_YEAR = 260
+
+
+class CovarianceEngine:
+    """
+    Covariance of the log returns of several tickers over a rolling window
+    (or the full history when window is None), maintained incrementally.
+    """
+
+    def __init__(self, window: Optional[int] = None):
+        """
+        :param window: number of daily log returns in the window, or None for the full history
+        """
+        if window is not None and window < 2:
+            raise ValueError("The covariance window must contain at least two returns")
+        self.window = window
+        self.tickers = []
+        self.count = 0 # Returns currently covered
+        self._mean = np.zeros(0)
+        self._comoment = np.zeros((0, 0)) # Sums of products of deviations from the means
+        self._dates = deque() # Dates of the stored prices, one more than the returns
+        self._logPrices = deque() # Log prices of every ticker on those dates
+
+    def seed(self, df: "pd.DataFrame", tickers: Iterable[str]):
+        """
+        Replace the state by that of a price history, vectorized.
+        Dates on which any of the tickers has no price are skipped.
+        :param df: dataframe sorted by date with a DATE column and a column per ticker
+        :param tickers: tickers to include
+        """
+        tickers = list(tickers)
+        missing = [ticker for ticker in tickers if ticker not in df.columns]
+        if missing:
+            raise ValueError("The data source does not correspond to your ticker: " + ", ".join(missing))
+        if len(set(tickers)) != len(tickers):
+            raise ValueError("Each ticker can only be included once")
+        prices = df[tickers].to_numpy(dtype=float)
+        complete = ~np.isnan(prices).any(axis=1)
+        prices, dates = prices[complete], _dates(df)[complete]
+        if np.any(prices <= 0):
+            raise ValueError("Prices must be positive")
+        if self.window is not None:
+            prices, dates = prices[-(self.window + 1):], dates[-(self.window + 1):]
+        logPrices = np.log(prices)
+        returns = np.diff(logPrices, axis=0)
+
+        self.tickers = tickers
+        self.count = len(returns)
+        self._mean = returns.mean(axis=0) if self.count else np.zeros(len(tickers))
+        deviations = returns - self._mean
+        self._comoment = deviations.T @ deviations
+        self._dates = deque(dates.tolist())
+        self._logPrices = deque(logPrices)
+
+    def update(self, date, prices: dict):
+        """
+        Add one day of prices in O(tickers^2), dropping the oldest day if the window is full.
+        :param date: must be later than the last stored date
+        :param prices: price per ticker; every ticker of the engine is required
+        """
+        missing = [ticker for ticker in self.tickers if ticker not in prices]
+        if missing:
+            raise ValueError("Missing prices for: " + ", ".join(missing))
+        date = np.datetime64(date, "D")
+        if self._dates and date <= self._dates[-1]:
+            raise ValueError("Dates must be later than the stored history")
+        row = np.array([prices[ticker] for ticker in self.tickers], dtype=float)
+        if np.any(~(row > 0)):
+            raise ValueError("Prices must be positive")
+        logPrices = np.log(row)
+        if self._logPrices:
+            self._add(logPrices - self._logPrices[-1])
+        self._dates.append(date)
+        self._logPrices.append(logPrices)
+        if self.window is not None and self.count > self.window:
+            oldest = self._logPrices.popleft()
+            self._dates.popleft()
+            self._remove(self._logPrices[0] - oldest)
+
+    def _add(self, logReturns: np.ndarray):
+        """Welford's update of the means and co-moments with one day of returns"""
+        self.count += 1
+        delta = logReturns - self._mean
+        self._mean = self._mean + delta / self.count
+        self._comoment += np.outer(delta, logReturns - self._mean)
+
+    def _remove(self, logReturns: np.ndarray):
+        """Welford's update run backwards"""
+        if self.count == 1:
+            self.count, self._mean, self._comoment = 0, np.zeros_like(self._mean), np.zeros_like(self._comoment)
+            return
+        oldMean = self._mean
+        self.count -= 1
+        self._mean = (oldMean * (self.count + 1) - logReturns) / self.count
+        self._comoment -= np.outer(logReturns - self._mean, logReturns - oldMean)
+
+    def addTicker(self, df: "pd.DataFrame", ticker: str):
+        """
+        Include one more ticker, computing only its row and column of the matrix.
+        :param df: dataframe with a DATE column and a price for the ticker on every stored date
+        :param ticker: ticker string
+        """
+        if not self._dates:
+            raise ValueError("The engine must be seeded before tickers are added")
+        if ticker in self.tickers:
+            raise ValueError("Each ticker can only be included once")
+        if ticker not in df.columns:
+            raise ValueError("The data source does not correspond to your ticker")
+        stored = np.array(self._dates, dtype="datetime64[D]")
+        dates, prices = _dates(df), df[ticker].to_numpy(dtype=float)
+        position = np.clip(np.searchsorted(dates, stored), 0, max(len(dates) - 1, 0))
+        if len(dates) == 0 or np.any(dates[position] != stored):
+            raise ValueError("The new ticker needs prices on every stored date")
+        prices = prices[position]
+        if np.any(~(prices > 0)):
+            raise ValueError("Prices must be positive")
+        logPrices = np.log(prices)
+        returns = np.diff(logPrices)
+        mean = returns.mean() if self.count else 0.0
+        deviations = returns - mean
+        existing = np.diff(np.array(self._logPrices).reshape(len(stored), len(self.tickers)), axis=0)
+        cross = (existing - self._mean).T @ deviations
+
+        size = len(self.tickers)
+        comoment = np.empty((size + 1, size + 1))
+        comoment[:size, :size] = self._comoment
+        comoment[:size, size] = comoment[size, :size] = cross
+        comoment[size, size] = deviations @ deviations
+        self._comoment = comoment
+        self._mean = np.append(self._mean, mean)
+        self._logPrices = deque(np.column_stack((np.array(self._logPrices).reshape(len(stored), size), logPrices)))
+        self.tickers.append(ticker)
+
+    def covariance(self) -> np.ndarray:
+        """Annualized covariance matrix of the log returns, ordered as self.tickers"""
+        if self.count < 2:
+            raise ValueError("Not enough data to determine the covariance")
+        comoment = (self._comoment + self._comoment.T) / 2 # Rounding can make the updates slightly asymmetric
+        return comoment / self.count * DAYS_IN_YEAR
+
+    def correlation(self) -> np.ndarray:
+        """Correlation matrix of the log returns, ordered as self.tickers"""
+        covariance = self.covariance()
+        vols = np.sqrt(np.diag(covariance))
+        correlation = np.clip(covariance / np.outer(vols, vols), -1.0, 1.0)
+        np.fill_diagonal(correlation, 1.0)
+        return correlation
+
+    def _index(self, ticker: str) -> int:
+        """Position of a ticker in the matrices"""
+        if ticker not in self.tickers:
+            raise ValueError("The data source does not correspond to your ticker")
+        return self.tickers.index(ticker)
+
+    def vol(self, ticker: str) -> float:
+        """Annualized volatility of one ticker"""
+        index = self._index(ticker)
+        return math.sqrt(self.covariance()[index, index])
+
+    def lastPrice(self, ticker: str) -> float:
+        """Most recent stored price of a ticker"""
+        if not self._logPrices:
+            raise ValueError("No prices have been received for this ticker")
+        return math.exp(self._logPrices[-1][self._index(ticker)])
+
+    def spreadOption(self, longTicker: str, shortTicker: str, strike, time: float, isCall=True,
+                     rate: float = 0.05, method: str = "kirk", **options):
+        """
+        Price options on the spread between the last prices of two tickers,
+        with their vols and correlation from the engine.
+        :param strike: strike or array of strikes
+        :param method: "kirk", or "montecarlo" for spreadMonteCarlo with options
+        :return: numpy array of PVs for kirk, the spreadMonteCarlo dictionary otherwise
+        """
+        first, second = self._index(longTicker), self._index(shortTicker)
+        covariance = self.covariance()
+        sigma1, sigma2 = math.sqrt(covariance[first, first]), math.sqrt(covariance[second, second])
+        if not (sigma1 > 0 and sigma2 > 0):
+            raise ValueError("Can not price -- error found in sigma")
+        # The clipped correlation, as rounding can push the raw ratio past +-1
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rho = self.correlation()[first, second]
+        inputs = (sigma1, sigma2, rho, time, self.lastPrice(longTicker), self.lastPrice(shortTicker), strike, isCall,
+                  rate)
+        if method == "kirk":
+            return kirkSpread(*inputs)
+        if method == "montecarlo":
+            return spreadMonteCarlo(*inputs, **options)
+        raise ValueError("Unknown spread pricing method " + method)
+
+
+def _dates(df: "pd.DataFrame") -> np.ndarray:
+    """The DATE column as datetime64[D]"""
+    if "DATE" not in df.columns:
+        raise ValueError("The data has no DATE column")
+    return np.asarray(df["DATE"], dtype="datetime64[D]")
+
+
+def kirkSpread(sigma1, sigma2, rho, time, price1, price2, strike, isCall=True, rate=0.05) -> np.ndarray:
+    """
+    Kirk's approximation to options on F1 - F2.
+    Arguments broadcast together as in batchBlack76, so a ladder of strikes
+    is priced by passing an array of strikes.
+    :param sigma1: annualized volatility of the long future F1
+    :param sigma2: annualized volatility of the short future F2
+    :param rho: correlation of the two futures
+    :param time: time to expiry in years
+    :param price1: value of F1
+    :param price2: value of F2
+    :param strike: strike on the spread, which may be negative as long as F2 + K > 0
+    :param isCall: True for calls and False for puts
+    :param rate: interest rate
+    :return: numpy array of present values with the broadcast shape of the inputs
+    """
+    rho = np.asarray(rho, dtype=float)
+    if np.any(np.abs(rho) > 1):
+        raise ValueError("The correlation must lie between -1 and 1")
+    shifted = np.asarray(price2, dtype=float) + np.asarray(strike, dtype=float)
+    if np.any(shifted <= 0):
+        raise ValueError("Kirk's approximation needs F2 + strike to be positive")
+    weight = sigma2 * np.asarray(price2, dtype=float) / shifted
+    sigma = np.sqrt(np.maximum(sigma1 * sigma1 - 2 * rho * sigma1 * weight + weight * weight, 0.0))
+    return batchBlack76(sigma, time, price1, shifted, isCall, rate)
+
+
+def spreadMonteCarlo(sigma1: float, sigma2: float, rho: float, time: float, price1: float, price2: float,
+                     strike, isCall=True, rate: float = 0.05, paths: int = 200_000, antithetic: bool = True,
+                     seed: Optional[int] = None, chunkSize: int = 50_000) -> dict:
+    """
+    Monte Carlo value of options on F1 - F2, with the two futures following
+    correlated driftless geometric Brownian motions sampled exactly at expiry.
+    Every strike is priced from the same paths.
+    Parameters are as in kirkSpread, with scalar market inputs, plus
+    :param paths: number of simulated paths (antithetic pairs count as two)
+    :param antithetic: simulate each normal draw together with its negative
+    :param seed: seed for reproducible results (for a given chunkSize)
+    :param chunkSize: paths simulated at a time, bounding the memory to chunkSize * strikes
+    :return: dictionary with arrays pv and stdError (one value per strike) and the number of paths
+    """
+    if sigma1 <= 0 or sigma2 <= 0 or time <= 0 or price1 <= 0 or price2 <= 0 or paths < 2:
+        raise ValueError("Can not price -- inputs must be positive")
+    if not -1 <= rho <= 1:
+        raise ValueError("The correlation must lie between -1 and 1")
+    strikes = np.atleast_1d(np.asarray(strike, dtype=float))
+    sign = np.where(np.broadcast_to(np.asarray(isCall, dtype=bool), strikes.shape), 1.0, -1.0)
+    rng = np.random.default_rng(seed)
+    rootTime = math.sqrt(time)
+    logForwards = (math.log(price1) - 0.5 * sigma1 * sigma1 * time, math.log(price2) - 0.5 * sigma2 * sigma2 * time)
+    independent = math.sqrt(max(1 - rho * rho, 0.0))
+
+    def payoffs(normals):
+        """Undiscounted payoffs (paths, strikes) for one block of normal pairs"""
+        future1 = np.exp(logForwards[0] + sigma1 * rootTime * normals[:, 0])
+        future2 = np.exp(logForwards[1] + sigma2 * rootTime * (rho * normals[:, 0] + independent * normals[:, 1]))
+        spread = (future1 - future2)[:, None]
+        return np.maximum(sign * (spread - strikes), 0.0)
+
+    drawsPerSample = 2 if antithetic else 1
+    total, totalSquares, samples = np.zeros(strikes.shape), np.zeros(strikes.shape), 0
+    remaining = paths // drawsPerSample
+    while remaining > 0:
+        count = min(remaining, max(1, chunkSize // drawsPerSample))
+        remaining -= count
+        normals = rng.standard_normal((count, 2))
+        x = payoffs(normals)
+        if antithetic:
+            x = (x + payoffs(-normals)) / 2
+        samples += count
+        total += x.sum(axis=0)
+        totalSquares += (x * x).sum(axis=0)
+
+    discount = math.exp(-rate * time)
+    mean = total / samples
+    variance = np.maximum(totalSquares / samples - mean * mean, 0.0)
+    return {
+        "pv": discount * mean,
+        "stdError": discount * np.sqrt(variance / max(samples - 1, 1)),
+        "paths": samples * drawsPerSample,
+    }
+
+
+def calendarSpread(curve: ForwardCurve, longMonth, shortMonth, sigmaLong, sigmaShort, rho, time, strike,
+                   isCall=True, rate=0.05) -> np.ndarray:
+    """
+    Kirk's approximation to options on the spread between two delivery months of one commodity,
+    paying on F(longMonth) - F(shortMonth) - K.
+    :param curve: forward curve giving the two forwards
+    :param longMonth: delivery month bought, e.g. "2024-01"
+    :param shortMonth: delivery month sold
+    :param sigmaLong: annualized volatility of the long month's future
+    :param sigmaShort: annualized volatility of the short month's future
+    :param rho: correlation between the two delivery months
+    :param time: time to expiry in years, before the earlier delivery month
+    Other parameters are as in kirkSpread.
+    """
+    if np.any(np.asarray(time, dtype=float) > min(curve.tenorOf([longMonth, shortMonth]))):
+        raise ValueError("A calendar spread option must expire before both delivery months")
+    forwardLong, forwardShort = curve.forwardForMonths([longMonth, shortMonth])
+    return kirkSpread(sigmaLong, sigmaShort, rho, time, forwardLong, forwardShort, strike, isCall, rate)
@@ -0,0 +1,231 @@
+"""
+Persistent end-of-day valuations with dependency-tracked recomputation.
+A ValuationStore is an SQLite database holding a book of contracts and, for
+every contract and as-of date, its PV, Greeks, sigma, T, forward and expiry
+together with the versions of the inputs it was priced from:
+    pricesVersion     hash of the ticker's prices used, i.e. the dates and
+                      prices up to the as-of date (only the last volWindow
+                      returns and the last price when a vol window is set)
+    calendarVersion   hash of the expiry calendar and the day count index
+    volWindow         returns used for historical vol, 0 for the full history
+    rate              interest rate
+recompute prices a date through BatchRunner, but only the contracts with no
+valuation for that date or one whose input versions differ from the current
+ones; re-running after a correction to one ticker's prices reprices only
+that ticker's contracts, and contracts added to the book are priced alone.
+Every new as-of date changes T and so reprices the whole book.
+Quantities are not an input of the PV, so the value (pv * quantity) is
+computed when queried and changing a quantity needs no repricing.
+Valuations are indexed by (asOf, ticker) and (asOf, expiry) for as-of queries.
+"""
+import datetime
+import hashlib
+import sqlite3
+from typing import TYPE_CHECKING, Optional
+import numpy as np
+from Calculations.CallFlags import CALL_FLAG_ERROR
+from Calculations.OptionsCalculator import batchBlack76Greeks
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+GREEKS = ("delta", "gamma", "vega", "theta", "rho")
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS contracts (
+    id INTEGER PRIMARY KEY,
+    ticker TEXT NOT NULL,
+    deliveryMonth TEXT NOT NULL,
+    strike REAL NOT NULL,
+    isCall INTEGER NOT NULL,
+    quantity REAL NOT NULL DEFAULT 1,
+    UNIQUE (ticker, deliveryMonth, strike, isCall)
+);
+CREATE TABLE IF NOT EXISTS valuations (
+    contractId INTEGER NOT NULL REFERENCES contracts(id),
+    asOf TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    expiry TEXT,
+    pv REAL, delta REAL, gamma REAL, vega REAL, theta REAL, rho REAL,
+    sigma REAL, time REAL, forward REAL,
+    error TEXT,
+    pricesVersion TEXT NOT NULL,
+    calendarVersion TEXT NOT NULL,
+    volWindow INTEGER NOT NULL,
+    rate REAL NOT NULL,
+    PRIMARY KEY (contractId, asOf)
+);
+CREATE INDEX IF NOT EXISTS valuationsByTicker ON valuations (asOf, ticker);
+CREATE INDEX IF NOT EXISTS valuationsByExpiry ON valuations (asOf, expiry);
+"""
+
+
+def _hash(*arrays) -> str:
+    """Hex digest of the bytes of some arrays"""
+    digest = hashlib.sha1()
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+class ValuationStore:
+    """
+    Contracts and their valuations by as-of date in one SQLite file.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        :param path: database file, created if necessary, or ":memory:" for a temporary store
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        """Close the database"""
+        self.connection.close()
+
+    def addContracts(self, positions: "pd.DataFrame") -> int:
+        """
+        Add contracts to the book, updating the quantity of those already in it.
+        :param positions: dataframe with ticker, deliveryMonth (YYYY-MM), strike,
+        isCall (booleans or Yes/No) and optionally quantity columns
+        :return: number of contracts in the book
+        """
+        from Calculations.BatchRunner import parseCallFlags
+        missing = [column for column in ("ticker", "deliveryMonth", "strike", "isCall") if column not in positions]
+        if missing:
+            raise ValueError("Missing position columns: " + ", ".join(missing))
+        if not positions["ticker"].map(lambda ticker: isinstance(ticker, str) and ticker != "").all():
+            raise ValueError("The ticker is missing")
+        isCall = parseCallFlags(positions["isCall"])
+        if np.any(np.isnan(isCall)):
+            raise ValueError(CALL_FLAG_ERROR)
+        strike = positions["strike"].to_numpy(dtype=float)
+        if not np.all(np.isfinite(strike) & (strike > 0)):
+            raise ValueError("Strike must be positive")
+        quantity = positions["quantity"].to_numpy(dtype=float) if "quantity" in positions else np.ones(len(positions))
+        if not np.all(np.isfinite(quantity)):
+            raise ValueError("Quantity must be a finite number")
+        months = np.asarray(positions["deliveryMonth"], dtype="datetime64[M]")
+        if np.any(np.isnat(months)):
+            raise ValueError("The delivery month is missing")
+        months = months.astype(str)
+        rows = zip(positions["ticker"], months, strike.tolist(), isCall.astype(int).tolist(),
+                   quantity.tolist())
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO contracts (ticker, deliveryMonth, strike, isCall, quantity) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (ticker, deliveryMonth, strike, isCall) DO UPDATE SET quantity = excluded.quantity",
+                rows)
+        return self.connection.execute("SELECT COUNT(*) FROM contracts").fetchone()[0]
+
+    def contracts(self) -> "pd.DataFrame":
+        """The book, one row per contract with its id"""
+        import pandas as pd
+        return pd.read_sql_query("SELECT * FROM contracts ORDER BY id", self.connection)
+
+    @staticmethod
+    def pricesVersions(history: "pd.DataFrame", tickers) -> dict:
+        """Version of the prices of each ticker in the history that pricing uses, by ticker"""
+        dates = np.asarray(history["DATE"], dtype="datetime64[D]")
+        return {ticker: _hash(dates, history[ticker].to_numpy(dtype=float))
+                for ticker in tickers if ticker in history.columns}
+
+    @staticmethod
+    def calendarVersion(runner) -> str:
+        """Version of the calendar and day count index used by a BatchRunner"""
+        return _hash(runner.calendar.monthEnds, runner.calendar.holidays, runner.yearFraction.cumulative)
+
+    def recompute(self, marketData: "pd.DataFrame", asOf: Optional[datetime.date] = None,
+                  volWindow: Optional[int] = None, rate: float = 0.05) -> dict:
+        """
+        Bring the valuations of a date up to date, repricing only the contracts whose inputs changed.
+        :param marketData: price history with a DATE column and a column per ticker
+        :param asOf: valuation date, today by default; prices after it are ignored
+        :param volWindow: number of returns used for historical vol, or None for the full history
+        :param rate: interest rate
+        :return: summary with the number of contracts, those repriced and those left unchanged
+        """
+        from Calculations.BatchRunner import BatchRunner
+        asOf = asOf or datetime.date.today()
+        if volWindow is not None and volWindow < 2:
+            raise ValueError("The volatility window must contain at least two returns")
+        dates = np.asarray(marketData["DATE"], dtype="datetime64[D]")
+        history = marketData.iloc[:np.searchsorted(dates, np.datetime64(asOf, "D"), side="right")]
+        if history.empty:
+            raise ValueError("There are no prices on or before the valuation date")
+        if volWindow is not None:
+            history = history.iloc[-(volWindow + 1):]
+        runner = BatchRunner(history, workers=1, rate=rate, valuationDate=asOf)
+
+        book = self.contracts()
+        prices = self.pricesVersions(history, book["ticker"].unique())
+        calendar = self.calendarVersion(runner)
+        window = volWindow or 0
+        stored = {row[0]: row[1:] for row in self.connection.execute(
+            "SELECT contractId, pricesVersion, calendarVersion, volWindow, rate FROM valuations WHERE asOf = ?",
+            (asOf.isoformat(),))}
+        current = [(prices.get(ticker, ""), calendar, window, rate) for ticker in book["ticker"]]
+        stale = np.array([stored.get(contractId) != versions for contractId, versions in zip(book["id"], current)],
+                         dtype=bool)
+        summary = {"contracts": len(book), "repriced": int(stale.sum()), "unchanged": int((~stale).sum())}
+        if not stale.any():
+            return summary
+
+        positions = book[stale].reset_index(drop=True)
+        priced = runner.priceFrame(positions.assign(isCall=positions["isCall"].astype(bool)))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            greeks = batchBlack76Greeks(priced["sigma"], priced["time"], priced["forward"], priced["strike"],
+                                        priced["isCall"].to_numpy(dtype=bool), rate)
+        valid = priced["error"].to_numpy() == ""
+        columns = {name: np.where(valid, greeks[name], np.nan) for name in GREEKS}
+        expiry = priced["expiry"].to_numpy(dtype="datetime64[D]").astype(str)
+        versions = [current[index] for index in np.flatnonzero(stale)]
+        rows = []
+        for position, row in enumerate(priced.itertuples(index=False)):
+            rows.append((int(row.id), asOf.isoformat(), row.ticker, None if expiry[position] == "NaT" else expiry[position],
+                         _sqlFloat(row.pv), *(_sqlFloat(columns[name][position]) for name in GREEKS),
+                         _sqlFloat(row.sigma), _sqlFloat(row.time), _sqlFloat(row.forward), row.error or None,
+                         *versions[position]))
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO valuations (contractId, asOf, ticker, expiry, pv, delta, gamma, vega, theta, "
+                "rho, sigma, time, forward, error, pricesVersion, calendarVersion, volWindow, rate) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return summary
+
+    def valuations(self, asOf: datetime.date, ticker: Optional[str] = None,
+                   expiryFrom: Optional[datetime.date] = None, expiryTo: Optional[datetime.date] = None) -> "pd.DataFrame":
+        """
+        Stored valuations of one date, joined with the contract terms.
+        :param asOf: valuation date
+        :param ticker: only this ticker
+        :param expiryFrom: only expiries on or after this date
+        :param expiryTo: only expiries on or before this date
+        :return: dataframe with one row per contract, including value = pv * quantity
+        """
+        import pandas as pd
+        conditions, parameters = ["v.asOf = ?"], [asOf.isoformat()]
+        for condition, value in (("v.ticker = ?", ticker), ("v.expiry >= ?", expiryFrom), ("v.expiry <= ?", expiryTo)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value if isinstance(value, str) else value.isoformat())
+        query = ("SELECT v.contractId, v.asOf, v.ticker, c.deliveryMonth, c.strike, c.isCall, c.quantity, v.expiry, "
+                 "v.pv, v.pv * c.quantity AS value, v.delta, v.gamma, v.vega, v.theta, v.rho, v.sigma, v.time, "
+                 "v.forward, v.error, v.pricesVersion, v.calendarVersion, v.volWindow, v.rate "
+                 "FROM valuations v JOIN contracts c ON c.id = v.contractId WHERE " + " AND ".join(conditions) +
+                 " ORDER BY v.contractId")
+        result = pd.read_sql_query(query, self.connection, params=parameters)
+        result["isCall"] = result["isCall"].astype(bool)
+        return result
+
+    def asOfDates(self) -> list:
+        """Dates with stored valuations, oldest first"""
+        return [datetime.date.fromisoformat(row[0])
+                for row in self.connection.execute("SELECT DISTINCT asOf FROM valuations ORDER BY asOf")]
+
+
+def _sqlFloat(value) -> Optional[float]:
+    """Floats for SQLite, with NaN stored as NULL"""
+    value = float(value)
+    return None if np.isnan(value) else value
@@ -1,8 +1,13 @@
+from typing import TYPE_CHECKING
 import numpy as np
-import pandas as pd
+from Instrumentation import timed
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-def historicalVol(df: pd.DataFrame, ticker: str, minSample: int = 5) -> float:
+
+@timed("historicalVol")
+def historicalVol(df: "pd.DataFrame", ticker: str, minSample: int = 5) -> float:
     """
     A function for calculating annualized vols based
     on historical volatility as given by data
@@ -0,0 +1,223 @@
+"""
+Incremental volatility estimators.
+historicalVol rescans the whole price history on every call.  The estimators
+here keep running sums instead, so that a new price print updates sigma in
+O(1) however long the history is:
+  - RollingVolatility keeps Welford's running mean and sum of squared deviations
+    over the last `window` log returns, adding the newest return and removing
+    the oldest one.  Without a window it covers the full history and then
+    agrees with historicalVol.
+  - EwmaVolatility is the RiskMetrics exponentially weighted estimator.
+VolatilityEngine holds any number of these per ticker and feeds every print
+to all of them.
+As in historicalVol, the volatility is annualized with 260 business days,
+and a missing (NaN) price drops the returns on either side of it rather than
+bridging the gap with one return.
+"""
+import math
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+import numpy as np
+
+if TYPE_CHECKING: # Histories are passed as dataframes, but the estimators do not need pandas
+    import pandas as pd
+
+DAYS_IN_YEAR = 260
+
+
+class RollingVolatility:
+    """
+    Standard deviation of the log returns over a rolling window (or the full
+    history when window is None), maintained with Welford's algorithm.
+    The population standard deviation is used, as np.nanstd does in historicalVol.
+    """
+
+    def __init__(self, window: Optional[int] = None):
+        """
+        :param window: number of log returns in the window, or None for the full history
+        """
+        if window is not None and window < 2:
+            raise ValueError("The volatility window must contain at least two returns")
+        self.window = window
+        self._returns = deque()
+        self.count = 0
+        self._mean = 0.0
+        self._M2 = 0.0 # Sum of squared deviations from the mean
+
+    def add(self, logReturn: float):
+        """Include one more log return, dropping the oldest one if the window is full"""
+        if self.window is not None:
+            if self.count == self.window:
+                self._remove(self._returns.popleft())
+            self._returns.append(logReturn)
+        self.count += 1
+        delta = logReturn - self._mean
+        self._mean += delta / self.count
+        self._M2 += delta * (logReturn - self._mean)
+
+    def _remove(self, logReturn: float):
+        """Welford's update run backwards"""
+        if self.count == 1:
+            self.count, self._mean, self._M2 = 0, 0.0, 0.0
+            return
+        oldMean = self._mean
+        self.count -= 1
+        self._mean = (oldMean * (self.count + 1) - logReturn) / self.count
+        self._M2 -= (logReturn - oldMean) * (logReturn - self._mean)
+
+    def seed(self, logReturns: np.ndarray):
+        """
+        Replace the state by the one obtained after adding all the returns,
+        computed in a single vectorized pass over the relevant tail.
+        """
+        logReturns = np.asarray(logReturns, dtype=float)
+        if self.window is not None:
+            logReturns = logReturns[-self.window:]
+            self._returns = deque(logReturns.tolist())
+        self.count = len(logReturns)
+        self._mean = float(np.mean(logReturns)) if self.count else 0.0
+        self._M2 = float(np.sum((logReturns - self._mean) ** 2)) if self.count else 0.0
+
+    @property
+    def value(self) -> float:
+        """Annualized volatility, nan until there are two returns"""
+        if self.count < 2:
+            return np.nan
+        return math.sqrt(max(self._M2, 0.0) / self.count * DAYS_IN_YEAR)
+
+
+class EwmaVolatility:
+    """
+    Exponentially weighted volatility: variance <- decay * variance + (1 - decay) * r^2
+    with the variance started at the first squared return (zero-mean RiskMetrics convention).
+    """
+
+    def __init__(self, decay: float = 0.94):
+        """
+        :param decay: the RiskMetrics lambda, strictly between 0 and 1
+        """
+        if not 0 < decay < 1:
+            raise ValueError("The EWMA decay must lie strictly between 0 and 1")
+        self.decay = decay
+        self.count = 0
+        self._variance = 0.0
+
+    def add(self, logReturn: float):
+        """Include one more log return"""
+        square = logReturn * logReturn
+        self._variance = square if self.count == 0 else self.decay * self._variance + (1 - self.decay) * square
+        self.count += 1
+
+    def seed(self, logReturns: np.ndarray):
+        """
+        Replace the state by the one obtained after adding all the returns.
+        The recursion unrolls into a weighted sum which is evaluated with NumPy.
+        """
+        squares = np.asarray(logReturns, dtype=float) ** 2
+        self.count = len(squares)
+        if not self.count:
+            self._variance = 0.0
+            return
+        # Weights decay^(n-1-i) * (1 - decay) except for the first return whose weight is decay^(n-1)
+        powers = self.decay ** np.arange(self.count - 1, -1, -1, dtype=float)
+        weights = (1 - self.decay) * powers
+        weights[0] = powers[0]
+        self._variance = float(np.dot(weights, squares))
+
+    @property
+    def value(self) -> float:
+        """Annualized volatility, nan before the first return"""
+        if self.count == 0:
+            return np.nan
+        return math.sqrt(self._variance * DAYS_IN_YEAR)
+
+
+class VolatilityEngine:
+    """
+    Incremental volatility for several tickers at once.
+    Every ticker gets one RollingVolatility per window (None meaning the full
+    history) and one EwmaVolatility per decay, all updated from the same prints.
+    """
+
+    def __init__(self, windows: Iterable[Optional[int]] = (None, 20, 60, 120), decays: Iterable[float] = (0.94,)):
+        """
+        :param windows: rolling windows, in returns, kept for every ticker
+        :param decays: EWMA decays kept for every ticker
+        """
+        self.windows = tuple(windows)
+        self.decays = tuple(decays)
+        self._estimators: Dict[str, dict] = {}
+        self._lastPrice: Dict[str, float] = {}
+        self._gaps = set() # Tickers whose latest print was NaN
+
+    def _estimatorsFor(self, ticker: str) -> dict:
+        """The estimators for a ticker, created on first use"""
+        if ticker not in self._estimators:
+            estimators = {("window", window): RollingVolatility(window) for window in self.windows}
+            estimators.update({("ewma", decay): EwmaVolatility(decay) for decay in self.decays})
+            self._estimators[ticker] = estimators
+        return self._estimators[ticker]
+
+    def seed(self, df: "pd.DataFrame", ticker: str):
+        """
+        Initialise a ticker from its price history, vectorized.
+        Returns next to a NaN price are dropped, as in historicalVol.
+        :param df: dataframe with a column for the ticker, sorted by date
+        :param ticker: ticker string
+        """
+        if ticker not in df.columns:
+            raise ValueError("The data source does not correspond to your ticker")
+        prices = df[ticker].to_numpy(dtype=float)
+        valid = ~np.isnan(prices)
+        if np.any(prices[valid] <= 0):
+            raise ValueError("Prices must be positive")
+        logReturns = np.diff(np.log(prices))
+        logReturns = logReturns[~np.isnan(logReturns)]
+        for estimator in self._estimatorsFor(ticker).values():
+            estimator.seed(logReturns)
+        if valid.any():
+            self._lastPrice[ticker] = float(prices[valid][-1])
+        if len(prices) and not valid[-1]:
+            self._gaps.add(ticker)
+        else:
+            self._gaps.discard(ticker)
+
+    def update(self, ticker: str, price: float):
+        """
+        Feed one new price print to every estimator of the ticker in O(1).
+        A NaN print adds no return, and neither does the print after it.
+        """
+        if math.isnan(price):
+            self._gaps.add(ticker)
+            return
+        if price <= 0:
+            raise ValueError("Prices must be positive")
+        estimators = self._estimatorsFor(ticker)
+        last = None if ticker in self._gaps else self._lastPrice.get(ticker)
+        self._gaps.discard(ticker)
+        self._lastPrice[ticker] = price
+        if last is None:
+            return
+        logReturn = math.log(price / last)
+        for estimator in estimators.values():
+            estimator.add(logReturn)
+
+    def vol(self, ticker: str, window: Optional[int] = None, decay: Optional[float] = None) -> float:
+        """
+        Current annualized volatility of a ticker.
+        :param window: rolling window (None for the full history)
+        :param decay: EWMA decay; when given it takes precedence over window
+        """
+        if ticker not in self._estimators:
+            raise ValueError("No prices have been received for this ticker")
+        key = ("ewma", decay) if decay is not None else ("window", window)
+        estimators = self._estimators[ticker]
+        if key not in estimators:
+            raise ValueError("This volatility estimator is not maintained by the engine")
+        return estimators[key].value
+
+    def lastPrice(self, ticker: str) -> float:
+        """Most recent price print of a ticker"""
+        if ticker not in self._lastPrice:
+            raise ValueError("No prices have been received for this ticker")
+        return self._lastPrice[ticker]
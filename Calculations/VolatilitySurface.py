@@ -0,0 +1,138 @@
+"""
+Implied volatility surface across strikes and expiries.
+historicalVol gives one sigma per ticker.  A VolatilitySurface instead fits
+a smile to the quoted implied vols of each expiry, using the raw SVI
+parameterization of total implied variance w = sigma^2 T as a function of
+log-moneyness k = log(K / F):
+    w(k) = a + b * (rho * (k - m) + sqrt((k - m)^2 + s^2))
+The five parameters of every expiry are stored as one row of a float array,
+with the expiries, forwards and parameters sorted by expiry, so a query for
+a whole chain is a searchsorted on the expiries and arithmetic on arrays.
+Between expiries the total variance is interpolated linearly in T at fixed
+moneyness; before the first expiry and after the last the vol is held flat.
+Refitting one expiry (see fitExpiry) leaves the others untouched and starts
+from that expiry's previous parameters.
+Quotes given as premiums can be converted with ImpliedVolatility.impliedVol.
+"""
+from typing import Optional
+import numpy as np
+import scipy.optimize as optimize
+
+PARAMETERS = ("a", "b", "rho", "m", "s")
+# Bounds of the SVI parameters during the fit; b and s must be positive and |rho| < 1
+_LOWER = np.array([-np.inf, 0.0, -0.999, -np.inf, 1e-4])
+_UPPER = np.array([np.inf, np.inf, 0.999, np.inf, np.inf])
+
+
+def sviTotalVariance(parameters: np.ndarray, logMoneyness) -> np.ndarray:
+    """
+    Raw SVI total variance.
+    :param parameters: array whose last axis is (a, b, rho, m, s)
+    :param logMoneyness: log(K / F), broadcast against the other axes of parameters
+    """
+    a, b, rho, m, s = np.moveaxis(np.asarray(parameters, dtype=float), -1, 0)
+    shifted = np.asarray(logMoneyness, dtype=float) - m
+    return a + b * (rho * shifted + np.sqrt(shifted * shifted + s * s))
+
+
+class VolatilitySurface:
+    """
+    SVI smiles for a set of expiries of one underlying.
+    """
+
+    def __init__(self):
+        self.expiries = np.zeros(0) # Times to expiry in years, increasing
+        self.forwards = np.zeros(0)
+        self.parameters = np.zeros((0, len(PARAMETERS)))
+        self.fitErrors = np.zeros(0) # Root mean square vol error of each fit
+
+    def fitExpiry(self, time: float, forward: float, strikes, vols, weights=None) -> np.ndarray:
+        """
+        Fit, or refit, the smile of one expiry to quoted implied vols.
+        :param time: time to expiry in years
+        :param forward: forward price for the expiry
+        :param strikes: quoted strikes, at least five
+        :param vols: implied vols quoted at the strikes
+        :param weights: optional weight of each quote
+        :return: the fitted parameters (a, b, rho, m, s)
+        """
+        strikes, vols = np.asarray(strikes, dtype=float), np.asarray(vols, dtype=float)
+        if time <= 0 or forward <= 0:
+            raise ValueError("Can not fit -- time and forward must be positive")
+        if strikes.shape != vols.shape or len(strikes) < len(PARAMETERS):
+            raise ValueError("At least five quotes are needed to fit a smile")
+        if np.any(strikes <= 0) or np.any(~(vols > 0)):
+            raise ValueError("Strikes and vols must be positive")
+        weights = np.ones_like(vols) if weights is None else np.sqrt(np.asarray(weights, dtype=float))
+        k = np.log(strikes / forward)
+        variance = vols * vols * time
+
+        position = np.searchsorted(self.expiries, time)
+        refit = position < len(self.expiries) and self.expiries[position] == time
+        if refit:
+            guess = self.parameters[position] # Warm start from the previous fit
+        else:
+            guess = np.array([variance.min(), 0.1 * time, 0.0, k[np.argmin(variance)], 0.1])
+        guess = np.clip(guess, _LOWER + 1e-9, _UPPER - 1e-9)
+        fit = optimize.least_squares(lambda p: weights * (sviTotalVariance(p, k) - variance), guess,
+                                     bounds=(_LOWER, _UPPER), x_scale="jac")
+        parameters = fit.x
+        fitted = sviTotalVariance(parameters, k)
+        if np.any(fitted <= 0):
+            raise ValueError("Can not fit -- the fitted smile has negative variance")
+        error = np.sqrt(np.mean((np.sqrt(fitted / time) - vols) ** 2))
+
+        if refit:
+            self.forwards[position], self.parameters[position], self.fitErrors[position] = forward, parameters, error
+        else:
+            self.expiries = np.insert(self.expiries, position, time)
+            self.forwards = np.insert(self.forwards, position, forward)
+            self.parameters = np.insert(self.parameters, position, parameters, axis=0)
+            self.fitErrors = np.insert(self.fitErrors, position, error)
+        return parameters
+
+    def removeExpiry(self, time: float):
+        """Forget the smile of an expiry"""
+        position = np.searchsorted(self.expiries, time)
+        if position == len(self.expiries) or self.expiries[position] != time:
+            raise ValueError("The surface has no smile for this expiry")
+        self.expiries = np.delete(self.expiries, position)
+        self.forwards = np.delete(self.forwards, position)
+        self.parameters = np.delete(self.parameters, position, axis=0)
+        self.fitErrors = np.delete(self.fitErrors, position)
+
+    def forward(self, time) -> np.ndarray:
+        """Forward at any expiry, interpolated linearly in log-price and flat beyond the fitted expiries"""
+        return np.exp(np.interp(time, self.expiries, np.log(self.forwards)))
+
+    def sigma(self, strike, time, forward: Optional[float] = None) -> np.ndarray:
+        """
+        Implied vol at any strikes and expiries.
+        :param strike: strikes, scalar or array
+        :param time: times to expiry in years, broadcast against strike
+        :param forward: forward used for moneyness; by default the forward of
+        the fitted expiries, interpolated
+        :return: numpy array with the broadcast shape of strike and time
+        """
+        if len(self.expiries) == 0:
+            raise ValueError("The surface has no fitted expiries")
+        strike, time = np.broadcast_arrays(np.asarray(strike, dtype=float), np.asarray(time, dtype=float))
+        if np.any(time <= 0):
+            raise ValueError("Error -- time to expiry must be positive")
+        forward = self.forward(time) if forward is None else forward
+        k = np.log(strike / forward)
+
+        # Bracketing expiries, with flat vol outside the fitted range
+        clipped = np.clip(time, self.expiries[0], self.expiries[-1])
+        upper = np.clip(np.searchsorted(self.expiries, clipped), 1, max(len(self.expiries) - 1, 1))
+        lower = upper - 1
+        if len(self.expiries) == 1:
+            lower = upper = np.zeros_like(upper)
+        lowerTime, upperTime = self.expiries[lower], self.expiries[upper]
+        wLower = sviTotalVariance(self.parameters[lower], k)
+        wUpper = sviTotalVariance(self.parameters[upper], k)
+        span = upperTime - lowerTime
+        weight = np.divide(clipped - lowerTime, span, out=np.zeros_like(clipped), where=span > 0)
+        variance = wLower + weight * (wUpper - wLower)
+        # Total variance at the clipped time, converted to a vol
+        return np.sqrt(variance / clipped)
@@ -1,12 +1,21 @@
 # A file to do date computations.  Perhaps not needed at this stage but likely to become
 # necessary as the task grows in scope.
-import numpy as np
 import datetime
+from Calendar.YearFraction import defaultYearFraction
 
 
-def timeBetween(date_1: datetime.date, date_2: datetime.date) -> float:
-    """Computing the time in years that lies between two dates"""
-    DAYS_IN_YEAR = 260 # Number of business days in a year.
-    # In a more mature application this variable would be made
-    # globally accessible.
-    return np.busday_count(date_1, date_2)/DAYS_IN_YEAR
\ No newline at end of file
+def timeBetween(date_1: datetime.date, date_2: datetime.date, convention: str = "BUS/260") -> float:
+    """
+    Computing the time in years that lies between two dates.
+    The default BUS/260 convention counts business days with 260 of them in a year.
+    Other conventions are listed in Calendar.YearFraction.DAY_COUNTS.
+    The count is a lookup in a precomputed index; dates outside its
+    range fall back to np.busday_count with the holidays of the convention.
+    """
+    index = defaultYearFraction(convention)
+    try:
+        return float(index.yearFraction(date_1, date_2))
+    except ValueError:
+        if not index.businessDays:
+            raise
+        return index.busdayCount(date_1, date_2) / index.daysInYear
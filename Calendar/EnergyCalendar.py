@@ -7,10 +7,14 @@ No error handling is done because such error handling
 is regarded as the responsibility of the web interface.
 """
 import datetime
+import logging
 from typing import Tuple
 import arrow
 import pandas
 import numpy as np
+from Instrumentation import timed
+
+logger = logging.getLogger(__name__)
 
 
 class EnergyCalendar:
@@ -68,6 +72,7 @@ class EnergyCalendar:
         firstDay = monthsForward.replace(day=1)
         return firstDay - datetime.timedelta(days=1)
 
+    @timed("energyCalendar.lastBusinessDayOfMonth")
     def lastBusinessDayOfMonth(self, offset) -> datetime.date:
         """
         The last business day (non-weekend) of the month after moving the
@@ -87,7 +92,7 @@ class EnergyCalendar:
         bday = pandas.tseries.offsets.BDay()
         is_business_day = bday.is_on_offset(lastDatetime)
         while not is_business_day:
-            lastDay = lastDay - datetime.timedelta(days=1)
+            lastDatetime = lastDatetime - datetime.timedelta(days=1)
             is_business_day = bday.is_on_offset(lastDatetime)
         return lastDatetime.date()
 
@@ -110,7 +115,7 @@ class EnergyCalendar:
             return self.lastBusinessDayOfMonth(-1)
         if ticker == "BRN":
             return self.lastBusinessDayOfMonth(-2)
-        print("This ticker is not yet implemented -- Brent default is assumed")
+        logger.warning("This ticker is not yet implemented -- Brent default is assumed")
         return self.lastBusinessDayOfMonth(-2)
 
 
@@ -0,0 +1,127 @@
+"""
+Precomputed business-day and option-expiry calendar.
+EnergyCalendar works out one date at a time with arrow and pandas offsets and
+has no notion of holidays.  ExpiryCalendar instead builds, once, for a range
+of years and a set of holidays:
+  - the sorted array of business days, and
+  - the last business day of every month in the range,
+so that expiry lookups are array indexing and many delivery months can be
+handled in one vectorized call.
+As in the assignment, BRN options expire on the last business day of the
+second month before delivery and HH options on the last business day of the
+month before delivery.
+"""
+import datetime
+import functools
+from typing import Iterable, Optional
+import numpy as np
+
+# Number of months between the option expiry month and the delivery month
+EXPIRY_MONTHS_BACK = {"BRN": 2, "HH": 1}
+
+
+def exchangeHolidays(startYear: int, endYear: int) -> np.ndarray:
+    """
+    Exchange holidays between two years inclusive: US federal holidays without
+    Columbus and Veterans Day, plus Good Friday, as on US exchanges.
+    The holiday rules come from pandas, which is only imported here.
+    :return: sorted datetime64[D] array
+    """
+    from pandas.tseries.holiday import AbstractHolidayCalendar, GoodFriday, USFederalHolidayCalendar
+
+    class ExchangeHolidayCalendar(AbstractHolidayCalendar):
+        rules = [rule for rule in USFederalHolidayCalendar.rules
+                 if rule.name not in ("Columbus Day", "Veterans Day")] + [GoodFriday]
+
+    holidays = ExchangeHolidayCalendar().holidays(datetime.date(startYear, 1, 1), datetime.date(endYear, 12, 31))
+    return holidays.to_numpy().astype("datetime64[D]")
+
+
+class ExpiryCalendar:
+    """
+    Business days and month-end expiries precomputed for a range of years.
+    Dates outside the range raise a ValueError rather than being extrapolated.
+    """
+
+    def __init__(self, startYear: int, endYear: int, holidays: Optional[Iterable] = None):
+        """
+        :param startYear: first year covered
+        :param endYear: last year covered
+        :param holidays: dates which are not business days even though they
+        are weekdays.  By default no holidays are used, as in EnergyCalendar.
+        """
+        if endYear < startYear:
+            raise ValueError("The calendar must cover at least one year")
+        self.startYear = startYear
+        self.endYear = endYear
+        holidays = np.array([] if holidays is None else list(holidays), dtype="datetime64[D]")
+        self.busdaycalendar = np.busdaycalendar(holidays=holidays)
+        self.holidays = self.busdaycalendar.holidays
+
+        first = np.datetime64(f"{startYear}-01-01", "D")
+        end = np.datetime64(f"{endYear + 1}-01-01", "D")
+        days = np.arange(first, end)
+        self.businessDays = days[np.is_busday(days, busdaycal=self.busdaycalendar)]
+
+        # Month m (counted from January of startYear) ends the day before month m + 1 begins
+        self._firstMonth = np.datetime64(f"{startYear}-01", "M")
+        months = np.arange(self._firstMonth, np.datetime64(f"{endYear + 1}-01", "M"))
+        lastDays = (months + 1).astype("datetime64[D]") - 1
+        self.monthEnds = np.busday_offset(lastDays, 0, roll="backward", busdaycal=self.busdaycalendar)
+
+    def _monthIndex(self, months: np.ndarray) -> np.ndarray:
+        """Positions of datetime64[M] months in monthEnds, checked against the range"""
+        index = (months - self._firstMonth).astype(np.int64)
+        if np.any((index < 0) | (index >= len(self.monthEnds))):
+            raise ValueError("Date outside the range of the expiry calendar")
+        return index
+
+    def lastBusinessDayOfMonth(self, year: int, month: int) -> datetime.date:
+        """
+        The last business day of a month, by direct indexing.
+        :param year: calendar year
+        :param month: month number from 1 to 12
+        """
+        index = self._monthIndex(np.datetime64(f"{year}-{month:02d}", "M"))
+        return self.monthEnds[index].astype(datetime.date)
+
+    def isBusinessDay(self, date: datetime.date) -> bool:
+        """Binary search in the business day array, for a date within the range"""
+        day = np.datetime64(date, "D")
+        self._monthIndex(day.astype("datetime64[M]"))
+        position = np.searchsorted(self.businessDays, day)
+        return bool(position < len(self.businessDays) and self.businessDays[position] == day)
+
+    def expiry(self, ticker: str, deliveryYear: int, deliveryMonth: int) -> datetime.date:
+        """
+        Option expiry for one delivery month.
+        :param ticker: HH or BRN
+        :param deliveryYear: year of the delivery month
+        :param deliveryMonth: delivery month number from 1 to 12
+        """
+        delivery = np.datetime64(f"{deliveryYear}-{deliveryMonth:02d}", "M")
+        return self.expiries(ticker, delivery).astype(datetime.date)
+
+    def expiries(self, ticker: str, deliveryMonths) -> np.ndarray:
+        """
+        Option expiries for many delivery months at once.
+        :param ticker: HH or BRN
+        :param deliveryMonths: array-like of delivery months, converted to datetime64[M]
+        (for example "2024-01" strings or dates)
+        :return: datetime64[D] array of expiry dates with the shape of deliveryMonths
+        """
+        if ticker not in EXPIRY_MONTHS_BACK:
+            raise ValueError("Currently there is no pricing available for this ticker")
+        months = np.asarray(deliveryMonths, dtype="datetime64[M]")
+        return self.monthEnds[self._monthIndex(months - EXPIRY_MONTHS_BACK[ticker])]
+
+
+@functools.lru_cache(maxsize=None)
+def defaultCalendar(yearsBack: int = 10, yearsForward: int = 30) -> ExpiryCalendar:
+    """
+    Calendar with exchange holidays around the current year, built on first use
+    and shared afterwards so that pricing requests do not rebuild it.
+    """
+    thisYear = datetime.date.today().year
+    startYear, endYear = thisYear - yearsBack, thisYear + yearsForward
+    return ExpiryCalendar(startYear, endYear, exchangeHolidays(startYear, endYear))
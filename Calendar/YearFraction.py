@@ -0,0 +1,113 @@
+"""
+Year fractions between dates under several day-count conventions.
+For business-day conventions a cumulative count of business days is built
+once per calendar day in a range of years, so that the number of business
+days between any two dates is a single subtraction of two array entries,
+vectorized over arrays of date pairs.  The conventions are:
+    BUS/260   business days / 260 with no holidays, as used historically by timeBetween
+    BUS/252   business days / 252 with exchange holidays
+    ACT/365   calendar days / 365
+Other conventions can be added to DAY_COUNTS.
+"""
+import datetime
+import functools
+from typing import Iterable, Optional
+import numpy as np
+from Calendar.ExpiryCalendar import exchangeHolidays
+
+# Convention -> (days in year, counts business days, uses exchange holidays by default)
+DAY_COUNTS = {
+    "BUS/260": (260, True, False),
+    "BUS/252": (252, True, True),
+    "ACT/365": (365, False, False),
+}
+
+
+class YearFractionIndex:
+    """
+    Cumulative day-count index for one convention over a range of years.
+    Dates outside the range raise a ValueError.
+    """
+
+    def __init__(self, convention: str = "BUS/260", startYear: int = 1990, endYear: int = 2080,
+                 holidays: Optional[Iterable] = None):
+        """
+        :param convention: a key of DAY_COUNTS
+        :param startYear: first year covered
+        :param endYear: last year covered
+        :param holidays: holidays for business-day conventions; by default
+        exchange holidays when the convention uses them and none otherwise
+        """
+        if convention not in DAY_COUNTS:
+            raise ValueError("Unknown day count convention " + convention)
+        self.convention = convention
+        self.daysInYear, self.businessDays, usesHolidays = DAY_COUNTS[convention]
+        self.first = np.datetime64(f"{startYear}-01-01", "D")
+        self.end = np.datetime64(f"{endYear + 1}-01-01", "D") # One past the last day covered
+        self._firstOrdinal = datetime.date(startYear, 1, 1).toordinal()
+        self._length = int((self.end - self.first).astype(np.int64))
+
+        # Exchange holidays are generated for the years of any dates outside the range
+        self._exchangeHolidays = self.businessDays and holidays is None and usesHolidays
+        if self.businessDays:
+            if holidays is None:
+                holidays = exchangeHolidays(startYear, endYear) if usesHolidays else []
+            self.holidays = np.array(list(holidays), dtype="datetime64[D]")
+            calendar = np.busdaycalendar(holidays=self.holidays)
+            days = np.arange(self.first, self.end)
+            # cumulative[i] is the number of business days in [first, first + i)
+            self.cumulative = np.zeros(len(days) + 1, dtype=np.int64)
+            np.cumsum(np.is_busday(days, busdaycal=calendar), out=self.cumulative[1:])
+
+    def _offsets(self, dates) -> np.ndarray:
+        """Days since the start of the index, checked against the range"""
+        if isinstance(dates, datetime.date):
+            # Plain integer arithmetic for single dates, the per-pricing case
+            offset = dates.toordinal() - self._firstOrdinal
+            if not 0 <= offset <= self._length:
+                raise ValueError("Date outside the range of the year fraction index")
+            return offset
+        days = np.asarray(dates, dtype="datetime64[D]")
+        if np.any((days < self.first) | (days > self.end)):
+            raise ValueError("Date outside the range of the year fraction index")
+        return (days - self.first).astype(np.int64)
+
+    def dayCount(self, date_1, date_2) -> np.ndarray:
+        """
+        Days from date_1 to date_2 under the convention, negative if date_2 comes first.
+        Business days are counted from the earlier date included to the later date
+        excluded, so that a backward count is minus the forward count
+        (np.busday_count before numpy 2.0 counts the same way).
+        """
+        offset_1, offset_2 = self._offsets(date_1), self._offsets(date_2)
+        if self.businessDays:
+            return self.cumulative[offset_2] - self.cumulative[offset_1]
+        return offset_2 - offset_1
+
+    def busdayCount(self, date_1: datetime.date, date_2: datetime.date) -> int:
+        """
+        Business days between two single dates by np.busday_count, for dates
+        outside the range of the index, with the same holidays and the same
+        backward convention as the index.
+        """
+        holidays = self.holidays
+        if self._exchangeHolidays:
+            years = sorted(int(np.datetime64(date, "Y").astype(np.int64)) + 1970 for date in (date_1, date_2))
+            holidays = exchangeHolidays(years[0], years[1])
+        # np.busday_count counts backward spans differently from numpy 2.0 onwards
+        if date_2 < date_1:
+            return -int(np.busday_count(date_2, date_1, holidays=holidays))
+        return int(np.busday_count(date_1, date_2, holidays=holidays))
+
+    def yearFraction(self, date_1, date_2):
+        """
+        Time in years from date_1 to date_2.
+        Accepts single dates or arrays of dates and broadcasts them.
+        """
+        return self.dayCount(date_1, date_2) / self.daysInYear
+
+
+@functools.lru_cache(maxsize=None)
+def defaultYearFraction(convention: str = "BUS/260") -> YearFractionIndex:
+    """Index for a convention, built on first use and shared afterwards"""
+    return YearFractionIndex(convention)
@@ -0,0 +1,149 @@
+"""
+Compact columnar storage for the energy futures price history.
+Every consumer of CombinedEnergyFutures.csv parses the text again.  This
+format stores the same data as raw binary columns in a directory:
+    header.json     small header: format version, tickers and the number of rows
+    DATE.bin        int64 dates as days since 1970-01-01 (epoch days)
+    <ticker>.bin    float64 prices, one file per ticker
+The columns are opened with np.memmap, so opening a store is instant and the
+prices are handed to pandas without copying.  Appending a new day appends a
+few bytes to each column and rewrites only the header, whose row count is
+authoritative: bytes past it (for example from an interrupted append) are
+ignored and overwritten by the next append.
+"""
+import datetime
+import json
+import os
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+import numpy as np
+
+if TYPE_CHECKING: # pandas is imported when a frame is built
+    import pandas as pd
+
+FORMAT_VERSION = 1
+HEADER = "header.json"
+DATE_COLUMN = "DATE"
+
+
+class ColumnarStore:
+    """
+    Read and append access to a columnar price directory.
+    Create one with ColumnarStore.write and open it with ColumnarStore(directory).
+    """
+
+    def __init__(self, directory: str):
+        """
+        Open an existing store.  Nothing is read apart from the header.
+        :param directory: directory created by ColumnarStore.write
+        """
+        self.directory = directory
+        with open(os.path.join(directory, HEADER)) as headerFile:
+            header = json.load(headerFile)
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError("Unsupported columnar store version")
+        self.tickers = header["tickers"]
+        self.rows = header["rows"]
+        self._columns = {}
+
+    @classmethod
+    def write(cls, directory: str, df: "pd.DataFrame") -> "ColumnarStore":
+        """
+        Write a dataframe with a DATE column and one float column per ticker.
+        Rows are sorted by date before writing.
+        :param directory: target directory, created if necessary
+        :param df: price history as in CombinedEnergyFutures.csv
+        :return: the store opened for reading
+        """
+        if DATE_COLUMN not in df.columns:
+            raise ValueError("The data has no DATE column")
+        os.makedirs(directory, exist_ok=True)
+        df = df.sort_values(by=DATE_COLUMN, kind="stable")
+        tickers = [column for column in df.columns if column != DATE_COLUMN]
+        _epochDays(df[DATE_COLUMN]).tofile(os.path.join(directory, DATE_COLUMN + ".bin"))
+        for ticker in tickers:
+            df[ticker].to_numpy(dtype=np.float64).tofile(os.path.join(directory, ticker + ".bin"))
+        _writeHeader(directory, tickers, len(df))
+        return cls(directory)
+
+    def _column(self, name: str, dtype) -> np.ndarray:
+        """Memory-mapped column, opened once and reused"""
+        if name not in self._columns:
+            if self.rows == 0:
+                self._columns[name] = np.empty(0, dtype=dtype)
+            else:
+                path = os.path.join(self.directory, name + ".bin")
+                self._columns[name] = np.memmap(path, dtype=dtype, mode="r", shape=(self.rows,))
+        return self._columns[name]
+
+    def epochDays(self) -> np.ndarray:
+        """Dates as int64 days since 1970-01-01, memory-mapped"""
+        return self._column(DATE_COLUMN, np.int64)
+
+    def dates(self) -> np.ndarray:
+        """Dates as a datetime64[D] view of the epoch days (no copy)"""
+        return self.epochDays().view("datetime64[D]")
+
+    def prices(self, ticker: str) -> np.ndarray:
+        """Prices of one ticker, memory-mapped"""
+        if ticker not in self.tickers:
+            raise ValueError("The data source does not correspond to your ticker")
+        return self._column(ticker, np.float64)
+
+    def frame(self, tickers: Optional[Iterable[str]] = None, start: Optional[datetime.date] = None,
+              end: Optional[datetime.date] = None) -> "pd.DataFrame":
+        """
+        Dataframe laid out like CombinedEnergyFutures.csv between start and end inclusive.
+        The price columns share memory with the mapped files; only the DATE
+        column is converted to the resolution pandas requires.
+        :param tickers: tickers to include, all of them by default
+        :param start: earliest date required
+        :param end: latest date required
+        """
+        import pandas as pd
+        tickers = self.tickers if tickers is None else list(tickers)
+        dates = self.dates()
+        first = 0 if start is None else np.searchsorted(dates, np.datetime64(start, "D"), side="left")
+        last = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, "D"), side="right")
+        columns = {DATE_COLUMN: dates[first:last]}
+        columns.update({ticker: self.prices(ticker)[first:last] for ticker in tickers})
+        return pd.DataFrame(columns, copy=False)
+
+    def append(self, date: datetime.date, prices: Dict[str, float]):
+        """
+        Add one day of prices without rewriting existing data.
+        :param date: must be later than the last stored date
+        :param prices: price per ticker; every stored ticker is required
+        """
+        missing = [ticker for ticker in self.tickers if ticker not in prices]
+        if missing:
+            raise ValueError("Missing prices for: " + ", ".join(missing))
+        day = np.datetime64(date, "D").astype(np.int64)
+        if self.rows and day <= self.epochDays()[-1]:
+            raise ValueError("Appended dates must be later than the stored history")
+
+        self._columns.clear() # The mappings are reopened with the new length
+        self._appendValue(DATE_COLUMN, np.array([day], dtype=np.int64))
+        for ticker in self.tickers:
+            self._appendValue(ticker, np.array([prices[ticker]], dtype=np.float64))
+        self.rows += 1
+        _writeHeader(self.directory, self.tickers, self.rows)
+
+    def _appendValue(self, name: str, value: np.ndarray):
+        """Write one value just after the last committed row of a column"""
+        with open(os.path.join(self.directory, name + ".bin"), "r+b") as column:
+            column.truncate(self.rows * value.itemsize)
+            column.seek(0, os.SEEK_END)
+            column.write(value.tobytes())
+
+
+def _epochDays(dates: "pd.Series") -> np.ndarray:
+    """Parse dates (ISO strings such as 2023-02-07, or datetimes) into int64 epoch days"""
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+
+
+def _writeHeader(directory: str, tickers, rows: int):
+    """Replace the header atomically so readers never see a partial one"""
+    temporary = os.path.join(directory, HEADER + ".tmp")
+    with open(temporary, "w") as headerFile:
+        json.dump({"version": FORMAT_VERSION, "tickers": list(tickers), "rows": rows}, headerFile)
+    os.replace(temporary, os.path.join(directory, HEADER))
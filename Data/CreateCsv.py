@@ -11,8 +11,12 @@ Feb 6, 2018 to Feb 6, 2023
 The Henry Hub data acts, using the same dates and prices, as a proxy for HH futures (HH) dated
 MAR 24.  The Brent data acts as a proxy for BRENT futures (BRN) dated JAN 24.
 Accordingly those columns are renamed.
+The same data is also written in the columnar binary format of ColumnarStore.py
+so that it can be memory-mapped instead of parsed.
 """
+import os
 import pandas as pd
+from ColumnarStore import ColumnarStore
 """
 In this small-scale project, the csv files
 are stored in the same directory as the 
@@ -36,4 +40,4 @@ combined["HH"] = combined["HH"].astype(float)
 combined = combined[combined["BRN"] > 0]
 combined = combined[combined["HH"] > 0]
 combined.to_csv("..\\CombinedEnergyFutures.csv", index=False)
-
+ColumnarStore.write(os.path.join("..", "EnergyFutures.columnar"), combined)
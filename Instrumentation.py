@@ -0,0 +1,211 @@
+"""
+Timers, counters and sampled profiles for the pricing pipeline.
+Code marks its stages with
+    with metrics.timer("pv.vol"):
+        ...
+or decorates whole functions with @timed("historicalVol"), and counts events
+with metrics.increment("flask.requests").  Timers record the number of calls,
+total and largest duration of each stage; a timer also counts the calls which
+raised, as "<name>.errors".
+Instrumentation is off unless enabled (metrics.enable(), or the environment
+variable OPTION_PRICING_METRICS=1).  While it is off a timer is a shared
+do-nothing context manager and a decorated function costs one attribute
+check, so the hot paths can stay instrumented.
+The collected values are exported as a dictionary (snapshot), or as text in
+the Prometheus exposition format (prometheus), which the Flask app serves.
+A Profiler captures cProfile statistics for a random sample of calls and
+keeps the most recent ones as text.
+"""
+import collections
+import cProfile
+import functools
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from typing import Callable, Optional
+
+PREFIX = "option_pricing"
+
+
+class _NullTimer:
+    """Context manager that does nothing, used while instrumentation is off"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    """Context manager timing one call of a stage"""
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.start, failed=excType is not None)
+        return False
+
+
+class Metrics:
+    """
+    Registry of timers and counters.
+    A single instance is shared by the pricer and the Flask app (see metrics
+    below), so all updates go through a lock.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._timers = {} # name -> [calls, total seconds, largest seconds]
+        self._counters = collections.Counter()
+
+    def enable(self, enabled: bool = True):
+        """Switch collection on or off; values already collected are kept"""
+        self.enabled = enabled
+
+    def timer(self, name: str):
+        """Context manager timing a stage, or a shared no-op while disabled"""
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def record(self, name: str, seconds: float, failed: bool = False):
+        """Add one timed call of a stage"""
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                timer = self._timers[name] = [0, 0.0, 0.0]
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+            if failed:
+                self._counters[name + ".errors"] += 1
+
+    def increment(self, name: str, amount: float = 1):
+        """Add to a counter, if enabled"""
+        if self.enabled:
+            with self._lock:
+                self._counters[name] += amount
+
+    def snapshot(self) -> dict:
+        """
+        The collected values.
+        :return: dictionary with timers (calls, totalSeconds, meanSeconds and
+        maxSeconds by stage) and counters
+        """
+        with self._lock:
+            timers = {name: {"calls": calls, "totalSeconds": total, "meanSeconds": total / calls,
+                             "maxSeconds": largest}
+                      for name, (calls, total, largest) in sorted(self._timers.items())}
+            return {"enabled": self.enabled, "timers": timers, "counters": dict(sorted(self._counters.items()))}
+
+    def prometheus(self) -> str:
+        """
+        The collected values in the Prometheus text exposition format.
+        Each timer is a summary <prefix>_<stage>_seconds with _count and _sum
+        plus a gauge of its largest duration; dots in names become underscores.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, timer in snapshot["timers"].items():
+            metric = _metricName(name) + "_seconds"
+            lines += [f"# TYPE {metric} summary",
+                      f"{metric}_count {timer['calls']}",
+                      f"{metric}_sum {timer['totalSeconds']!r}",
+                      f"# TYPE {metric}_max gauge",
+                      f"{metric}_max {timer['maxSeconds']!r}"]
+        for name, value in snapshot["counters"].items():
+            metric = _metricName(name) + "_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value!r}"]
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Forget every collected value"""
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+
+
+def _metricName(name: str) -> str:
+    """Prometheus metric name for a stage or counter name"""
+    return PREFIX + "_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+# Shared by the pricer and the Flask app
+metrics = Metrics(enabled=os.environ.get("OPTION_PRICING_METRICS") == "1")
+
+
+def timed(name: str, registry: Optional[Metrics] = None) -> Callable:
+    """Decorator timing every call of a function as the stage name"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            target = metrics if registry is None else registry
+            if not target.enabled:
+                return function(*args, **kwargs)
+            with _Timer(target, name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class Profiler:
+    """
+    cProfile capture for a random sample of calls.
+    Only one call is profiled at a time; calls sampled while another is being
+    profiled run unprofiled.
+    """
+
+    def __init__(self, sampleRate: float = 0.0, keep: int = 10, lines: int = 25):
+        """
+        :param sampleRate: fraction of calls profiled, from 0 (none) to 1 (all)
+        :param keep: number of recent profiles kept
+        :param lines: functions listed in each profile, by cumulative time
+        """
+        if not 0 <= sampleRate <= 1:
+            raise ValueError("The sample rate must lie between 0 and 1")
+        self.sampleRate = sampleRate
+        self.lines = lines
+        self.profiles = collections.deque(maxlen=keep) # (label, seconds, statistics text)
+        self._busy = threading.Lock()
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """A running profile if this call is sampled, otherwise None"""
+        if self.sampleRate <= 0 or random.random() >= self.sampleRate or not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def stop(self, profile: Optional[cProfile.Profile], label: str):
+        """Finish a profile returned by start and keep its statistics"""
+        if profile is None:
+            return
+        try:
+            profile.disable()
+        finally:
+            self._busy.release()
+        text = io.StringIO()
+        statistics = pstats.Stats(profile, stream=text)
+        statistics.sort_stats("cumulative").print_stats(self.lines)
+        self.profiles.append((label, statistics.total_tt, text.getvalue()))
+
+    def profile(self, label: str, function: Callable, *args, **kwargs):
+        """Call function, profiling the call if it is sampled"""
+        profile = self.start()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.stop(profile, label)
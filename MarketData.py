@@ -0,0 +1,147 @@
+"""
+In-process cache for the market data used by the pricer.
+Each csv is parsed once into a dataframe with a datetime DATE column and
+float price columns, sorted by date, and kept in memory.  Later requests are
+served from memory for as long as the file's modification time is unchanged;
+a newer file is picked up automatically on the next access.
+Date-range requests are answered by a binary search on the parsed dates and a
+positional row slice of a (DATE, ticker) frame kept for each ticker, so no
+rows are scanned, compared as strings or copied.
+Hits and misses are counted so that the cache can be monitored.
+"""
+import datetime
+import os
+import threading
+from typing import TYPE_CHECKING, Optional, Tuple
+import numpy as np
+
+if TYPE_CHECKING: # pandas is imported when the first csv is parsed
+    import pandas as pd
+
+file = "CombinedEnergyFutures.csv" # Same directory so full path not needed
+
+
+class MarketDataStore:
+    """
+    Cache of parsed market data keyed by file path.
+    A single instance is shared by the Flask app (see defaultStore below), so
+    all access goes through a lock.
+    """
+
+    def __init__(self):
+        self._frames = {} # path -> (version, dataframe, {ticker: DATE and ticker columns})
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _fileVersion(path: str) -> Tuple[int, int]:
+        """Modification time and size identify the contents of a file"""
+        status = os.stat(path)
+        return status.st_mtime_ns, status.st_size
+
+    @staticmethod
+    def _load(path: str) -> "pd.DataFrame":
+        """Parse a csv once into typed columns sorted by date"""
+        import pandas as pd
+        df = pd.read_csv(path, parse_dates=["DATE"])
+        df.sort_values(by="DATE", inplace=True, kind="stable")
+        df.reset_index(drop=True, inplace=True)
+        return df
+
+    def frame(self, path: str = file) -> "pd.DataFrame":
+        """
+        The full dataframe held in the file, reloaded only if the file changed.
+        The returned dataframe is shared and must not be modified by callers.
+        :param path: csv file with a DATE column and one column per ticker
+        :return: dataframe sorted by date
+        """
+        return self._cached(path)[1]
+
+    def versionedFrame(self, path: str = file) -> Tuple[Tuple[int, int], "pd.DataFrame"]:
+        """
+        The full dataframe together with the version of the file it was read from.
+        Both come from the same cache entry, so results computed from the frame
+        can be stamped with the version without the file changing in between.
+        :param path: csv file with a DATE column and one column per ticker
+        :return: the version, as returned by version, and the shared dataframe
+        """
+        version, df, _ = self._cached(path)
+        return version, df
+
+    def _cached(self, path: str) -> tuple:
+        """
+        The cache entry of a file, reloaded only if the file changed.
+        A file replaced while it is parsed is parsed again, so that the
+        version of an entry is always that of its data.
+        """
+        version = self._fileVersion(path)
+        with self._lock:
+            cached = self._frames.get(path)
+            if cached is not None and cached[0] == version:
+                self.hits += 1
+                return cached
+            self.misses += 1
+            while True:
+                df = self._load(path)
+                loaded, version = version, self._fileVersion(path)
+                if loaded == version:
+                    break
+            cached = (version, df, {})
+            self._frames[path] = cached
+            return cached
+
+    def version(self, path: str = file) -> Tuple[int, int]:
+        """
+        Version stamp of the data currently in the file.
+        It changes whenever new prices are written.
+        """
+        return self._fileVersion(path)
+
+    def slice(self, ticker: str, start: Optional[datetime.date] = None, end: Optional[datetime.date] = None,
+              path: str = file) -> "pd.DataFrame":
+        """
+        Dates and prices of one ticker between start and end inclusive.
+        The DATE and ticker columns are copied once per file version into a
+        frame of their own; requests are then a binary search and a positional
+        row slice of that frame, so the result is a view of the cache and must
+        not be modified by callers.
+        :param ticker: ticker string
+        :param start: earliest date required, or None for the beginning of the data
+        :param end: latest date required, or None for the most recent data
+        :param path: csv file holding the data
+        :return: dataframe with DATE and ticker columns
+        """
+        _, df, tickerFrames = self._cached(path)
+        if ticker not in df.columns:
+            raise ValueError("The data source does not correspond to your ticker")
+        with self._lock:
+            tickerFrame = tickerFrames.get(ticker)
+            if tickerFrame is None:
+                tickerFrame = tickerFrames[ticker] = df[["DATE", ticker]]
+        dates = tickerFrame["DATE"].to_numpy()
+        first = 0 if start is None else np.searchsorted(dates, np.datetime64(start, "ns"), side="left")
+        last = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, "ns"), side="right")
+        return tickerFrame.iloc[first:last]
+
+    def stats(self) -> dict:
+        """Hit and miss counters together with the number of cached files"""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": self.hits / requests if requests else 0.0,
+                "files": len(self._frames),
+            }
+
+    def clear(self):
+        """Forget every cached file and reset the counters"""
+        with self._lock:
+            self._frames.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# The store shared by the upload code and the Flask app
+defaultStore = MarketDataStore()
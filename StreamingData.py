@@ -0,0 +1,309 @@
+"""
+Streaming ingestion of price updates.
+dataFromStartDate works on a snapshot of the csv.  TickPipeline instead
+consumes price lines as they arrive, from a file being appended to (tailCsv)
+or from a socket (socketLines), in the layout of CombinedEnergyFutures.csv:
+a header line "DATE,HH,BRN" followed by one line of prices per date.
+The pipeline runs three asyncio stages joined by bounded queues:
+    ingest   parse lines into ticks              -> tick queue
+    price    append ticks to the in-memory series, update the VolatilityEngine
+             and reprice the subscribed contracts -> quote queue
+    publish  store the latest quote per contract and call the subscribers
+A full queue suspends the stage feeding it, so a slow consumer slows the
+source down instead of letting memory grow (backpressure).  When ticks back
+up, the price stage drains every waiting tick and reprices each ticker once.
+Quotes are published per ticker as arrays, and carry the time from the
+arrival of their tick to their publication.
+Missing prints (empty fields) are passed on as NaN, which the
+VolatilityEngine treats as a gap in the history just as historicalVol treats
+a missing price in the csv.  Prints which cannot be used (unparseable or
+infinite, or a price the VolatilityEngine rejects) are logged, counted and
+skipped.  Only the last `history` prints of each ticker and latencies are
+kept, so that a long-running pipeline uses bounded memory.  If a stage fails nonetheless,
+run cancels the others and raises its exception instead of waiting on a
+queue that nobody drains.
+"""
+import asyncio
+import collections
+import datetime
+import logging
+import math
+import time
+from typing import AsyncIterator, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+from Calculations.OptionsCalculator import batchBlack76
+from Calculations.VolatilityEngine import VolatilityEngine
+from Calendar.CalendarComputations import timeBetween
+from Calendar.ExpiryCalendar import defaultCalendar
+
+logger = logging.getLogger(__name__)
+
+class Tick(NamedTuple):
+    """One price print and the monotonic time (ns) at which it was received"""
+    ticker: str
+    date: str
+    price: float
+    received: int
+
+
+class Quote(NamedTuple):
+    """The latest value of one contract and the latency (ns) from its tick to publication"""
+    contract: int
+    ticker: str
+    pv: float
+    sigma: float
+    price: float
+    latency: int
+
+
+class Quotes(NamedTuple):
+    """Every contract on a ticker repriced from one print, as arrays in subscription order"""
+    ticker: str
+    contracts: np.ndarray
+    pvs: np.ndarray
+    sigma: float
+    price: float
+    received: int
+    latency: int = 0 # Set on publication
+
+
+async def tailCsv(path: str, follow: bool = True, pollInterval: float = 0.05) -> AsyncIterator[str]:
+    """
+    Lines of a csv file, including lines appended after it was opened.
+    :param path: csv file
+    :param follow: keep waiting for new lines at the end of the file; otherwise stop there
+    :param pollInterval: seconds between checks for new lines
+    """
+    with open(path) as source:
+        partial = ""
+        while True:
+            line = source.readline()
+            if line.endswith("\n"):
+                yield partial + line
+                partial = ""
+            elif line:
+                partial += line # The writer has not finished the line yet
+            elif follow:
+                await asyncio.sleep(pollInterval)
+            else:
+                if partial:
+                    yield partial
+                return
+
+
+async def socketLines(host: str, port: int) -> AsyncIterator[str]:
+    """Lines sent over a TCP connection, until the sender closes it"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            yield line.decode()
+    finally:
+        writer.close()
+
+
+class TickPipeline:
+    """
+    Live prices, volatilities and PVs for a set of subscribed contracts.
+    """
+
+    def __init__(self, engine: Optional[VolatilityEngine] = None, queueSize: int = 1000, rate: float = 0.05,
+                 window: Optional[int] = None, decay: Optional[float] = None,
+                 valuationDate: Optional[datetime.date] = None, history: int = 10_000):
+        """
+        :param engine: volatility engine, typically seeded from the price history
+        :param queueSize: capacity of each queue between stages
+        :param rate: interest rate
+        :param window: rolling window of the sigma used for pricing (None for the full history)
+        :param decay: EWMA decay of the sigma used for pricing; overrides window
+        :param valuationDate: date from which times to expiry are measured, today by default
+        :param history: number of recent prints per ticker, and of recent latencies, kept in memory
+        """
+        self.engine = engine if engine is not None else VolatilityEngine()
+        self.queueSize = queueSize
+        self.rate = rate
+        self.window = window
+        self.decay = decay
+        self.valuationDate = valuationDate or datetime.date.today()
+        self.history = history
+        self.latencies: Deque[int] = collections.deque(maxlen=history)
+        self.updates = 0 # Quotes published
+        self.rejected = 0 # Prints skipped as unusable
+        self._contracts: Dict[str, dict] = {} # ticker -> arrays of subscribed contracts
+        self._positions: Dict[int, tuple] = {} # contract -> (ticker, position in the ticker's arrays)
+        self._latest: Dict[str, Quotes] = {}
+        self._callbacks: List[Callable[[Quotes], None]] = []
+        self._series: Dict[str, Deque[tuple]] = {}
+        self._nextContract = 0
+
+    def seed(self, df: pd.DataFrame, tickers: Iterable[str]):
+        """Initialise the volatility engine from price history, sorted by date"""
+        for ticker in tickers:
+            self.engine.seed(df, ticker)
+
+    def subscribe(self, ticker: str, strike: float, isCall: bool, expiryDate: Optional[datetime.date] = None) -> int:
+        """
+        Reprice a contract on every print of its ticker.
+        :param expiryDate: option expiry; by default the expiry of the delivery
+        month six months ahead, as in PV
+        :return: contract number identifying the contract in quotes
+        """
+        if strike <= 0:
+            raise ValueError("Strike must be positive")
+        if expiryDate is None:
+            year, month = divmod(self.valuationDate.year * 12 + self.valuationDate.month - 1 + 6, 12)
+            expiryDate = defaultCalendar().expiry(ticker, year, month + 1)
+        time_ = timeBetween(self.valuationDate, expiryDate)
+        if time_ <= 0:
+            raise ValueError("Error -- time to expiry must be positive")
+        contracts = self._contracts.setdefault(ticker, {"id": [], "strike": [], "isCall": [], "time": []})
+        contract = self._nextContract
+        self._nextContract += 1
+        self._positions[contract] = (ticker, len(contracts["id"]))
+        for name, value in (("id", contract), ("strike", strike), ("isCall", isCall), ("time", time_)):
+            contracts[name].append(value)
+        contracts["arrays"] = None # Rebuilt on the next print
+        return contract
+
+    def onQuotes(self, callback: Callable[[Quotes], None]):
+        """Call callback with every published set of quotes"""
+        self._callbacks.append(callback)
+
+    def quote(self, contract: int) -> Quote:
+        """The latest published value of a contract"""
+        if contract not in self._positions:
+            raise ValueError("Unknown contract")
+        ticker, position = self._positions[contract]
+        if ticker not in self._latest:
+            raise ValueError("The contract has not been priced yet")
+        quotes = self._latest[ticker]
+        return Quote(contract, ticker, float(quotes.pvs[position]), quotes.sigma, quotes.price, quotes.latency)
+
+    def series(self, ticker: str) -> pd.DataFrame:
+        """The last `history` prints of a ticker, with NaN for missing prints"""
+        return pd.DataFrame(self._series.get(ticker, []), columns=["DATE", ticker])
+
+    async def run(self, lines: AsyncIterator[str]):
+        """
+        Process lines until the source is exhausted and every quote is published.
+        :param lines: the header line followed by price lines, e.g. from tailCsv
+        """
+        ticks = asyncio.Queue(self.queueSize)
+        quotes = asyncio.Queue(self.queueSize)
+        stages = [asyncio.create_task(self._ingest(lines, ticks)), asyncio.create_task(self._price(ticks, quotes)),
+                  asyncio.create_task(self._publish(quotes))]
+        try:
+            # A failed stage would leave its neighbours blocked on a full or empty queue
+            done, _ = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+            for stage in done:
+                stage.result()
+        finally:
+            for stage in stages:
+                stage.cancel()
+
+    def _reject(self, tick: str, reason: str):
+        """Skip an unusable print"""
+        self.rejected += 1
+        logger.warning("Skipped print %s: %s", tick, reason)
+
+    async def _ingest(self, lines: AsyncIterator[str], ticks: asyncio.Queue):
+        """Parse lines into ticks, ending with None; waits when the tick queue is full"""
+        columns = None
+        async for line in lines:
+            fields = line.strip().split(",")
+            if not fields[0]:
+                continue
+            if columns is None:
+                columns = fields
+                continue
+            received = time.perf_counter_ns()
+            for ticker, value in zip(columns[1:], fields[1:]):
+                try:
+                    # A missing print is a gap in the history, as in the csv
+                    price = float(value) if value else math.nan
+                except ValueError:
+                    price = math.inf
+                if math.isinf(price):
+                    self._reject(f"{ticker} {fields[0]} {value!r}", "the price is not a number")
+                    continue
+                await ticks.put(Tick(ticker, fields[0], price, received))
+        await ticks.put(None)
+
+    async def _price(self, ticks: asyncio.Queue, quotes: asyncio.Queue):
+        """Update prices and vols from ticks and reprice each affected ticker once per batch"""
+        finished = False
+        while not finished:
+            batch = [await ticks.get()]
+            while not ticks.empty():
+                batch.append(ticks.get_nowait())
+            if batch[-1] is None:
+                finished = True
+                batch.pop()
+            firstTick = {}
+            for tick in batch:
+                try:
+                    self.engine.update(tick.ticker, tick.price)
+                except ValueError as err:
+                    self._reject(f"{tick.ticker} {tick.date} {tick.price!r}", str(err))
+                    continue
+                series = self._series.get(tick.ticker)
+                if series is None:
+                    series = self._series[tick.ticker] = collections.deque(maxlen=self.history)
+                series.append((tick.date, tick.price))
+                if not math.isnan(tick.price): # A gap changes neither the price nor the vol
+                    firstTick.setdefault(tick.ticker, tick)
+            for ticker, tick in firstTick.items():
+                # Latency is measured from the earliest tick behind the quotes
+                repriced = self._reprice(ticker, tick.received)
+                if repriced is not None:
+                    await quotes.put(repriced)
+        await quotes.put(None)
+
+    def _reprice(self, ticker: str, received: int) -> Optional[Quotes]:
+        """Quotes for every contract on a ticker, priced in one vectorized call"""
+        contracts = self._contracts.get(ticker)
+        if not contracts:
+            return None
+        sigma = self.engine.vol(ticker, self.window, self.decay)
+        if np.isnan(sigma):
+            return None # Not enough prints yet
+        if contracts["arrays"] is None:
+            contracts["arrays"] = tuple(np.array(contracts[name]) for name in ("id", "time", "strike", "isCall"))
+        ids, time_, strike, isCall = contracts["arrays"]
+        price = self.engine.lastPrice(ticker)
+        pvs = batchBlack76(sigma, time_, price, strike, isCall, self.rate)
+        return Quotes(ticker, ids, pvs, sigma, price, received)
+
+    async def _publish(self, quotes: asyncio.Queue):
+        """Deliver quotes to the subscribers, recording their latency"""
+        while True:
+            repriced = await quotes.get()
+            if repriced is None:
+                return
+            repriced = repriced._replace(latency=time.perf_counter_ns() - repriced.received)
+            self.latencies.append(repriced.latency)
+            self.updates += 1
+            self._latest[repriced.ticker] = repriced
+            for callback in self._callbacks:
+                callback(repriced)
+
+    def latencyStats(self) -> dict:
+        """
+        Tick to quote latency percentiles in microseconds over the last `history`
+        quotes, with the number of quotes published and of prints skipped
+        """
+        if not self.latencies:
+            return {"updates": self.updates, "rejected": self.rejected}
+        latencies = np.array(self.latencies) / 1000
+        return {
+            "updates": self.updates,
+            "window": len(latencies),
+            "rejected": self.rejected,
+            "mean": float(latencies.mean()),
+            "p50": float(np.percentile(latencies, 50)),
+            "p99": float(np.percentile(latencies, 99)),
+            "max": float(latencies.max()),
+        }
@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+import datetime
+import numpy as np
+import pandas as pd
+from Calculations.BatchRunner import BatchRunner, parseCallFlags
+from Calculations.OptionsCalculator import OptionsCalculator
+from Calculations.VolatilityCalculations import historicalVol
+from Calendar.CalendarComputations import timeBetween
+from Calendar.ExpiryCalendar import defaultCalendar
+
+
+class TestBatchRunner(unittest.TestCase):
+    """
+    Positions priced by the runner are compared with single
+    OptionsCalculator pricings built from the same inputs.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(9)
+        self.marketData = pd.DataFrame({"HH": 3 * np.exp(np.cumsum(rng.normal(0, 0.02, 100))),
+                                        "BRN": 80 * np.exp(np.cumsum(rng.normal(0, 0.01, 100)))})
+        self.valuationDate = datetime.date(2023, 2, 7)
+        self.positions = pd.DataFrame({
+            "ticker": ["HH", "BRN", "HH", "WTI", "BRN", "HH"],
+            "deliveryMonth": ["2023-08", "2024-01", "2023-08", "2023-08", "2023-01", "2023-09"],
+            "strike": [3.0, 85.0, 2.5, 50.0, 80.0, -1.0],
+            "isCall": ["Yes", "no", "Y", "Yes", "Yes", "Yes"],
+            "quantity": [10, -5, 3, 1, 1, 1],
+        })
+        self.runner = BatchRunner(self.marketData, workers=1, valuationDate=self.valuationDate)
+
+    def _expected(self, ticker, month, strike, isCall):
+        """Scalar pricing of one position"""
+        year, monthNumber = map(int, month.split("-"))
+        expiry = defaultCalendar().expiry(ticker, year, monthNumber)
+        T = timeBetween(self.valuationDate, expiry)
+        option = OptionsCalculator(historicalVol(self.marketData, ticker), T,
+                                   self.marketData[ticker].iloc[-1], strike)
+        return option.Black76(isCall)
+
+    def test_priceFrame(self):
+        """Valid positions match scalar pricing; the others carry an error"""
+        priced = self.runner.priceFrame(self.positions)
+        self.assertAlmostEqual(priced["pv"][0], self._expected("HH", "2023-08", 3.0, True))
+        self.assertAlmostEqual(priced["pv"][1], self._expected("BRN", "2024-01", 85.0, False))
+        self.assertAlmostEqual(priced["value"][1], -5 * priced["pv"][1])
+        self.assertEqual(priced["sigma"][0], priced["sigma"][2]) # Shared within the group
+        self.assertTrue(priced["pv"][3:].isna().all())
+        self.assertEqual(priced["error"][3], "Currently there is no pricing available for this ticker")
+        self.assertEqual(priced["error"][4], "Error -- time to expiry can not be negative")
+        self.assertEqual(priced["error"][5], "Strike must be positive")
+
+    def test_missing_keys(self):
+        """Missing tickers and months get their own error rather than another group's inputs"""
+        positions = self.positions.astype(object)
+        positions.loc[0, "ticker"] = None
+        positions.loc[2, "deliveryMonth"] = np.nan
+        priced = self.runner.priceFrame(positions)
+        self.assertEqual(priced["error"][0], "The ticker is missing")
+        self.assertEqual(priced["error"][2], "The delivery month is missing")
+        self.assertTrue(np.isnan(priced["sigma"][0]) and np.isnan(priced["pv"][2]))
+        self.assertAlmostEqual(priced["pv"][1], self._expected("BRN", "2024-01", 85.0, False))
+
+    def test_run_with_pool(self):
+        """A pooled run over several chunks writes the same values, in order, as in-process pricing"""
+        expected = self.runner.priceFrame(self.positions)
+        with tempfile.TemporaryDirectory() as directory:
+            positionFile = os.path.join(directory, "positions.csv")
+            self.positions.to_csv(positionFile, index=False)
+            for workers, chunkSize in ((2, 4), (3, 1), (1, 2)):
+                outputFile = os.path.join(directory, f"valuations{workers}.csv")
+                runner = BatchRunner(self.marketData, workers=workers, chunkSize=chunkSize,
+                                     valuationDate=self.valuationDate)
+                summary = runner.run(positionFile, outputFile)
+                output = pd.read_csv(outputFile, keep_default_na=False, na_values=[""])
+                self.assertEqual(summary["positions"], 6)
+                self.assertEqual(summary["invalid"], 3)
+                self.assertEqual(list(output["ticker"]), list(self.positions["ticker"]))
+                np.testing.assert_allclose(output["pv"], expected["pv"])
+                self.assertEqual(list(output["error"].fillna("")), list(expected["error"]))
+
+    def test_run_empty_file(self):
+        """Files without positions give a header-only output and an empty summary for any number of workers"""
+        expected = list(self.runner.priceFrame(self.positions).columns)
+        with tempfile.TemporaryDirectory() as directory:
+            for contents in ("ticker,deliveryMonth,strike,isCall,quantity\n", ""):
+                positionFile = os.path.join(directory, "positions.csv")
+                with open(positionFile, "w") as positions:
+                    positions.write(contents)
+                for workers in (1, 2):
+                    outputFile = os.path.join(directory, f"valuations{workers}.csv")
+                    runner = BatchRunner(self.marketData, workers=workers, valuationDate=self.valuationDate)
+                    summary = runner.run(positionFile, outputFile)
+                    self.assertEqual({key: summary[key] for key in ("positions", "invalid", "value")},
+                                     {"positions": 0, "invalid": 0, "value": 0.0})
+                    output = pd.read_csv(outputFile)
+                    self.assertEqual(list(output.columns), expected)
+                    self.assertEqual(len(output), 0)
+
+    def test_priceFrame_with_pool(self):
+        """Slices validated and priced in the workers are joined back in order"""
+        runner = BatchRunner(self.marketData, workers=2, sliceSize=4, valuationDate=self.valuationDate)
+        pool = runner.openPool()
+        try:
+            priced = runner.priceFrame(self.positions, pool)
+        finally:
+            pool.close()
+            pool.join()
+        pd.testing.assert_frame_equal(priced, self.runner.priceFrame(self.positions))
+
+    def test_parseCallFlags(self):
+        """Yes/No strings and booleans; anything else is NaN"""
+        flags = parseCallFlags(pd.Series(["Yes", "no", "maybe"]))
+        np.testing.assert_array_equal(flags[:2], [1.0, 0.0])
+        self.assertTrue(np.isnan(flags[2]))
+        np.testing.assert_array_equal(parseCallFlags(pd.Series([True, False])), [1.0, 0.0])
+        # Missing flags are invalid, not puts
+        self.assertTrue(np.isnan(parseCallFlags(pd.Series(["No", None, np.nan, ""]))[1:]).all())
+        # Numbers are not flags, even where they compare equal to a boolean
+        np.testing.assert_array_equal(parseCallFlags(pd.Series([True, 1], dtype=object)), [1.0, np.nan])
+        np.testing.assert_array_equal(parseCallFlags(pd.Series([1.0, True], dtype=object)), [np.nan, 1.0])
+        np.testing.assert_array_equal(parseCallFlags(pd.Series([False, 0, "Yes"], dtype=object)), [0.0, np.nan, 1.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import numpy as np
-from Calculations.OptionsCalculator import OptionsCalculator
+import pandas as pd
+from Calculations.OptionsCalculator import OptionsCalculator, batchBlack76, batchBlack76Frame
 
 
 class TestBlack76(unittest.TestCase):
@@ -93,5 +94,47 @@ class TestBlack76(unittest.TestCase):
         self.assertAlmostEqual(putValue, PolanitzerValue, 4)
 
 
+class TestBatchBlack76(unittest.TestCase):
+    """
+    The batch pricer must reproduce the scalar Black76 path
+    contract by contract, including mixtures of calls and puts.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(76)
+        size = 200
+        self.sigma = rng.uniform(0.05, 1.0, size)
+        self.time = rng.uniform(0.01, 3.0, size)
+        self.price = rng.uniform(1.0, 150.0, size)
+        self.strike = self.price * rng.uniform(0.5, 1.5, size)
+        self.isCall = rng.random(size) < 0.5
+
+    def test_batch_matches_scalar(self):
+        """Every batch PV equals the scalar PV"""
+        batch = batchBlack76(self.sigma, self.time, self.price, self.strike, self.isCall)
+        for i in range(len(batch)):
+            option = OptionsCalculator(self.sigma[i], self.time[i], self.price[i], self.strike[i])
+            self.assertAlmostEqual(batch[i], option.Black76(self.isCall[i]), 10)
+
+    def test_broadcasting(self):
+        """A strike ladder priced against one future and one vol"""
+        strikes = np.array([30.0, 42.0, 50.0])
+        batch = batchBlack76(0.2, 1.5, 42.0, strikes, True)
+        self.assertEqual(batch.shape, strikes.shape)
+        self.assertAlmostEqual(batch[1], 3.7982, 4) # Polanitzer's example
+
+    def test_frame(self):
+        """The DataFrame wrapper gives the same values as the array call"""
+        contracts = pd.DataFrame({"sigma": self.sigma, "time": self.time, "price": self.price,
+                                  "strike": self.strike, "isCall": self.isCall})
+        expected = batchBlack76(self.sigma, self.time, self.price, self.strike, self.isCall)
+        np.testing.assert_allclose(batchBlack76Frame(contracts), expected)
+
+    def test_frame_missing_column(self):
+        """A missing column is reported as a ValueError"""
+        contracts = pd.DataFrame({"sigma": self.sigma, "time": self.time})
+        with self.assertRaises(ValueError):
+            batchBlack76Frame(contracts)
+
+
 if __name__ == '__main__':
     unittest.main()
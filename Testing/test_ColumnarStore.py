@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+import datetime
+import numpy as np
+import pandas as pd
+from Data.ColumnarStore import ColumnarStore
+from Calculations.VolatilityCalculations import historicalVol
+
+
+class TestColumnarStore(unittest.TestCase):
+    """
+    Round trips through the columnar format in a temporary directory.
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "prices.columnar")
+        self.df = pd.DataFrame({"DATE": ["2023-02-03", "2023-02-01", "2023-02-02"],
+                                "HH": [2.3, 2.1, 2.2], "BRN": [81.0, 79.0, 80.0]})
+        self.store = ColumnarStore.write(self.path, self.df)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        """Dates come back sorted with their prices"""
+        reopened = ColumnarStore(self.path)
+        self.assertEqual(reopened.tickers, ["HH", "BRN"])
+        self.assertEqual(reopened.dates()[0], np.datetime64("2023-02-01"))
+        np.testing.assert_array_equal(reopened.prices("HH"), [2.1, 2.2, 2.3])
+
+    def test_zero_copy(self):
+        """The price columns of the dataframe are the mapped arrays"""
+        frame = self.store.frame(["HH"])
+        self.assertTrue(np.shares_memory(frame["HH"].to_numpy(), self.store.prices("HH")))
+        self.assertAlmostEqual(historicalVol(frame, "HH", 3), historicalVol(self.df.iloc[[1, 2, 0]], "HH", 3))
+
+    def test_append(self):
+        """Appending grows the store without rewriting the earlier rows"""
+        before = os.path.getsize(os.path.join(self.path, "HH.bin"))
+        self.store.append(datetime.date(2023, 2, 6), {"HH": 2.4, "BRN": 82.0})
+        self.assertEqual(os.path.getsize(os.path.join(self.path, "HH.bin")), before + 8)
+        reopened = ColumnarStore(self.path)
+        self.assertEqual(reopened.rows, 4)
+        self.assertEqual(reopened.frame(start=datetime.date(2023, 2, 4))["BRN"].tolist(), [82.0])
+
+    def test_append_errors(self):
+        """Old dates and missing tickers are rejected"""
+        with self.assertRaises(ValueError):
+            self.store.append(datetime.date(2023, 2, 1), {"HH": 2.4, "BRN": 82.0})
+        with self.assertRaises(ValueError):
+            self.store.append(datetime.date(2023, 2, 6), {"HH": 2.4})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import datetime
+import unittest
+import numpy as np
+import pandas as pd
+from Calculations.BatchRunner import BatchRunner
+from Calculations.ContractBook import CONTRACT_DTYPE, Contract, ContractBook, callFlags
+from Calculations.OptionsCalculator import batchBlack76Greeks
+
+
+class TestContractBook(unittest.TestCase):
+    """
+    Contract books validate like PV and the web form, slice without copying
+    and price like Contract and BatchRunner.
+    """
+    def setUp(self):
+        self.valuationDate = datetime.date(2023, 6, 16)
+        self.book = ContractBook.fromArrays(["HH", "BRN", "HH", "BRN", "HH"], [3.0, 80.0, 3.5, 75.0, 2.5],
+                                            ["2024-01-29", "2023-11-30", "2023-08-29", "2024-02-29", "2023-08-29"],
+                                            ["Yes", "No", True, "False", "n"], [10, 2, -5, 1, 3])
+
+    def test_layout(self):
+        self.assertEqual(CONTRACT_DTYPE.itemsize, 24)
+        self.assertEqual(self.book.nbytes, 5 * (24 + 8))
+        self.assertEqual(self.book.tickers, ("BRN", "HH"))
+        # Sorted by ticker then expiry, remembering the input rows
+        np.testing.assert_array_equal(self.book.rows, [1, 3, 2, 4, 0])
+        np.testing.assert_array_equal(self.book.strike, [80.0, 75.0, 3.5, 2.5, 3.0])
+        np.testing.assert_array_equal(self.book.isCall, [False, False, True, False, True])
+        self.assertEqual(self.book[4], Contract("HH", 3.0, datetime.date(2024, 1, 29), "Yes", 10))
+        self.assertEqual(list(self.book)[0], Contract("BRN", 80.0, "2023-11-30", False, 2))
+        # Equal contracts hash alike, so that they can be kept in sets and used as keys
+        self.assertEqual(len({self.book[4], Contract("HH", 3, "2024-01-29", True, 10.0)}), 1)
+        self.assertEqual({contract: index for index, contract in enumerate(self.book)}[self.book[4]], 4)
+        self.assertFalse(hasattr(self.book[0], "__dict__"))
+
+    def test_views(self):
+        hh = self.book.forTicker("HH")
+        self.assertEqual(len(hh), 3)
+        self.assertTrue(np.shares_memory(hh.records, self.book.records))
+        self.assertTrue(np.shares_memory(hh.strike, self.book.records))
+        august = self.book.forTicker("HH", datetime.date(2023, 8, 1), datetime.date(2023, 8, 31))
+        np.testing.assert_array_equal(august.rows, [2, 4])
+        self.assertTrue(np.shares_memory(august.records, self.book.records))
+        self.assertEqual(len(self.book.forTicker("WTI")), 0)
+        self.assertEqual(len(self.book.forTicker("HH", datetime.date(2025, 1, 1))), 0)
+        late = self.book.forExpiries(expiryFrom=datetime.date(2023, 12, 1))
+        np.testing.assert_array_equal(late.rows, [3, 0])
+
+    def test_validation(self):
+        np.testing.assert_array_equal(callFlags(["Yes", "no", "x", "True"]), [1, 0, np.nan, 1])
+        np.testing.assert_array_equal(callFlags(np.array(["No", None, np.nan, ""], dtype=object)),
+                                      [0, np.nan, np.nan, np.nan])
+        with self.assertRaisesRegex(ValueError, "not answered by yes or no"):
+            ContractBook.fromArrays("HH", 3.0, "2024-01-29", np.array(["Yes", None], dtype=object))
+        with self.assertRaisesRegex(ValueError, "Quantity"):
+            ContractBook.fromArrays("HH", 3.0, "2024-01-29", True, [1.0, np.nan])
+        for flag in (None, np.nan, ""):
+            with self.assertRaises(ValueError):
+                Contract("HH", 3.0, datetime.date(2024, 1, 29), flag)
+        with self.assertRaises(ValueError):
+            Contract("HH", 3.0, datetime.date(2024, 1, 29), True, np.inf)
+        with self.assertRaisesRegex(ValueError, "Strike must be positive"):
+            ContractBook.fromArrays("HH", [3.0, -1.0], "2024-01-29", True)
+        with self.assertRaisesRegex(ValueError, "not answered by yes or no"):
+            ContractBook.fromArrays("HH", 3.0, "2024-01-29", ["Yes", "Maybe"])
+        with self.assertRaisesRegex(ValueError, "expiry"):
+            ContractBook.fromArrays("HH", 3.0, "NaT", True)
+        with self.assertRaisesRegex(ValueError, "Strike must be positive"):
+            ContractBook.fromArrays("HH", [3.0, np.inf], "2024-01-29", True)
+        for ticker in (["HH", None], ["HH", np.nan], ["HH", ""]):
+            with self.assertRaisesRegex(ValueError, "The ticker is missing"):
+                ContractBook.fromArrays(np.array(ticker, dtype=object), 3.0, "2024-01-29", True)
+        with self.assertRaisesRegex(ValueError, "The ticker is missing"):
+            Contract(None, 3.0, datetime.date(2024, 1, 29), True)
+        with self.assertRaises(ValueError):
+            Contract("HH", 0.0, datetime.date(2024, 1, 29), True)
+        with self.assertRaises(ValueError):
+            Contract("HH", 3.0, datetime.date(2024, 1, 29), "Maybe")
+        errors = self.book.errors(available=["HH"], valuationDate=datetime.date(2023, 12, 1))
+        np.testing.assert_array_equal(errors, ["Currently there is no pricing available for this ticker"] * 2 +
+                                      ["Error -- time to expiry can not be negative"] * 2 + [""])
+
+    def test_pricing(self):
+        sigma, price = {"HH": 0.6, "BRN": 0.3}, {"HH": 3.1, "BRN": 78.0}
+        pv = self.book.black76(sigma, price, self.valuationDate)
+        expected = [contract.pv(sigma[contract.ticker], price[contract.ticker], self.valuationDate)
+                    for contract in self.book]
+        np.testing.assert_allclose(pv, expected, rtol=1e-12)
+        greeks = self.book.greeks(sigma, price, self.valuationDate)
+        np.testing.assert_allclose(greeks["pv"], pv, rtol=1e-12)
+        np.testing.assert_allclose(greeks["delta"], batchBlack76Greeks(
+            [0.3, 0.3, 0.6, 0.6, 0.6], self.book.times(self.valuationDate), [78.0, 78.0, 3.1, 3.1, 3.1],
+            self.book.strike, self.book.isCall)["delta"], rtol=1e-12)
+
+    def test_positions(self):
+        rng = np.random.default_rng(25)
+        dates = pd.date_range("2023-01-02", periods=120, freq="B")
+        df = pd.DataFrame({"DATE": dates, "HH": 3 * np.exp(np.cumsum(rng.normal(0, 0.03, 120))),
+                           "BRN": 80 * np.exp(np.cumsum(rng.normal(0, 0.02, 120)))})
+        positions = pd.DataFrame({"ticker": ["HH", "BRN", "HH"], "deliveryMonth": ["2023-09", "2023-12", "2024-03"],
+                                  "strike": [3.0, 80.0, 3.5], "isCall": ["Yes", "No", "Yes"], "quantity": [1, 2, 3]})
+        runner = BatchRunner(df, workers=1, valuationDate=self.valuationDate)
+        priced = runner.priceFrame(positions)
+        book = ContractBook.fromPositions(positions)
+        np.testing.assert_array_equal(book.expiries(), priced["expiry"].to_numpy(dtype="datetime64[D]")[book.rows])
+        sigma = priced["sigma"].to_numpy()[book.rows]
+        forward = priced["forward"].to_numpy()[book.rows]
+        np.testing.assert_allclose(book.black76(sigma, forward, self.valuationDate, runner.rate),
+                                   priced["pv"].to_numpy()[book.rows], rtol=1e-12)
+        frame = book.frame()
+        self.assertEqual(frame["ticker"].tolist(), ["BRN", "HH", "HH"])
+        self.assertEqual(ContractBook.fromContracts(book).rows.tolist(), [0, 1, 2])
+
+    def test_positions_unknown_ticker(self):
+        """A ticker without an expiry calendar is reported per contract instead of failing the book"""
+        positions = pd.DataFrame({"ticker": ["WTI", "HH"], "deliveryMonth": ["2023-09", "2024-03"],
+                                  "strike": [70.0, 3.5], "isCall": ["Yes", "No"], "quantity": [1, 2]})
+        book = ContractBook.fromPositions(positions)
+        wti = book.forTicker("WTI")
+        self.assertTrue(np.isnat(wti.expiries()).all())
+        self.assertIsNone(wti[0].expiry)
+        self.assertEqual(len(book.forTicker("WTI", expiryTo=datetime.date(2030, 1, 1))), 0)
+        errors = book.errors(available=["HH", "WTI"], valuationDate=self.valuationDate)
+        np.testing.assert_array_equal(errors[np.argsort(book.rows)],
+                                      ["Currently there is no pricing available for this ticker", ""])
+        self.assertTrue(np.isnan(book.black76({"HH": 0.5, "WTI": 0.3}, {"HH": 3.0, "WTI": 70.0},
+                                              self.valuationDate)[book.tickers.index("WTI")]))
+        with self.assertRaisesRegex(ValueError, "The ticker is missing"):
+            ContractBook.fromPositions(positions.assign(ticker=["HH", None]))
+
+
+if __name__ == '__main__':
+    unittest.main()
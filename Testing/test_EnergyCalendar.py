@@ -29,6 +29,13 @@ class TestEnergyCalendar(unittest.TestCase):
         expectedExpiry = datetime.date(2023, 11, 30) # given in assignment doc
         self.assertEqual(BRNDate.lastBusinessDayEnergy("BRN"), expectedExpiry)
 
+    def test_weekend_month_end(self):
+        """September 30, 2023 is a Saturday so the expiry steps back to Friday"""
+        date = (2023, 11, 1) # November 1, 2023 represented as a tuple of ints
+        BRNDate = EnergyCalendar(date)
+        expectedExpiry = datetime.date(2023, 9, 29)
+        self.assertEqual(BRNDate.lastBusinessDayEnergy("BRN"), expectedExpiry)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import datetime
+import numpy as np
+from Calendar.EnergyCalendar import EnergyCalendar
+from Calendar.ExpiryCalendar import ExpiryCalendar, exchangeHolidays
+
+
+class TestExpiryCalendar(unittest.TestCase):
+    """
+    The precomputed calendar is checked against the assignment examples,
+    against EnergyCalendar when there are no holidays, and for holidays.
+    """
+    def setUp(self):
+        self.calendar = ExpiryCalendar(2020, 2026)
+        self.holidayCalendar = ExpiryCalendar(2020, 2026, exchangeHolidays(2020, 2026))
+
+    def test_assignment_examples(self):
+        """BRN Jan-24 expires 2023-11-30 and HH Mar-24 expires 2024-02-29"""
+        self.assertEqual(self.calendar.expiry("BRN", 2024, 1), datetime.date(2023, 11, 30))
+        self.assertEqual(self.calendar.expiry("HH", 2024, 3), datetime.date(2024, 2, 29))
+
+    def test_matches_EnergyCalendar(self):
+        """Without holidays every month end agrees with EnergyCalendar"""
+        months = np.arange(np.datetime64("2021-01"), np.datetime64("2026-01"))
+        expiries = self.calendar.expiries("HH", months)
+        for month, expiry in zip(months, expiries):
+            delivery = month.astype(datetime.date)
+            energy = EnergyCalendar((delivery.year, delivery.month, 1))
+            self.assertEqual(expiry.astype(datetime.date), energy.lastBusinessDayEnergy("HH"))
+
+    def test_holidays(self):
+        """May 31, 2021 was Memorial Day so May's last business day was Friday May 28"""
+        self.assertEqual(self.calendar.lastBusinessDayOfMonth(2021, 5), datetime.date(2021, 5, 31))
+        self.assertEqual(self.holidayCalendar.lastBusinessDayOfMonth(2021, 5), datetime.date(2021, 5, 28))
+        self.assertFalse(self.holidayCalendar.isBusinessDay(datetime.date(2021, 12, 24)))
+        self.assertTrue(self.holidayCalendar.isBusinessDay(datetime.date(2021, 12, 23)))
+
+    def test_errors(self):
+        """Unknown tickers and dates outside the range are rejected"""
+        with self.assertRaises(ValueError):
+            self.calendar.expiry("WTI", 2024, 1)
+        with self.assertRaises(ValueError):
+            self.calendar.lastBusinessDayOfMonth(2030, 1)
+        with self.assertRaises(ValueError):
+            self.calendar.isBusinessDay(datetime.date(2030, 1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
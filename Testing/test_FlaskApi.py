@@ -0,0 +1,187 @@
+import threading
+import unittest
+import flask_app
+from flask_app import Flask_App, profiler
+from Calculations.PricingCache import pvCache
+from Instrumentation import metrics
+
+
+class TestFlaskApi(unittest.TestCase):
+    """
+    The JSON pricing endpoint, exercised through the Flask test client
+    against the data in CombinedEnergyFutures.csv.
+    """
+    def setUp(self):
+        self.client = Flask_App.test_client()
+
+    def _post(self, payload):
+        """POST a JSON payload to the batch endpoint"""
+        return self.client.post('/api/v1/price', json=payload)
+
+    def test_batch(self):
+        """Several contracts priced in one call, with per-contract errors"""
+        response = self._post({"contracts": [
+            {"ticker": "HH", "strike": 2.5, "isCall": True},
+            {"ticker": "BRN", "strike": 80, "isCall": "No", "sigma": 0.3, "T": 0.5},
+            {"ticker": "WTI", "strike": 70, "isCall": True},
+            {"ticker": "HH", "strike": -1, "isCall": True},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body["count"], 4)
+        first, second, third, fourth = body["results"]
+        self.assertGreater(first["pv"], 0)
+        self.assertIsNone(first["error"])
+        self.assertEqual(second["sigma"], 0.3)
+        self.assertEqual(second["T"], 0.5)
+        self.assertIsNone(third["pv"])
+        self.assertEqual(third["error"], "Currently there is no pricing available for this ticker")
+        self.assertEqual(fourth["error"], "Strike must be positive")
+
+    def test_missing_fields(self):
+        """Contracts without a call flag, without any field or with a non-string ticker are reported, not guessed"""
+        response = self._post({"contracts": [
+            {"ticker": "HH", "strike": 2.5},
+            {},
+            {"ticker": 5, "strike": 2.5, "isCall": True},
+            {"ticker": "HH", "strike": 2.5, "isCall": ""},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body["count"], 4)
+        results = body["results"]
+        self.assertTrue(all(result["pv"] is None for result in results))
+        self.assertEqual(results[0]["error"], "call_or_put was  not answered by yes or no.")
+        self.assertIsNotNone(results[1]["error"])
+        self.assertEqual(results[2]["error"], "The ticker must be a string")
+        self.assertEqual(results[3]["error"], "call_or_put was  not answered by yes or no.")
+
+    def test_missing_ticker(self):
+        """A missing ticker is an error of its own contract and never borrows another ticker's inputs"""
+        body = self._post({"contracts": [{}]}).get_json()
+        self.assertEqual(body["count"], 1)
+        self.assertEqual(body["results"][0]["error"], "The ticker is missing")
+        self.assertIsNone(body["results"][0]["ticker"])
+        results = self._post({"contracts": [{"ticker": None, "strike": 80, "isCall": True},
+                                            {"ticker": "HH", "strike": 2.5, "isCall": True}]}).get_json()["results"]
+        self.assertEqual(results[0]["error"], "The ticker is missing")
+        self.assertIsNone(results[0]["pv"])
+        self.assertIsNone(results[0]["sigma"])
+        self.assertIsNone(results[0]["T"])
+        self.assertIsNone(results[1]["error"])
+        self.assertGreater(results[1]["pv"], 0)
+
+    def test_echoed_nulls(self):
+        """Missing inputs are echoed as null, never as NaN, which is not JSON"""
+        response = self._post({"contracts": [{"ticker": 1.5, "strike": 2.5, "isCall": 1.0},
+                                             {"strike": 2.5}]})
+        self.assertNotIn("NaN", response.get_data(as_text=True))
+        results = response.get_json()["results"]
+        self.assertEqual(results[0]["ticker"], 1.5)
+        self.assertIsNone(results[1]["ticker"])
+        self.assertIsNone(results[1]["isCall"])
+
+    def test_non_finite_inputs(self):
+        """Infinite and boolean inputs are errors of their own contract and are never echoed as Infinity"""
+        response = self.client.post('/api/v1/price', content_type="application/json", data="""{"contracts": [
+            {"ticker": "HH", "strike": Infinity, "isCall": true},
+            {"ticker": "HH", "strike": 2.5, "isCall": true, "sigma": Infinity},
+            {"ticker": "HH", "strike": 2.5, "isCall": true, "T": Infinity},
+            {"ticker": "HH", "strike": true, "isCall": true},
+            {"ticker": "HH", "strike": "abc", "isCall": true},
+            {"ticker": "HH", "strike": 2.5, "isCall": true, "sigma": true}]}""")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Infinity", response.get_data(as_text=True))
+        results = response.get_json()["results"]
+        self.assertTrue(all(result["pv"] is None for result in results))
+        self.assertEqual([result["error"] for result in results],
+                         ["Strike must be positive", "Can not price -- error found in sigma",
+                          "Error -- time to expiry can not be negative", "Strike must be a number",
+                          "Strike must be a number", "Can not price -- error found in sigma"])
+        self.assertIsNone(results[0]["strike"])
+        self.assertIs(results[3]["strike"], True)
+
+    def test_bad_request(self):
+        """Bodies without a contracts list are rejected"""
+        self.assertEqual(self._post({"contract": {}}).status_code, 400)
+        self.assertEqual(self.client.post('/api/v1/price', data="not json").status_code, 400)
+        self.assertEqual(self._post({"contracts": [1, 2]}).status_code, 400)
+
+    def test_form_cache(self):
+        """Repeating a form request is answered from the pricing cache"""
+        form = {"Ticker": "HH", "Strike": "2.5", "Call": "Yes", "Upload": "No"}
+        self.assertEqual(self.client.post('/price/', data=form).status_code, 200)
+        before = self.client.get('/api/v1/stats').get_json()["pricing"]
+        self.assertEqual(self.client.post('/price/', data=form).status_code, 200)
+        after = self.client.get('/api/v1/stats').get_json()["pricing"]
+        self.assertEqual(after["hits"], before["hits"] + 1)
+        self.assertEqual(after["misses"], before["misses"])
+
+    def test_metrics(self):
+        """Stage timings of a priced form request, exported as JSON and Prometheus text"""
+        metrics.reset()
+        metrics.enable()
+        pvCache.clear()
+        profiler.sampleRate = 1.0
+        try:
+            form = {"Ticker": "BRN", "Strike": "75", "Call": "No", "Upload": "No"}
+            self.assertEqual(self.client.post('/price/', data=form).status_code, 200)
+            timers = self.client.get('/api/v1/metrics?format=json').get_json()["timers"]
+            for stage in ("pv", "pv.forward", "pv.vol", "pv.calendar", "pv.black76", "historicalVol",
+                          "flask.obtainDf", "flask.price"):
+                self.assertEqual(timers[stage]["calls"], 1, stage)
+            self.assertLessEqual(timers["pv.vol"]["totalSeconds"], timers["pv"]["totalSeconds"])
+            text = self.client.get('/api/v1/metrics').get_data(as_text=True)
+            self.assertIn("option_pricing_pv_vol_seconds_count 1\n", text)
+            self.assertIn("option_pricing_flask_price_status_200_total 1\n", text)
+            profiles = self.client.get('/api/v1/profiles').get_json()["profiles"]
+            self.assertEqual(profiles[0]["request"], "POST /price/")
+            self.assertIn("PV", profiles[0]["statistics"])
+        finally:
+            metrics.enable(False)
+            metrics.reset()
+            profiler.sampleRate = 0.0
+            profiler.profiles.clear()
+
+    def test_shared_runner(self):
+        """Concurrent requests after the data changes share a single new runner"""
+        flask_app._apiRunners.clear()
+        barrier, runners = threading.Barrier(8), []
+
+        def request():
+            barrier.wait()
+            runners.append(flask_app._apiRunner())
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(runner) for runner in runners}), 1)
+        self.assertEqual(list(flask_app._apiRunners.values()), runners[:1])
+
+    def test_profile_of_failed_request(self):
+        """A request that raises still stops its profile, so later requests are profiled"""
+        index = Flask_App.view_functions["index"]
+
+        def fail():
+            raise RuntimeError("view failed")
+
+        profiler.sampleRate = 1.0
+        Flask_App.view_functions["index"] = fail
+        Flask_App.testing = True # Exceptions propagate to the test client
+        try:
+            with self.assertRaisesRegex(RuntimeError, "view failed"):
+                self.client.get('/')
+            Flask_App.view_functions["index"] = index
+            self.assertEqual(self.client.get('/').status_code, 200)
+            self.assertEqual([profile[0] for profile in profiler.profiles], ["GET /", "GET /"])
+        finally:
+            Flask_App.view_functions["index"] = index
+            Flask_App.testing = False
+            profiler.sampleRate = 0.0
+            profiler.profiles.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import datetime
+import unittest
+import numpy as np
+import pandas as pd
+from Calculations.ForwardCurve import ForwardCurve
+from Calculations.BatchRunner import BatchRunner
+from Calculations.OptionsCalculator import batchBlack76
+from Calculations.PVCalculator import PV
+
+
+class TestForwardCurve(unittest.TestCase):
+    """
+    Interpolation of the forward curve and pricing of strips off it.
+    """
+    def setUp(self):
+        self.valuationDate = datetime.date(2023, 2, 1)
+        self.months = ["2023-03", "2023-04", "2023-06", "2023-09", "2023-12"]
+        self.prices = [2.5, 2.7, 3.1, 3.0, 3.6]
+
+    def _curve(self, method="linear") -> ForwardCurve:
+        return ForwardCurve(self.months, self.prices, method, self.valuationDate)
+
+    def test_quotes(self):
+        """Both methods reproduce the quoted prices, given in any order"""
+        for method in ("linear", "monotone"):
+            curve = ForwardCurve(self.months[::-1], self.prices[::-1], method, self.valuationDate)
+            np.testing.assert_allclose(curve.forwardForMonths(self.months), self.prices)
+
+    def test_linear(self):
+        """Linear in log-price halfway between two quotes, and flat beyond the ends"""
+        curve = self._curve()
+        middle = (curve.tenors[0] + curve.tenors[1]) / 2
+        self.assertAlmostEqual(float(curve.forward(middle)), np.sqrt(2.5 * 2.7))
+        np.testing.assert_allclose(curve.forward([-1.0, 10.0]), [2.5, 3.6])
+
+    def test_monotone(self):
+        """The monotone cubic stays between neighbouring quotes"""
+        curve = self._curve("monotone")
+        tenors = np.linspace(curve.tenors[0], curve.tenors[-1], 1001)
+        values = curve.forward(tenors)
+        interval = np.clip(np.searchsorted(curve.tenors, tenors, side="right") - 1, 0, len(curve.tenors) - 2)
+        low = np.minimum(curve.prices[interval], curve.prices[interval + 1])
+        high = np.maximum(curve.prices[interval], curve.prices[interval + 1])
+        self.assertTrue(np.all((values >= low - 1e-12) & (values <= high + 1e-12)))
+        self.assertEqual(curve.forward(np.ones((2, 3))).shape, (2, 3))
+
+    def test_errors(self):
+        """Duplicate months, non-positive prices and unknown methods are rejected"""
+        with self.assertRaises(ValueError):
+            ForwardCurve(["2023-03", "2023-03"], [2.5, 2.6])
+        with self.assertRaises(ValueError):
+            ForwardCurve(["2023-03"], [0.0])
+        with self.assertRaises(ValueError):
+            ForwardCurve(["2023-03"], [2.5], "spline")
+
+    def test_strip(self):
+        """A strip priced in one pass uses each month's forward"""
+        rng = np.random.default_rng(8)
+        marketData = pd.DataFrame({"HH": 3 * np.exp(np.cumsum(rng.normal(0, 0.02, 100)))})
+        runner = BatchRunner(marketData, workers=1, valuationDate=self.valuationDate,
+                             curves={"HH": self._curve("monotone")})
+        strip = runner.priceStrip("HH", self.months[2:], 3.0, True)
+        np.testing.assert_allclose(strip["forward"], self.prices[2:])
+        expected = batchBlack76(strip["sigma"], strip["time"], strip["forward"], 3.0, True)
+        np.testing.assert_allclose(strip["pv"], expected)
+
+    def test_pv(self):
+        """PV with a flat curve is PV without one"""
+        rng = np.random.default_rng(8)
+        df = pd.DataFrame({"HH": 3 * np.exp(np.cumsum(rng.normal(0, 0.02, 100)))})
+        curve = ForwardCurve.flat(df["HH"].iloc[-1])
+        self.assertAlmostEqual(PV(df, "HH", 1, 3.0, True, curve=curve), PV(df, "HH", 1, 3.0, True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+from Calculations.OptionsCalculator import OptionsCalculator, batchBlack76, batchBlack76Greeks
+
+
+class TestGreeks(unittest.TestCase):
+    """
+    The closed-form Greeks are checked against central finite differences
+    of the batch pricer.  Each bump reprices the whole set of contracts,
+    which is exactly the work the analytic Greeks are designed to avoid.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        size = 50
+        self.sigma = rng.uniform(0.1, 0.8, size)
+        self.time = rng.uniform(0.1, 2.0, size)
+        self.price = rng.uniform(10.0, 100.0, size)
+        self.strike = self.price * rng.uniform(0.7, 1.3, size)
+        self.rate = 0.05
+        self.isCall = rng.random(size) < 0.5
+        self.greeks = batchBlack76Greeks(self.sigma, self.time, self.price, self.strike, self.isCall, self.rate)
+
+    def _price(self, sigma=None, time=None, price=None, rate=None):
+        """Reprice with one input replaced"""
+        return batchBlack76(self.sigma if sigma is None else sigma,
+                            self.time if time is None else time,
+                            self.price if price is None else price,
+                            self.strike, self.isCall,
+                            self.rate if rate is None else rate)
+
+    def test_pv(self):
+        """The PV is the batch Black76 value"""
+        np.testing.assert_allclose(self.greeks["pv"], self._price())
+
+    def test_first_order(self):
+        """Delta, vega, theta and rho against central differences"""
+        h = 1e-5
+        delta = (self._price(price=self.price + h) - self._price(price=self.price - h)) / (2 * h)
+        vega = (self._price(sigma=self.sigma + h) - self._price(sigma=self.sigma - h)) / (2 * h)
+        # Theta is the decay as time to expiry shrinks
+        theta = -(self._price(time=self.time + h) - self._price(time=self.time - h)) / (2 * h)
+        rho = (self._price(rate=self.rate + h) - self._price(rate=self.rate - h)) / (2 * h)
+        np.testing.assert_allclose(self.greeks["delta"], delta, atol=1e-6)
+        np.testing.assert_allclose(self.greeks["vega"], vega, atol=1e-5)
+        np.testing.assert_allclose(self.greeks["theta"], theta, atol=1e-5)
+        np.testing.assert_allclose(self.greeks["rho"], rho, atol=1e-5)
+
+    def test_second_order(self):
+        """Gamma, vanna and volga against central differences"""
+        h = 1e-3
+        up, mid, down = self._price(price=self.price + h), self._price(), self._price(price=self.price - h)
+        gamma = (up - 2 * mid + down) / (h * h)
+        np.testing.assert_allclose(self.greeks["gamma"], gamma, atol=1e-5)
+
+        vegaUp = batchBlack76Greeks(self.sigma, self.time, self.price + h, self.strike, self.isCall, self.rate)["vega"]
+        vegaDown = batchBlack76Greeks(self.sigma, self.time, self.price - h, self.strike, self.isCall, self.rate)["vega"]
+        np.testing.assert_allclose(self.greeks["vanna"], (vegaUp - vegaDown) / (2 * h), atol=1e-5)
+
+        vegaUp = batchBlack76Greeks(self.sigma + h, self.time, self.price, self.strike, self.isCall, self.rate)["vega"]
+        vegaDown = batchBlack76Greeks(self.sigma - h, self.time, self.price, self.strike, self.isCall, self.rate)["vega"]
+        np.testing.assert_allclose(self.greeks["volga"], (vegaUp - vegaDown) / (2 * h), rtol=1e-4, atol=1e-4)
+
+    def test_scalar(self):
+        """The OptionsCalculator method agrees with the batch Greeks"""
+        option = OptionsCalculator(self.sigma[0], self.time[0], self.price[0], self.strike[0], self.rate)
+        scalar = option.Greeks(self.isCall[0])
+        self.assertAlmostEqual(scalar["pv"], option.Black76(self.isCall[0]))
+        for name, values in self.greeks.items():
+            self.assertAlmostEqual(scalar[name], values[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
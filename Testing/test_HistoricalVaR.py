@@ -0,0 +1,87 @@
+import unittest
+import numpy as np
+import pandas as pd
+from Calculations.HistoricalVaR import HistoricalVaR
+from Calculations.OptionsCalculator import OptionsCalculator
+
+
+class TestHistoricalVaR(unittest.TestCase):
+    """
+    Replayed P&L is compared with scalar revaluation, and VaR, ES and the
+    backtest with direct computations on the P&L series.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(12)
+        days = 400
+        self.history = pd.DataFrame({"DATE": pd.date_range("2021-01-04", periods=days, freq="B"),
+                                     "HH": 3 * np.exp(np.cumsum(rng.normal(0, 0.03, days))),
+                                     "BRN": 80 * np.exp(np.cumsum(rng.normal(0, 0.015, days)))})
+        self.history.loc[10, "HH"] = np.nan # A missing print drops the returns of days 10 and 11
+        self.positions = dict(tickers=["HH", "BRN", "HH"], sigma=[0.5, 0.3, 0.6], time=[0.5, 1.0, 0.25],
+                              price=[3.0, 80.0, 3.0], strike=[3.2, 75.0, 2.8], isCall=[True, False, False],
+                              quantity=[100, -20, 50])
+        self.simulation = HistoricalVaR(**self.positions)
+
+    def test_daily_pnl(self):
+        """The P&L of a day is the change in value of the positions, priced one at a time"""
+        pnl = self.simulation.dailyPnL(self.history)
+        self.assertEqual(len(pnl), 397)
+        self.assertFalse(pnl.index.isin(self.history["DATE"].iloc[[10, 11]]).any())
+        day = 50
+        moves = self.history[["HH", "BRN"]]
+        moves = moves.iloc[day + 1] / moves.iloc[day]
+        expected = 0.0
+        p = self.positions
+        for i, ticker in enumerate(p["tickers"]):
+            shocked = p["price"][i] * moves[ticker]
+            after = OptionsCalculator(p["sigma"][i], p["time"][i] - 1 / 260, shocked, p["strike"][i])
+            before = OptionsCalculator(p["sigma"][i], p["time"][i], p["price"][i], p["strike"][i])
+            expected += p["quantity"][i] * (after.Black76(p["isCall"][i]) - before.Black76(p["isCall"][i]))
+        self.assertAlmostEqual(pnl.loc[self.history["DATE"].iloc[day + 1], "pnl"], expected)
+        explained = pnl[["delta", "gamma", "theta", "unexplained"]].sum(axis=1)
+        np.testing.assert_allclose(explained, pnl["pnl"])
+        # The Greeks explain most of the P&L
+        self.assertLess(pnl["unexplained"].abs().mean(), 0.1 * pnl["pnl"].abs().mean())
+
+    def test_incremental(self):
+        """Appending a day only revalues that day"""
+        self.simulation.dailyPnL(self.history.iloc[:-1])
+        self.assertEqual(self.simulation.computedDays, 396)
+        full = self.simulation.dailyPnL(self.history)
+        self.assertEqual(self.simulation.computedDays, 397)
+        fresh = HistoricalVaR(**self.positions).dailyPnL(self.history)
+        pd.testing.assert_frame_equal(full, fresh)
+
+    def test_var(self):
+        """VaR is the loss quantile and ES the mean loss beyond it"""
+        pnl = self.simulation.dailyPnL(self.history)["pnl"].to_numpy()
+        result = self.simulation.var(self.history, 0.95)
+        quantile = np.quantile(pnl, 0.05)
+        self.assertAlmostEqual(result["var"], -quantile)
+        self.assertAlmostEqual(result["es"], -pnl[pnl <= quantile].mean())
+        self.assertGreaterEqual(result["es"], result["var"])
+        self.assertEqual(self.simulation.var(self.history, 0.95, window=100)["days"], 100)
+
+    def test_backtest(self):
+        """Each day is compared with the VaR of the days before it"""
+        result = self.simulation.backtest(self.history, 0.95, window=100)
+        pnl = self.simulation.dailyPnL(self.history)["pnl"].to_numpy()
+        self.assertEqual(len(result), len(pnl) - 100)
+        self.assertAlmostEqual(result["var"].iloc[0], -np.quantile(pnl[:100], 0.05))
+        self.assertEqual(result["exception"].iloc[5], pnl[105] < -result["var"].iloc[5])
+        summary = result.attrs["summary"]
+        self.assertEqual(summary["exceptions"], int(result["exception"].sum()))
+        self.assertGreaterEqual(summary["kupiecRatio"], 0)
+
+    def test_errors(self):
+        """Unknown tickers, short histories and expiring positions are rejected"""
+        with self.assertRaises(ValueError):
+            HistoricalVaR(["WTI"], 0.3, 1.0, 70.0, 70.0, True).dailyPnL(self.history)
+        with self.assertRaises(ValueError):
+            self.simulation.backtest(self.history.iloc[:50], window=100)
+        with self.assertRaises(ValueError):
+            HistoricalVaR(["HH"], 0.3, 1 / 520, 3.0, 3.0, True)
+
+
+if __name__ == '__main__':
+    unittest.main()
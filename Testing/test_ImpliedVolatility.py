@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+from Calculations.OptionsCalculator import batchBlack76
+from Calculations.ImpliedVolatility import impliedVol, CONVERGED, ARBITRAGE, INDETERMINATE
+
+
+class TestImpliedVolatility(unittest.TestCase):
+    """
+    Implied vols are checked by round trips through the batch pricer,
+    and quotes outside the no-arbitrage bounds must be flagged rather than solved.
+    """
+    def test_round_trip(self):
+        """Pricing then inverting a random chain recovers sigma"""
+        rng = np.random.default_rng(3)
+        size = 2000
+        sigma = rng.uniform(0.05, 1.5, size)
+        time = rng.uniform(0.02, 3.0, size)
+        price = rng.uniform(1.0, 150.0, size)
+        strike = price * rng.uniform(0.6, 1.6, size)
+        isCall = rng.random(size) < 0.5
+        premium = batchBlack76(sigma, time, price, strike, isCall)
+
+        implied, status = impliedVol(premium, time, price, strike, isCall)
+        # Quotes whose time value is lost in rounding carry no information
+        # about sigma and cannot be inverted, which is not a solver failure
+        intrinsic = np.exp(-0.05 * time) * np.maximum(np.where(isCall, price - strike, strike - price), 0)
+        informative = premium - intrinsic > 1e-6 * price
+        self.assertTrue(np.all(status[informative] == CONVERGED))
+        np.testing.assert_allclose(implied[informative], sigma[informative], rtol=1e-6)
+
+    def test_polanitzer(self):
+        """Polanitzer's example inverted back to 20% vol"""
+        implied, status = impliedVol(3.7982, 1.5, 42.0, 42.0, True)
+        self.assertEqual(status, CONVERGED)
+        self.assertAlmostEqual(float(implied), 0.2, 4)
+
+    def test_arbitrage(self):
+        """Premiums below intrinsic or above the discounted future are flagged"""
+        price, strike, time, rate = 50.0, 40.0, 1.0, 0.05
+        discount = np.exp(-rate * time)
+        premiums = np.array([0.5 * discount * (price - strike), 1.1 * discount * price, -1.0])
+        implied, status = impliedVol(premiums, time, price, strike, True, rate)
+        self.assertTrue(np.all(status == ARBITRAGE))
+        self.assertTrue(np.all(np.isnan(implied)))
+
+    def test_indeterminate(self):
+        """A far out-of-the-money premium with no usable time value is not solved"""
+        premium = batchBlack76(0.1, 0.1, 100.0, 140.0, True)
+        implied, status = impliedVol(premium, 0.1, 100.0, 140.0, True)
+        self.assertEqual(status, INDETERMINATE)
+        self.assertTrue(np.isnan(implied))
+
+    def test_shape(self):
+        """Output shapes follow the broadcast shape of the inputs"""
+        strikes = np.array([[30.0, 40.0], [50.0, 60.0]])
+        premium = batchBlack76(0.3, 0.5, 45.0, strikes, False)
+        implied, status = impliedVol(premium, 0.5, 45.0, strikes, False)
+        self.assertEqual(implied.shape, strikes.shape)
+        np.testing.assert_allclose(implied, 0.3, rtol=1e-8)
+
+
+if __name__ == '__main__':
+    unittest.main()
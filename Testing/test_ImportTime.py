@@ -0,0 +1,51 @@
+import subprocess
+import sys
+import unittest
+
+# Cold-start budget in seconds for importing the pricer, several times what
+# NumPy alone takes so that a slow machine does not fail the test
+IMPORT_BUDGET = 0.5
+HEAVY = ("pandas", "scipy", "arrow")
+
+
+def _coldImport(module: str):
+    """Cumulative import time of a module in a fresh interpreter (python -X importtime) and the heavy modules loaded"""
+    check = f"import sys, {module}; print(','.join(name for name in {HEAVY!r} if name in sys.modules))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", check],
+                            capture_output=True, text=True, check=True)
+    seconds = None
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            seconds = int(fields[1]) / 1e6
+    assert seconds is not None, f"No -X importtime line for {module}"
+    return seconds, [name for name in result.stdout.strip().split(",") if name]
+
+
+class TestImportTime(unittest.TestCase):
+    """
+    Pricing a single option must not pay for pandas, SciPy or arrow.
+    """
+    def test_pricer_is_light(self):
+        for module in ("Calculations.OptionsCalculator", "Calculations.PVCalculator", "Calculations.PricingCache"):
+            seconds, heavy = _coldImport(module)
+            self.assertEqual(heavy, [], module)
+            # Best of a few runs, so that one slow start does not fail the budget
+            seconds = min([seconds] + [_coldImport(module)[0] for _ in range(2)]) if seconds > IMPORT_BUDGET else seconds
+            self.assertLess(seconds, IMPORT_BUDGET, module)
+
+    def test_batch_pricing_is_light(self):
+        """The array normal CDF is NumPy only, so batch pricing does not load SciPy either"""
+        check = ("import sys; from Calculations.OptionsCalculator import batchBlack76; "
+                 "batchBlack76([0.3] * 100, 0.5, 80.0, [70.0 + i / 10 for i in range(100)], True); "
+                 "print('scipy' in sys.modules)")
+        result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "False")
+
+    def test_flask_app_defers_pandas(self):
+        self.assertEqual(_coldImport("flask_app")[1], [])
+
+    def test_models_defer_pandas(self):
+        """Models which only take dataframes as arguments do not load pandas themselves"""
+        for module in ("Calculations.VolatilityEngine", "Calculations.MonteCarlo", "Calculations.Lattice"):
+            self.assertEqual(_coldImport(module)[1], [], module)
@@ -0,0 +1,71 @@
+import time
+import unittest
+from Instrumentation import Metrics, Profiler, timed
+
+
+class TestInstrumentation(unittest.TestCase):
+    """
+    Timers, counters and their export, and sampled profiles.
+    """
+    def setUp(self):
+        self.metrics = Metrics(enabled=True)
+
+    def test_timers_and_counters(self):
+        for _ in range(3):
+            with self.metrics.timer("stage"):
+                time.sleep(0.001)
+        with self.assertRaises(ValueError):
+            with self.metrics.timer("stage"):
+                raise ValueError("failed")
+        self.metrics.increment("requests", 2)
+        snapshot = self.metrics.snapshot()
+        stage = snapshot["timers"]["stage"]
+        self.assertEqual(stage["calls"], 4)
+        self.assertGreaterEqual(stage["totalSeconds"], 0.003)
+        self.assertGreaterEqual(stage["maxSeconds"], stage["meanSeconds"])
+        self.assertEqual(snapshot["counters"], {"requests": 2, "stage.errors": 1})
+
+    def test_disabled(self):
+        """Nothing is collected while disabled, and collected values survive switching off"""
+        self.metrics.increment("kept")
+        self.metrics.enable(False)
+        with self.metrics.timer("stage"):
+            pass
+        self.metrics.increment("requests")
+        @timed("function", self.metrics)
+        def function(value):
+            return 2 * value
+        self.assertEqual(function(3), 6)
+        self.assertEqual(self.metrics.snapshot()["timers"], {})
+        self.assertEqual(self.metrics.snapshot()["counters"], {"kept": 1})
+
+    def test_decorator_and_prometheus(self):
+        @timed("pv.vol", self.metrics)
+        def function(value):
+            return 2 * value
+        self.assertEqual(function(3), 6)
+        self.assertEqual(function.__name__, "function")
+        self.metrics.increment("flask.price.status_200")
+        lines = self.metrics.prometheus().splitlines()
+        self.assertIn("# TYPE option_pricing_pv_vol_seconds summary", lines)
+        self.assertIn("option_pricing_pv_vol_seconds_count 1", lines)
+        self.assertIn("option_pricing_flask_price_status_200_total 1", lines)
+        self.metrics.reset()
+        self.assertEqual(self.metrics.prometheus(), "\n")
+
+    def test_profiler(self):
+        never, always = Profiler(0.0), Profiler(1.0, keep=2)
+        self.assertEqual(never.profile("call", sum, range(10)), 45)
+        self.assertEqual(len(never.profiles), 0)
+        for _ in range(3):
+            self.assertEqual(always.profile("call", sorted, [3, 1, 2]), [1, 2, 3])
+        self.assertEqual(len(always.profiles), 2)
+        label, seconds, text = always.profiles[-1]
+        self.assertEqual(label, "call")
+        self.assertIn("sorted", text)
+        with self.assertRaises(ValueError):
+            Profiler(1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+from Calculations.Lattice import latticePrice
+from Calculations.OptionsCalculator import batchBlack76
+
+
+class TestLattice(unittest.TestCase):
+    """
+    European lattice values are checked against Black76, and American values
+    against the bounds they must satisfy.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        size = 50
+        self.contracts = (rng.uniform(0.1, 0.6, size), rng.uniform(0.1, 2.0, size), rng.uniform(20, 80, size),
+                          rng.uniform(20, 80, size), rng.random(size) < 0.5)
+
+    def test_european(self):
+        """Both lattices reproduce Black76 for European exercise"""
+        expected = batchBlack76(*self.contracts)
+        for lattice in ("binomial", "trinomial"):
+            values = latticePrice(*self.contracts, steps=400, lattice=lattice, american=False)
+            np.testing.assert_allclose(values, expected, atol=1e-3)
+
+    def test_richardson(self):
+        """Smoothing with extrapolation converges faster than the plain tree"""
+        expected = batchBlack76(0.2, 1.5, 42.0, 42.0, True)
+        plain = latticePrice(0.2, 1.5, 42.0, 42.0, True, steps=200, american=False, smoothing=False, richardson=False)
+        extrapolated = latticePrice(0.2, 1.5, 42.0, 42.0, True, steps=200, american=False)
+        self.assertLess(abs(extrapolated - expected), abs(plain - expected) / 100)
+
+    def test_american(self):
+        """American values lie above both the European value and immediate exercise"""
+        sigma, time, price, strike, isCall = self.contracts
+        american = latticePrice(*self.contracts, rate=0.1, steps=200)
+        european = batchBlack76(*self.contracts, rate=0.1)
+        intrinsic = np.maximum(np.where(isCall, price - strike, strike - price), 0)
+        self.assertTrue(np.all(american >= european - 1e-4))
+        self.assertTrue(np.all(american >= intrinsic - 1e-4))
+        # A deep in the money put is worth more than the European one
+        deepPut = latticePrice(0.3, 1.5, 42.0, 60.0, False, rate=0.1)
+        self.assertGreater(deepPut, batchBlack76(0.3, 1.5, 42.0, 60.0, False, rate=0.1) + 0.1)
+
+    def test_lattices_agree(self):
+        """Binomial and trinomial American values agree"""
+        binomial = latticePrice(*self.contracts, steps=400)
+        trinomial = latticePrice(*self.contracts, steps=400, lattice="trinomial")
+        np.testing.assert_allclose(binomial, trinomial, atol=2e-3)
+
+    def test_shape(self):
+        """Scalars give a 0-d result and arrays keep their shape"""
+        self.assertEqual(latticePrice(0.2, 1.5, 42.0, 42.0, True).shape, ())
+        self.assertEqual(latticePrice(0.2, 1.5, np.full((2, 3), 42.0), 42.0, True).shape, (2, 3))
+
+    def test_errors(self):
+        """Unknown lattices and non-positive inputs are rejected"""
+        with self.assertRaises(ValueError):
+            latticePrice(0.2, 1.5, 42.0, 42.0, True, lattice="quadrinomial")
+        with self.assertRaises(ValueError):
+            latticePrice(0.2, 0.0, 42.0, 42.0, True)
+
+
+if __name__ == '__main__':
+    unittest.main()
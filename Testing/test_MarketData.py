@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+import datetime
+import numpy as np
+import pandas as pd
+from MarketData import MarketDataStore
+
+
+class TestMarketData(unittest.TestCase):
+    """
+    Tests of the in-memory market data cache using a small csv
+    written to a temporary directory.
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "prices.csv")
+        self._write([1.0, 2.0, 3.0, 4.0])
+        self.store = MarketDataStore()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write(self, prices):
+        """Daily prices starting on Feb 1, 2023, written out of order to check sorting"""
+        dates = pd.date_range("2023-02-01", periods=len(prices)).strftime("%Y-%m-%d")
+        df = pd.DataFrame({"DATE": dates, "HH": prices, "BRN": [100 * price for price in prices]})
+        df.iloc[::-1].to_csv(self.path, index=False)
+
+    def test_hits_and_misses(self):
+        """The file is parsed once and then served from memory"""
+        first = self.store.frame(self.path)
+        second = self.store.frame(self.path)
+        self.assertIs(first, second)
+        self.assertEqual(self.store.stats()["misses"], 1)
+        self.assertEqual(self.store.stats()["hits"], 1)
+
+    def test_invalidation(self):
+        """A change in the file's modification time forces a reload"""
+        self.store.frame(self.path)
+        self._write([1.0, 2.0, 3.0, 4.0, 5.0])
+        status = os.stat(self.path)
+        os.utime(self.path, ns=(status.st_atime_ns, status.st_mtime_ns + 10 ** 9))
+        self.assertEqual(len(self.store.frame(self.path)), 5)
+        self.assertEqual(self.store.stats()["misses"], 2)
+
+    def test_versioned_frame(self):
+        """The version is that of the data returned, even when the file is replaced while it is parsed"""
+        version, df = self.store.versionedFrame(self.path)
+        self.assertEqual(version, self.store.version(self.path))
+        self.assertIs(df, self.store.frame(self.path))
+        load, replaced = self.store._load, []
+
+        def replacingLoad(path):
+            df = load(path)
+            if not replaced:
+                self._write([1.0, 2.0, 3.0, 4.0, 5.0])
+                status = os.stat(path)
+                os.utime(path, ns=(status.st_atime_ns, status.st_mtime_ns + 10 ** 9))
+                replaced.append(True)
+            return df
+
+        self.store.clear()
+        self.store._load = replacingLoad
+        version, df = self.store.versionedFrame(self.path)
+        self.assertEqual(len(df), 5)
+        self.assertEqual(version, self.store.version(self.path))
+
+    def test_slice(self):
+        """Date-range slices are sorted and inclusive at both ends"""
+        df = self.store.slice("HH", datetime.date(2023, 2, 2), datetime.date(2023, 2, 3), path=self.path)
+        self.assertEqual(list(df.columns), ["DATE", "HH"])
+        self.assertEqual(df["HH"].tolist(), [2.0, 3.0])
+        self.assertEqual(self.store.slice("HH", path=self.path)["HH"].iloc[-1], 4.0)
+
+    def test_slice_is_a_view(self):
+        """Slices share memory with the cached ticker frame instead of copying rows"""
+        full = self.store.slice("HH", path=self.path)
+        df = self.store.slice("HH", datetime.date(2023, 2, 2), path=self.path)
+        for column in ("DATE", "HH"):
+            self.assertTrue(np.shares_memory(df[column].to_numpy(), full[column].to_numpy()))
+        self.assertEqual(self.store.stats()["misses"], 1)
+
+    def test_slice_bad_ticker(self):
+        """Unknown tickers are rejected with the same message as historicalVol"""
+        with self.assertRaises(ValueError):
+            self.store.slice("WTI", path=self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
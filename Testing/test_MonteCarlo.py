@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+import pandas as pd
+from Calculations.MonteCarlo import monteCarlo, monteCarloPV
+from Calculations.OptionsCalculator import OptionsCalculator
+from Calculations.PVCalculator import PV
+
+
+class TestMonteCarlo(unittest.TestCase):
+    """
+    Monte Carlo values are compared with Black76 where a closed form
+    exists, and with relations between payoffs where it does not.
+    Polanitzer's example (see test_Black76.py) is used throughout.
+    """
+    def setUp(self):
+        self.sigma, self.time, self.price, self.strike = 0.2, 1.5, 42.0, 42.0
+        self.black76 = OptionsCalculator(self.sigma, self.time, self.price, self.strike).Black76(True)
+
+    def _run(self, **options):
+        """Monte Carlo on Polanitzer's example"""
+        return monteCarlo(self.sigma, self.time, self.price, self.strike, options.pop("isCall", True),
+                          seed=options.pop("seed", 7), **options)
+
+    def test_european(self):
+        """Without variance reduction the European value is within 4 standard errors of Black76"""
+        result = self._run(paths=200_000, antithetic=False, controlVariate=False)
+        self.assertLess(abs(result["pv"] - self.black76), 4 * result["stdError"])
+
+    def test_european_control(self):
+        """The European payoff is its own control, so the Black76 value is recovered exactly"""
+        result = self._run(paths=1000)
+        self.assertAlmostEqual(result["pv"], self.black76)
+        self.assertAlmostEqual(result["stdError"], 0.0)
+
+    def test_asian(self):
+        """Averaging lowers the value; a single observation date is the European option"""
+        asian = self._run(payoff="asian", paths=20_000, steps=50)
+        self.assertLess(asian["pv"], self.black76)
+        self.assertGreater(asian["pv"], 0.5 * self.black76)
+        single = self._run(payoff="asian", paths=20_000, steps=1)
+        self.assertAlmostEqual(single["pv"], self.black76)
+
+    def test_barrier_parity(self):
+        """Knock-out plus knock-in equals the European option path by path"""
+        options = dict(payoff="barrier", barrier=50.0, paths=20_000, steps=20, controlVariate=False)
+        out = self._run(barrierType="up-and-out", **options)
+        knockIn = self._run(barrierType="up-and-in", **options)
+        european = self._run(paths=20_000, steps=20, controlVariate=False)
+        self.assertAlmostEqual(out["pv"] + knockIn["pv"], european["pv"])
+
+    def test_variance_reduction(self):
+        """Antithetic and control variates reduce the standard error of the Asian price"""
+        plain = self._run(payoff="asian", paths=20_000, steps=20, antithetic=False, controlVariate=False)
+        reduced = self._run(payoff="asian", paths=20_000, steps=20)
+        self.assertLess(reduced["stdError"], plain["stdError"] / 1.5)
+
+    def test_reproducible(self):
+        """The same seed gives the same value"""
+        first = self._run(payoff="asian", paths=5000, steps=10, seed=3)
+        second = self._run(payoff="asian", paths=5000, steps=10, seed=3)
+        self.assertEqual(first["pv"], second["pv"])
+
+    def test_market_inputs(self):
+        """monteCarloPV prices off the same inputs as PV"""
+        rng = np.random.default_rng(11)
+        df = pd.DataFrame({"HH": 3 * np.exp(np.cumsum(rng.normal(0, 0.02, 100)))})
+        result = monteCarloPV(df, "HH", 1, 3.0, False, payoff="european", paths=1000, seed=1)
+        self.assertAlmostEqual(result["pv"], PV(df, "HH", 1, 3.0, False))
+
+    def test_errors(self):
+        """Unknown payoffs and barriers without a level are rejected"""
+        with self.assertRaises(ValueError):
+            self._run(payoff="lookback")
+        with self.assertRaises(ValueError):
+            self._run(payoff="barrier")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import math
+import unittest
+import numpy as np
+from Calculations import Numerics
+from Calculations.Numerics import normCdf, normPdf
+
+
+class TestNumerics(unittest.TestCase):
+    """
+    The normal CDF agrees with math.erfc on every evaluation path, including deep in the tails.
+    """
+    def setUp(self):
+        self.x = np.linspace(-37, 8, 5001)
+        self.expected = np.array([0.5 * math.erfc(-value / math.sqrt(2)) for value in self.x])
+
+    def test_cdf_paths(self):
+        np.testing.assert_allclose(normCdf(self.x), self.expected, rtol=1e-12, atol=0)
+        body = np.abs(self.x) < 8
+        np.testing.assert_allclose(normCdf(self.x[body]), self.expected[body], rtol=5e-14, atol=0)
+        np.testing.assert_allclose(normCdf(self.x[::50]), self.expected[::50], rtol=1e-12, atol=0)
+        np.testing.assert_allclose(normCdf(self.x.reshape(-1, 1)), self.expected.reshape(-1, 1), rtol=1e-12)
+        self.assertIsInstance(normCdf(0.3), float)
+        self.assertEqual(normCdf(0.0), 0.5)
+
+    def test_batch_independent(self):
+        """The value for an x does not depend on the size of the batch it is evaluated in"""
+        x = np.tile(self.x, 40)
+        full = normCdf(x)
+        np.testing.assert_allclose(full, np.tile(self.expected, 40), rtol=1e-12)
+        for size in (1, 7, Numerics.SMALL_ARRAY, Numerics.SMALL_ARRAY + 1, 256, 257, 5000, Numerics.BLOCK + 3):
+            parts = np.concatenate([normCdf(x[start:start + size]) for start in range(0, 20 * size, size)])
+            np.testing.assert_array_equal(parts, full[:len(parts)])
+
+    def test_tail(self):
+        """Full relative accuracy in the lower tail, against math.erfc of the same rounded argument"""
+        x = np.concatenate([np.linspace(-37, -5, 20001), -np.geomspace(0.5, 37, 2001)])
+        expected = np.array([0.5 * math.erfc(-value * math.sqrt(0.5)) for value in x])
+        np.testing.assert_allclose(normCdf(x), expected, rtol=2e-15, atol=0)
+        small = np.concatenate([normCdf(x[start:start + 5]) for start in range(0, len(x), 5)])
+        np.testing.assert_allclose(small, expected, rtol=2e-15, atol=0)
+
+    def test_special_values(self):
+        """Infinities give 0 and 1 and NaN stays NaN, in both the small and the blocked path"""
+        x = np.array([-np.inf, np.inf, np.nan, 0.0, -40.0])
+        for values in (x, np.tile(x, 20)):
+            result = normCdf(values)[:len(x)]
+            np.testing.assert_array_equal(result[[0, 1, 3, 4]], [0.0, 1.0, 0.5, 0.0])
+            self.assertTrue(np.isnan(result[2]))
+
+    def test_pdf(self):
+        np.testing.assert_allclose(normPdf(self.x), np.exp(-self.x ** 2 / 2) / math.sqrt(2 * math.pi), rtol=1e-15)
+        self.assertAlmostEqual(normPdf(0), 1 / math.sqrt(2 * math.pi))
+
+    def test_scalar_path(self):
+        """Scalars, evaluated with math.erfc, agree with the array path"""
+        scalars = np.array([normCdf(value) for value in self.x[::10].tolist()])
+        np.testing.assert_allclose(scalars, normCdf(self.x[::10]), rtol=1e-12, atol=0)
+
+    def test_out(self):
+        for x in (self.x[:100], self.x):
+            out = np.empty_like(x)
+            self.assertIs(normCdf(x, out=out), out)
+            np.testing.assert_array_equal(out, normCdf(x))
+            self.assertIs(normPdf(x, out=out), out)
+            np.testing.assert_array_equal(out, normPdf(x))
+        grid = np.empty((len(self.x), 2))
+        normCdf(self.x, out=grid[:, 1]) # Not contiguous
+        np.testing.assert_allclose(grid[:, 1], self.expected, rtol=1e-12)
+
+    def test_d1d2(self):
+        sigma, time, price, strike = np.array([0.2, 0.5]), np.array([0.25, 2.0]), 80.0, np.array([75.0, 90.0])
+        d1, d2, totalVol = Numerics.d1d2(sigma, time, price, strike)
+        expected = (np.log(price / strike) + sigma ** 2 * time / 2) / (sigma * np.sqrt(time))
+        np.testing.assert_allclose(d1, expected, rtol=1e-14)
+        np.testing.assert_allclose(d2, expected - sigma * np.sqrt(time), rtol=1e-14)
+        np.testing.assert_allclose(totalVol, sigma * np.sqrt(time), rtol=1e-15)
+        scalar = Numerics.d1d2(0.2, 0.25, 80.0, 75.0)
+        self.assertIsInstance(scalar[0], float)
+        np.testing.assert_allclose(scalar, (d1[0], d2[0], totalVol[0]), rtol=1e-14)
+        with np.errstate(divide="ignore"):
+            self.assertTrue(np.isinf(Numerics.d1d2(0.2, 0.0, 80.0, 75.0)[0]))
@@ -0,0 +1,105 @@
+import time
+import unittest
+import numpy as np
+import pandas as pd
+from Calculations.PricingCache import PricingCache, cachedBlack76, cachedPV
+from Calculations.OptionsCalculator import OptionsCalculator
+from Calculations.PVCalculator import PV
+
+
+class TestPricingCache(unittest.TestCase):
+    """
+    Keys, eviction and invalidation of the pricing cache, and the cached
+    pricers against the uncached ones.
+    """
+    def setUp(self):
+        self.cache = PricingCache(maxEntries=3, tolerance=1e-6)
+        self.calls = 0
+
+    def _compute(self, value=1.0):
+        """A computation which counts how often it runs"""
+        def compute():
+            self.calls += 1
+            return value
+        return compute
+
+    def test_quantized_keys(self):
+        """Floats within the tolerance share an entry"""
+        self.assertEqual(self.cache.key("HH", 2.5, True), self.cache.key("HH", 2.5 + 1e-9, True))
+        self.assertNotEqual(self.cache.key("HH", 2.5, True), self.cache.key("HH", 2.501, True))
+        self.assertNotEqual(self.cache.key("HH", 2.5, True), self.cache.key("HH", 2.5, False))
+
+    def test_hits_and_lru(self):
+        """Repeated keys are hits and the least recently used entry is evicted first"""
+        for key in ("a", "b", "c", "a"):
+            self.cache.lookup((key,), self._compute())
+        self.assertEqual(self.calls, 3)
+        self.cache.lookup(("d",), self._compute()) # Evicts b, the least recently used
+        self.cache.lookup(("a",), self._compute())
+        self.assertEqual(self.calls, 4)
+        self.cache.lookup(("b",), self._compute())
+        self.assertEqual(self.calls, 5)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 5, 2))
+        self.assertEqual(stats["entries"], 3)
+        self.assertGreater(stats["bytes"], 0)
+
+    def test_ttl(self):
+        """Entries older than the time to live are recomputed"""
+        cache = PricingCache(ttl=0.01)
+        cache.lookup(("a",), self._compute())
+        cache.lookup(("a",), self._compute())
+        time.sleep(0.02)
+        cache.lookup(("a",), self._compute())
+        self.assertEqual(self.calls, 2)
+
+    def test_version(self):
+        """A new data version empties the cache"""
+        self.cache.setVersion(1)
+        self.cache.lookup(("a",), self._compute())
+        self.cache.setVersion(1)
+        self.cache.lookup(("a",), self._compute())
+        self.cache.setVersion(2)
+        self.cache.lookup(("a",), self._compute())
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+    def test_version_change_during_compute(self):
+        """A value computed while another request changed the stamp is returned but not cached"""
+        self.cache.setVersion(1)
+        def compute():
+            self.cache.setVersion(2)
+            return self._compute()()
+        self.assertEqual(self.cache.lookup(("a",), compute), 1.0)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+        self.cache.lookup(("a",), self._compute(2.0))
+        self.assertEqual(self.cache.lookup(("a",), self._compute(3.0)), 2.0)
+
+    def test_errors_not_cached(self):
+        """A computation that raises is tried again next time"""
+        def fail():
+            raise ValueError("Strike must be positive")
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.cache.lookup(("a",), fail)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_cached_pricers(self):
+        """Cached prices equal uncached ones and new data is repriced"""
+        rng = np.random.default_rng(2)
+        df = pd.DataFrame({"HH": 3 * np.exp(np.cumsum(rng.normal(0, 0.02, 100)))})
+        cache = PricingCache()
+        expected = PV(df, "HH", 1, 3.0, True)
+        self.assertEqual(cachedPV(df, "v1", "HH", 1, 3.0, True, cache=cache), expected)
+        self.assertEqual(cachedPV(df, "v1", "HH", 1, 3.0, True, cache=cache), expected)
+        self.assertEqual(cache.stats()["hits"], 1)
+        shifted = df * 1.1
+        self.assertEqual(cachedPV(shifted, "v2", "HH", 1, 3.0, True, cache=cache), PV(shifted, "HH", 1, 3.0, True))
+        cachedPV(df, None, "HH", 1, 3.0, True, cache=cache) # Unversioned data bypasses the cache
+        self.assertEqual(cache.stats()["misses"], 2)
+        self.assertEqual(cachedBlack76(0.2, 1.5, 42.0, 42.0, True, cache=cache),
+                         OptionsCalculator(0.2, 1.5, 42.0, 42.0).Black76(True))
+
+
+if __name__ == '__main__':
+    unittest.main()
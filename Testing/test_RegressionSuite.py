@@ -0,0 +1,77 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from Benchmarks.regressionSuite import BASELINE, benchmarks, compare, main, runSuite
+
+
+class TestRegressionSuite(unittest.TestCase):
+    """
+    The benchmark suite runs, and its compare mode flags slowdowns beyond the threshold.
+    """
+    def test_run_and_baseline(self):
+        names = ["black76.scalar", "historicalVol.10", "pv"]
+        result = runSuite(scale=0.01, repeats=1, names=names, minimumTime=0.001)
+        self.assertEqual(list(result["results"]), names)
+        self.assertTrue(all(seconds > 0 for seconds in result["results"].values()))
+        self.assertEqual(result["meta"]["scale"], 0.01)
+        with self.assertRaises(ValueError):
+            runSuite(names=["unknown"])
+        # The committed baseline covers every benchmark at scale 1, with the pinned numpy and pandas
+        with open(BASELINE) as baselineFile:
+            baseline = json.load(baselineFile)
+        self.assertEqual(set(baseline["results"]), set(benchmarks()))
+        with open("requirements.txt", encoding="utf-16") as requirements:
+            pins = dict(line.strip().split("==") for line in requirements if "==" in line)
+        self.assertEqual(baseline["meta"]["numpy"], pins["numpy"])
+        self.assertEqual(baseline["meta"]["pandas"], pins["pandas"])
+
+    def test_compare(self):
+        baseline = {"results": {"fast": 1.0, "slow": 1.0, "removed": 1.0}}
+        current = {"results": {"fast": 1.2, "slow": 2.0, "added": 5.0}}
+        rows = {row["name"]: row for row in compare(baseline, current, threshold=1.5)}
+        self.assertEqual({name: row["status"] for name, row in rows.items()},
+                         {"fast": "compared", "slow": "compared", "added": "new", "removed": "missing"})
+        self.assertFalse(rows["added"]["regressed"])
+        self.assertIsNone(rows["removed"]["current"])
+        self.assertFalse(rows["fast"]["regressed"])
+        self.assertTrue(rows["slow"]["regressed"])
+        self.assertAlmostEqual(rows["slow"]["ratio"], 2.0)
+        with self.assertRaises(ValueError):
+            compare(baseline, current, threshold=0.5)
+        with self.assertRaisesRegex(ValueError, "scale"):
+            compare({**baseline, "meta": {"scale": 1.0}}, {**current, "meta": {"scale": 0.01}})
+        with self.assertRaisesRegex(ValueError, "numpy 2.0.0, not 1.24.2"):
+            compare({**baseline, "meta": {"scale": 1.0, "numpy": "2.0.0", "pandas": "1.5.3"}},
+                    {**current, "meta": {"scale": 1.0, "numpy": "1.24.2", "pandas": "1.5.3"}})
+        with self.assertRaisesRegex(ValueError, "pandas"):
+            compare({**baseline, "meta": {"pandas": "3.0.0"}}, {**current, "meta": {"pandas": "1.5.3"}})
+
+    def test_compare_mode_exit_status(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            arguments = ["--scale", "0.01", "--repeats", "1", "--only", "black76.scalar"]
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(main(arguments + ["--save", path]), 0)
+                with open(path) as baselineFile:
+                    baseline = json.load(baselineFile)
+                self.assertEqual(main(arguments + ["--compare", path, "--threshold", "100"]), 0)
+                baseline["results"]["black76.scalar"] /= 1000 # A baseline far faster than possible
+                with open(path, "w") as baselineFile:
+                    json.dump(baseline, baselineFile)
+                self.assertEqual(main(arguments + ["--compare", path]), 1)
+                # Baselines at another scale or library version, or without a benchmark in common, are refused
+                self.assertEqual(main(["--scale", "0.02", "--repeats", "1", "--only", "black76.scalar",
+                                       "--compare", path]), 2)
+                baseline["meta"]["numpy"] = "0.0"
+                with open(path, "w") as baselineFile:
+                    json.dump(baseline, baselineFile)
+                self.assertEqual(main(arguments + ["--compare", path, "--threshold", "10000"]), 2)
+                self.assertEqual(main(["--scale", "0.01", "--repeats", "1", "--only", "historicalVol.10",
+                                       "--compare", path]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import datetime
+import unittest
+import numpy as np
+import pandas as pd
+from Calculations.ScenarioEngine import ScenarioEngine, shockGrid
+from Calculations.BatchRunner import BatchRunner
+from Calculations.OptionsCalculator import OptionsCalculator
+
+
+class TestScenarioEngine(unittest.TestCase):
+    """
+    Grid revaluations are compared with single OptionsCalculator pricings
+    under the same shocked inputs.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(6)
+        size = 40
+        self.inputs = (rng.uniform(0.1, 0.6, size), rng.uniform(0.05, 2.0, size), rng.uniform(20, 80, size),
+                       rng.uniform(20, 80, size), rng.random(size) < 0.5, rng.integers(-10, 10, size))
+        self.engine = ScenarioEngine(*self.inputs)
+        self.grid = shockGrid(forward=[-0.1, 0.0, 0.1], vol=[-0.05, 0.0, 0.05], decay=[0.0, 0.1], rate=[0.0, 0.01])
+
+    def _expected(self, position, forward, vol, decay, rate):
+        """P&L of one position under one scenario, priced one at a time"""
+        sigma, time, price, strike, isCall, quantity = (values[position] for values in self.inputs)
+        base = OptionsCalculator(sigma, time, price, strike).Black76(isCall)
+        shocked = price * (1 + forward)
+        if time - decay <= 0:
+            value = max(shocked - strike if isCall else strike - shocked, 0.0)
+        else:
+            value = OptionsCalculator(sigma + vol, time - decay, shocked, strike, 0.05 + rate).Black76(isCall)
+        return quantity * (value - base)
+
+    def test_grid(self):
+        """Every cell of the cube matches scalar pricing, including expired options"""
+        cube = ScenarioEngine.cube(self.engine.run(self.grid, chunkSize=7), self.grid)
+        self.assertEqual(cube.shape, (3, 3, 2, 2, 40))
+        for position in (0, 5, 17, 39):
+            for index in [(0, 0, 0, 0), (2, 1, 1, 1), (1, 2, 1, 0)]:
+                shocks = [level[i] for level, i in zip(self.grid.index.levels, index)]
+                self.assertAlmostEqual(cube[index + (position,)], self._expected(position, *shocks))
+        # The unshocked scenario has no P&L
+        np.testing.assert_allclose(cube[1, 1, 0, 0], 0.0, atol=1e-12)
+
+    def test_totals_and_parallel(self):
+        """Totals, chunking and the process pool all give the same numbers"""
+        full = self.engine.run(self.grid)
+        np.testing.assert_allclose(self.engine.run(self.grid, byPosition=False, chunkSize=5), full.sum(axis=1))
+        np.testing.assert_allclose(self.engine.run(self.grid, chunkSize=5, workers=2), full)
+        np.testing.assert_allclose(self.engine.run(self.grid, byPosition=False, chunkSize=5, workers=2),
+                                   full.sum(axis=1))
+
+    def test_negative_vol(self):
+        """Vol shocks that leave sigma at or below zero give NaN rather than a near zero-vol price"""
+        grid = shockGrid(vol=[-0.3, 0.0], decay=[0.0, 3.0])
+        pnl = self.engine.run(grid)
+        invalid = self.inputs[0] - 0.3 <= 0
+        self.assertTrue(invalid.any() and not invalid.all())
+        np.testing.assert_array_equal(np.isnan(pnl[0]), invalid)
+        for position in np.flatnonzero(~invalid)[:3]:
+            self.assertAlmostEqual(pnl[0, position], self._expected(position, 0.0, -0.3, 0.0, 0.0))
+        # Options which have expired are worth their intrinsic value whatever their vol
+        self.assertTrue(np.isfinite(pnl[1]).all())
+        self.assertTrue(np.isnan(self.engine.run(grid, byPosition=False)[0]))
+
+    def test_from_priced(self):
+        """An engine built from BatchRunner output keeps the valid positions"""
+        rng = np.random.default_rng(3)
+        marketData = pd.DataFrame({"HH": 3 * np.exp(np.cumsum(rng.normal(0, 0.02, 100)))})
+        positions = pd.DataFrame({"ticker": ["HH", "HH", "WTI"], "deliveryMonth": ["2023-08", "2023-09", "2023-08"],
+                                  "strike": [3.0, 2.5, 50.0], "isCall": ["Yes", "No", "Yes"], "quantity": [2, -1, 1]})
+        priced = BatchRunner(marketData, workers=1, valuationDate=datetime.date(2023, 2, 7)).priceFrame(positions)
+        engine = ScenarioEngine.fromPriced(priced)
+        self.assertEqual(engine.size, 2)
+        np.testing.assert_allclose(engine.positions["pv"], priced["pv"][:2])
+
+    def test_errors(self):
+        """Unknown shocks are rejected"""
+        with self.assertRaises(ValueError):
+            self.engine.run(pd.DataFrame({"spot": [0.1]}))
+
+
+if __name__ == '__main__':
+    unittest.main()
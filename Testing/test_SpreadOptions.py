@@ -0,0 +1,112 @@
+import math
+import unittest
+import numpy as np
+import pandas as pd
+from Calculations.ForwardCurve import ForwardCurve
+from Calculations.SpreadOptions import CovarianceEngine, calendarSpread, kirkSpread, spreadMonteCarlo
+from Calculations.VolatilityCalculations import historicalVol
+from Calculations.Numerics import normCdf
+
+
+class TestSpreadOptions(unittest.TestCase):
+    """
+    Incremental covariance against a full recomputation, and Kirk's
+    approximation against Margrabe's formula and Monte Carlo.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(21)
+        days = 300
+        normals = rng.standard_normal((days, 3))
+        mixing = np.linalg.cholesky(np.array([[1.0, 0.6, 0.2], [0.6, 1.0, 0.1], [0.2, 0.1, 1.0]]))
+        returns = normals @ mixing.T * np.array([0.03, 0.02, 0.01])
+        prices = np.array([3.0, 80.0, 70.0]) * np.exp(np.cumsum(returns, axis=0))
+        self.df = pd.DataFrame({"DATE": pd.date_range("2022-01-03", periods=days, freq="B"),
+                                "HH": prices[:, 0], "BRN": prices[:, 1], "WTI": prices[:, 2]})
+
+    def _expected(self, df, tickers):
+        """Annualized population covariance recomputed from scratch"""
+        returns = np.diff(np.log(df[tickers].to_numpy()), axis=0)
+        return np.cov(returns, rowvar=False, bias=True) * 260
+
+    def test_seed(self):
+        engine = CovarianceEngine()
+        engine.seed(self.df, ["HH", "BRN"])
+        np.testing.assert_allclose(engine.covariance(), self._expected(self.df, ["HH", "BRN"]), rtol=1e-12)
+        self.assertAlmostEqual(engine.vol("HH"), historicalVol(self.df, "HH"), places=12)
+        self.assertAlmostEqual(engine.lastPrice("BRN"), self.df["BRN"].iloc[-1], places=10)
+        self.assertEqual(engine.correlation()[0, 0], 1.0)
+
+    def test_updates(self):
+        """Day-by-day updates and an added ticker agree with seeding on the same data"""
+        for window in (None, 50):
+            engine = CovarianceEngine(window)
+            engine.seed(self.df.iloc[:200], ["HH", "BRN"])
+            for row in self.df.iloc[200:].itertuples():
+                engine.update(row.DATE, {"HH": row.HH, "BRN": row.BRN})
+            engine.addTicker(self.df, "WTI")
+            tail = self.df if window is None else self.df.iloc[-(window + 1):]
+            np.testing.assert_allclose(engine.covariance(), self._expected(tail, ["HH", "BRN", "WTI"]),
+                                       rtol=1e-9, atol=1e-14)
+            self.assertEqual(engine.count, len(tail) - 1)
+
+    def test_errors(self):
+        engine = CovarianceEngine(20)
+        with self.assertRaises(ValueError):
+            engine.addTicker(self.df, "WTI")
+        engine.seed(self.df, ["HH"])
+        with self.assertRaises(ValueError):
+            engine.update(self.df["DATE"].iloc[-1], {"HH": 3.0})
+        with self.assertRaises(ValueError):
+            engine.update(pd.Timestamp("2030-01-01"), {"BRN": 3.0})
+        with self.assertRaises(ValueError):
+            engine.addTicker(self.df.iloc[:-5], "BRN")
+        with self.assertRaises(ValueError):
+            engine.spreadOption("HH", "XX", 0.0, 0.5)
+
+    def test_degenerate_correlation(self):
+        """Perfectly correlated tickers price despite rounding, and a flat ticker is rejected"""
+        for seed in range(50):
+            prices = 80 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.02, 60)))
+            df = pd.DataFrame({"DATE": pd.date_range("2023-01-02", periods=60, freq="B"),
+                               "BRN": prices, "WTI": prices * 0.9, "FLAT": 50.0})
+            engine = CovarianceEngine()
+            engine.seed(df, ["BRN", "WTI", "FLAT"])
+            self.assertTrue(np.all(np.isfinite(engine.spreadOption("BRN", "WTI", 5.0, 0.5))))
+        with self.assertRaisesRegex(ValueError, "sigma"):
+            engine.spreadOption("BRN", "FLAT", 5.0, 0.5)
+
+    def test_kirk(self):
+        sigma1, sigma2, rho, time, f1, f2, rate = 0.35, 0.25, 0.6, 0.75, 82.0, 78.0, 0.03
+        # With a zero strike Kirk's approximation is Margrabe's exact formula
+        sigma = math.sqrt(sigma1 ** 2 - 2 * rho * sigma1 * sigma2 + sigma2 ** 2)
+        d1 = (math.log(f1 / f2) + sigma * sigma * time / 2) / (sigma * math.sqrt(time))
+        margrabe = math.exp(-rate * time) * (f1 * normCdf(d1) - f2 * normCdf(d1 - sigma * math.sqrt(time)))
+        self.assertAlmostEqual(float(kirkSpread(sigma1, sigma2, rho, time, f1, f2, 0.0, True, rate)), margrabe, 10)
+
+        strikes = np.array([-5.0, 0.0, 2.0, 4.0, 10.0])
+        calls = kirkSpread(sigma1, sigma2, rho, time, f1, f2, strikes, True, rate)
+        puts = kirkSpread(sigma1, sigma2, rho, time, f1, f2, strikes, False, rate)
+        np.testing.assert_allclose(calls - puts, math.exp(-rate * time) * (f1 - f2 - strikes), atol=1e-10)
+        self.assertTrue(np.all(np.diff(calls) < 0))
+        simulated = spreadMonteCarlo(sigma1, sigma2, rho, time, f1, f2, strikes, True, rate, paths=400_000, seed=3)
+        self.assertTrue(np.all(np.abs(simulated["pv"] - calls) < 4 * simulated["stdError"] + 0.02))
+        with self.assertRaises(ValueError):
+            kirkSpread(sigma1, sigma2, rho, time, f1, f2, -f2, True, rate)
+
+    def test_engine_and_calendar_spread(self):
+        engine = CovarianceEngine()
+        engine.seed(self.df, ["BRN", "WTI"])
+        strikes = np.linspace(5, 15, 5)
+        kirk = engine.spreadOption("BRN", "WTI", strikes, 0.5)
+        simulated = engine.spreadOption("BRN", "WTI", strikes, 0.5, method="montecarlo", seed=1)
+        self.assertTrue(np.all(np.abs(simulated["pv"] - kirk) < 4 * simulated["stdError"] + 0.02))
+
+        curve = ForwardCurve(["2024-03", "2024-06"], [80.0, 76.0], valuationDate=pd.Timestamp("2023-09-01").date())
+        spread = calendarSpread(curve, "2024-03", "2024-06", 0.3, 0.28, 0.95, 0.4, [0.0, 4.0])
+        np.testing.assert_allclose(spread, kirkSpread(0.3, 0.28, 0.95, 0.4, 80.0, 76.0, [0.0, 4.0]))
+        with self.assertRaises(ValueError):
+            calendarSpread(curve, "2024-03", "2024-06", 0.3, 0.28, 0.95, 1.0, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import asyncio
+import datetime
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from StreamingData import TickPipeline, socketLines, tailCsv
+from Calculations.OptionsCalculator import batchBlack76
+from Calculations.VolatilityCalculations import historicalVol
+from Calendar.CalendarComputations import timeBetween
+
+
+class TestStreamingData(unittest.TestCase):
+    """
+    The streaming pipeline fed from a csv file, a growing csv file and a socket.
+    Streamed prices must give the same vols and PVs as the full history.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        dates = pd.date_range("2023-01-02", periods=60, freq="B")
+        self.df = pd.DataFrame({"DATE": dates.strftime("%Y-%m-%d"),
+                                "HH": 3 * np.exp(np.cumsum(rng.normal(0, 0.02, 60))),
+                                "BRN": 80 * np.exp(np.cumsum(rng.normal(0, 0.01, 60)))})
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "ticks.csv")
+        self.valuationDate = datetime.date(2023, 1, 2)
+        self.expiry = datetime.date(2023, 6, 30)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _pipeline(self, **options) -> TickPipeline:
+        """Pipeline seeded with the first 20 days and subscribed to two HH options"""
+        pipeline = TickPipeline(valuationDate=self.valuationDate, **options)
+        pipeline.seed(self.df.iloc[:20], ["HH", "BRN"])
+        pipeline.subscribe("HH", 3.0, True, self.expiry)
+        pipeline.subscribe("HH", 2.8, False, self.expiry)
+        return pipeline
+
+    def _check(self, pipeline: TickPipeline):
+        """Latest quotes agree with pricing off the full history"""
+        sigma = historicalVol(self.df, "HH")
+        price = self.df["HH"].iloc[-1]
+        time_ = timeBetween(self.valuationDate, self.expiry)
+        self.assertAlmostEqual(pipeline.quote(0).sigma, sigma)
+        self.assertAlmostEqual(pipeline.quote(0).pv, float(batchBlack76(sigma, time_, price, 3.0, True)))
+        self.assertAlmostEqual(pipeline.quote(1).pv, float(batchBlack76(sigma, time_, price, 2.8, False)))
+        self.assertEqual(len(pipeline.series("HH")), 40)
+        self.assertGreater(pipeline.latencyStats()["updates"], 0)
+
+    def test_file(self):
+        """Lines already in a file"""
+        self.df.iloc[20:].to_csv(self.path, index=False)
+        pipeline = self._pipeline()
+        asyncio.run(pipeline.run(tailCsv(self.path, follow=False)))
+        self._check(pipeline)
+
+    def test_tail(self):
+        """Lines appended while the file is followed, including a line written in two parts"""
+        self.df.iloc[20:40].to_csv(self.path, index=False)
+        rest = self.df.iloc[40:].to_csv(index=False, header=False)
+        pipeline = self._pipeline()
+
+        async def scenario():
+            task = asyncio.create_task(pipeline.run(tailCsv(self.path, pollInterval=0.001)))
+            await asyncio.sleep(0.05)
+            with open(self.path, "a") as target:
+                target.write(rest[:5])
+                target.flush()
+                await asyncio.sleep(0.01)
+                target.write(rest[5:])
+            while len(pipeline.series("HH")) < 40:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.01)
+            task.cancel()
+
+        asyncio.run(scenario())
+        self._check(pipeline)
+
+    def test_socket(self):
+        """Lines sent over a local socket"""
+        text = self.df.iloc[20:].to_csv(index=False).encode()
+
+        async def scenario():
+            async def send(reader, writer):
+                for line in text.splitlines(keepends=True):
+                    writer.write(line)
+                    await writer.drain()
+                writer.close()
+            server = await asyncio.start_server(send, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            pipeline = self._pipeline(queueSize=1)
+            await pipeline.run(socketLines("127.0.0.1", port))
+            server.close()
+            return pipeline
+
+        self._check(asyncio.run(scenario()))
+
+    def test_bad_prints(self):
+        """A zero price and a garbage line are skipped without stalling a pipeline with small queues"""
+        lines = self.df.iloc[20:].to_csv(index=False).splitlines(keepends=True)
+        lines[5:5] = ["2023-02-01,0.0,80.1\n", "2023-02-01,abc,\n"]
+
+        async def source():
+            for line in lines:
+                yield line
+
+        pipeline = self._pipeline(queueSize=2)
+        asyncio.run(asyncio.wait_for(pipeline.run(source()), timeout=10))
+        self.assertEqual(pipeline.latencyStats()["rejected"], 2)
+        # The BRN print on the line with a zero HH price is kept, and the missing one is a gap
+        self.assertEqual(len(pipeline.series("BRN")), 42)
+        self.assertTrue(np.isnan(pipeline.series("BRN")["BRN"].iloc[5]))
+        self._check(pipeline)
+
+    def test_missing_prints(self):
+        """Missing prices are gaps in the stream, as they are in the batch history"""
+        df = self.df.copy()
+        df.loc[[25, 26, 41], "HH"] = np.nan
+        df.iloc[20:].to_csv(self.path, index=False)
+        pipeline = TickPipeline(valuationDate=self.valuationDate)
+        pipeline.seed(df.iloc[:20], ["HH"])
+        pipeline.subscribe("HH", 3.0, True, self.expiry)
+        asyncio.run(pipeline.run(tailCsv(self.path, follow=False)))
+        self.assertAlmostEqual(pipeline.quote(0).sigma, historicalVol(df, "HH"))
+        self.assertEqual(pipeline.latencyStats()["rejected"], 0)
+        self.assertEqual(int(pipeline.series("HH")["HH"].isna().sum()), 3)
+
+    def test_bounded_history(self):
+        """Only the last prints and latencies are kept; the update count covers every quote"""
+        self.df.iloc[20:].to_csv(self.path, index=False)
+        pipeline = self._pipeline(history=5, queueSize=1)
+        asyncio.run(pipeline.run(tailCsv(self.path, follow=False)))
+        self.assertEqual(len(pipeline.series("HH")), 5)
+        self.assertEqual(pipeline.series("HH")["DATE"].iloc[-1], self.df["DATE"].iloc[-1])
+        stats = pipeline.latencyStats()
+        self.assertEqual(stats["window"], 5)
+        self.assertGreater(stats["updates"], 5)
+
+    def test_failed_stage(self):
+        """A stage that fails stops the pipeline with its error instead of leaving it waiting"""
+        self.df.iloc[20:].to_csv(self.path, index=False)
+        pipeline = self._pipeline(queueSize=1)
+
+        def fail(quotes):
+            raise RuntimeError("subscriber failed")
+
+        pipeline.onQuotes(fail)
+        with self.assertRaisesRegex(RuntimeError, "subscriber failed"):
+            asyncio.run(asyncio.wait_for(pipeline.run(tailCsv(self.path, follow=False)), timeout=10))
+
+    def test_subscribe_errors(self):
+        """Contracts must have a positive strike and time to expiry"""
+        pipeline = TickPipeline(valuationDate=self.valuationDate)
+        with self.assertRaises(ValueError):
+            pipeline.subscribe("HH", -1.0, True, self.expiry)
+        with self.assertRaises(ValueError):
+            pipeline.subscribe("HH", 3.0, True, datetime.date(2022, 12, 30))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import datetime
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from Calculations.BatchRunner import BatchRunner
+from Calculations.OptionsCalculator import batchBlack76Greeks
+from Calculations.ValuationStore import ValuationStore
+
+
+class TestValuationStore(unittest.TestCase):
+    """
+    Stored valuations match BatchRunner, and recompute reprices only the
+    contracts whose inputs changed.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(23)
+        dates = pd.date_range("2023-01-02", periods=130, freq="B")
+        self.df = pd.DataFrame({"DATE": dates,
+                                "HH": 3 * np.exp(np.cumsum(rng.normal(0, 0.03, 130))),
+                                "BRN": 80 * np.exp(np.cumsum(rng.normal(0, 0.02, 130)))})
+        self.asOf = datetime.date(2023, 6, 16)
+        self.book = pd.DataFrame({"ticker": ["HH", "HH", "BRN", "BRN", "WTI"],
+                                  "deliveryMonth": ["2023-09", "2024-01", "2023-10", "2024-03", "2023-12"],
+                                  "strike": [3.0, 3.5, 80.0, 75.0, 70.0],
+                                  "isCall": ["Yes", "No", True, False, True],
+                                  "quantity": [10, -5, 2, 1, 1]})
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ValuationStore(os.path.join(self.directory.name, "valuations.sqlite"))
+        self.store.addContracts(self.book)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_matches_batch_runner(self):
+        self.assertEqual(self.store.recompute(self.df, self.asOf), {"contracts": 5, "repriced": 5, "unchanged": 0})
+        stored = self.store.valuations(self.asOf)
+        history = self.df[self.df["DATE"] <= pd.Timestamp(self.asOf)]
+        expected = BatchRunner(history, workers=1, valuationDate=self.asOf).priceFrame(
+            self.book.assign(isCall=[True, False, True, False, True]))
+        np.testing.assert_allclose(stored["pv"], expected["pv"], rtol=1e-12)
+        np.testing.assert_allclose(stored["value"], expected["value"], rtol=1e-12)
+        greeks = batchBlack76Greeks(expected["sigma"][:4], expected["time"][:4], expected["forward"][:4],
+                                    expected["strike"][:4], [True, False, True, False])
+        np.testing.assert_allclose(stored["delta"][:4], greeks["delta"], rtol=1e-12)
+        self.assertEqual(stored["error"].iloc[4], "Currently there is no pricing available for this ticker")
+        self.assertTrue(np.isnan(stored["pv"].iloc[4]))
+        self.assertEqual(self.store.asOfDates(), [self.asOf])
+
+    def test_incremental(self):
+        self.store.recompute(self.df, self.asOf)
+        # Nothing changed
+        self.assertEqual(self.store.recompute(self.df, self.asOf)["repriced"], 0)
+        # Prices after the as-of date are not inputs
+        later = self.df.copy()
+        later.loc[later.index[-1], "HH"] *= 2
+        self.assertEqual(self.store.recompute(later, self.asOf)["repriced"], 0)
+        # A corrected BRN price reprices only the BRN contracts
+        corrected = self.df.copy()
+        corrected.loc[corrected["DATE"] == pd.Timestamp(self.asOf), "BRN"] *= 1.01
+        before = self.store.valuations(self.asOf)
+        self.assertEqual(self.store.recompute(corrected, self.asOf)["repriced"], 2)
+        after = self.store.valuations(self.asOf)
+        changed = before["pv"].to_numpy() != after["pv"].to_numpy()
+        np.testing.assert_array_equal(changed[:4], [False, False, True, True])
+        # A new vol window reprices everything; a new contract is priced alone
+        self.assertEqual(self.store.recompute(corrected, self.asOf, volWindow=60)["repriced"], 5)
+        self.store.addContracts(pd.DataFrame({"ticker": ["HH"], "deliveryMonth": ["2023-11"], "strike": [3.2],
+                                              "isCall": [True]}))
+        self.assertEqual(self.store.recompute(corrected, self.asOf, volWindow=60),
+                         {"contracts": 6, "repriced": 1, "unchanged": 5})
+        # Changing a quantity changes the value without repricing
+        self.store.addContracts(self.book.assign(quantity=[20, -5, 2, 1, 1]))
+        self.assertEqual(self.store.recompute(corrected, self.asOf, volWindow=60)["repriced"], 0)
+        first = self.store.valuations(self.asOf).iloc[0]
+        self.assertAlmostEqual(first["value"], 20 * first["pv"])
+
+    def test_queries(self):
+        for asOf in (datetime.date(2023, 6, 15), self.asOf):
+            self.store.recompute(self.df, asOf)
+        self.assertEqual(len(self.store.asOfDates()), 2)
+        self.assertEqual(list(self.store.valuations(self.asOf, ticker="HH")["strike"]), [3.0, 3.5])
+        expiring = self.store.valuations(self.asOf, expiryFrom=datetime.date(2023, 8, 1),
+                                         expiryTo=datetime.date(2023, 8, 31))
+        self.assertEqual(list(expiring["deliveryMonth"]), ["2023-09", "2023-10"])
+        plan = self.store.connection.execute("EXPLAIN QUERY PLAN SELECT * FROM valuations WHERE asOf = ? AND ticker = ?",
+                                             ("2023-06-16", "HH")).fetchall()
+        self.assertIn("valuationsByTicker", str(plan))
+        with self.assertRaises(ValueError):
+            self.store.addContracts(pd.DataFrame({"ticker": ["HH"], "deliveryMonth": ["2023-11"], "strike": [-1.0],
+                                                  "isCall": [True]}))
+        # Missing call flags and quantities are rejected rather than stored as puts or NULL
+        for isCall, quantity in ((None, 1.0), (np.nan, 1.0), ("Yes", np.nan)):
+            with self.assertRaises(ValueError):
+                self.store.addContracts(pd.DataFrame({"ticker": ["HH"], "deliveryMonth": ["2023-11"], "strike": [3.0],
+                                                      "isCall": [isCall], "quantity": [quantity]}))
+        # So are missing tickers and delivery months and infinite strikes
+        for ticker, month, strike in ((None, "2023-11", 3.0), (np.nan, "2023-11", 3.0), ("HH", None, 3.0),
+                                      ("HH", np.nan, 3.0), ("HH", "2023-11", np.inf)):
+            with self.assertRaises(ValueError):
+                self.store.addContracts(pd.DataFrame({"ticker": [ticker], "deliveryMonth": [month],
+                                                      "strike": [strike], "isCall": [True]}))
+        self.assertEqual(len(self.store.contracts()), 5)
+        with self.assertRaisesRegex(ValueError, "no prices on or before"):
+            self.store.recompute(self.df, datetime.date(2022, 12, 30))
+        # The store persists across connections
+        reopened = ValuationStore(self.store.path)
+        self.assertEqual(len(reopened.valuations(self.asOf)), 5)
+        reopened.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
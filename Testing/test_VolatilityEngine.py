@@ -0,0 +1,93 @@
+import unittest
+import numpy as np
+import pandas as pd
+from Calculations.VolatilityCalculations import historicalVol
+from Calculations.VolatilityEngine import VolatilityEngine, RollingVolatility, EwmaVolatility, DAYS_IN_YEAR
+
+
+class TestVolatilityEngine(unittest.TestCase):
+    """
+    The incremental estimators are compared with direct NumPy computations
+    on the same prices, both when fed print by print and when seeded.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.prices = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, 300)))
+        self.df = pd.DataFrame({"HH": self.prices})
+        self.logReturns = np.diff(np.log(self.prices))
+
+    def test_full_history_matches_historicalVol(self):
+        """Without a window the engine reproduces historicalVol"""
+        engine = VolatilityEngine(windows=(None,), decays=())
+        for price in self.prices:
+            engine.update("HH", price)
+        self.assertAlmostEqual(engine.vol("HH"), historicalVol(self.df, "HH"), 10)
+
+    def test_rolling_window(self):
+        """Rolling estimates equal the standard deviation of the last window returns"""
+        engine = VolatilityEngine(windows=(20, 60), decays=())
+        for price in self.prices:
+            engine.update("HH", price)
+        for window in (20, 60):
+            expected = np.std(self.logReturns[-window:]) * np.sqrt(DAYS_IN_YEAR)
+            self.assertAlmostEqual(engine.vol("HH", window), expected, 10)
+
+    def test_ewma(self):
+        """EWMA recursion against a direct loop"""
+        estimator = EwmaVolatility(0.94)
+        variance = self.logReturns[0] ** 2
+        for logReturn in self.logReturns[1:]:
+            variance = 0.94 * variance + 0.06 * logReturn ** 2
+        for logReturn in self.logReturns:
+            estimator.add(logReturn)
+        self.assertAlmostEqual(estimator.value, np.sqrt(variance * DAYS_IN_YEAR), 10)
+
+    def test_seed_matches_updates(self):
+        """Seeding from a dataframe and then updating equals updating throughout"""
+        seeded = VolatilityEngine()
+        seeded.seed(self.df.iloc[:200], "HH")
+        streamed = VolatilityEngine()
+        for price in self.prices[:200]:
+            streamed.update("HH", price)
+        for price in self.prices[200:]:
+            seeded.update("HH", price)
+            streamed.update("HH", price)
+        for window in seeded.windows:
+            self.assertAlmostEqual(seeded.vol("HH", window), streamed.vol("HH", window), 10)
+        self.assertAlmostEqual(seeded.vol("HH", decay=0.94), streamed.vol("HH", decay=0.94), 10)
+
+    def test_gaps(self):
+        """Missing prices drop the returns next to them, as in historicalVol, whether seeded or streamed"""
+        prices = self.prices.copy()
+        prices[[0, 50, 51, 120, 199]] = np.nan
+        df = pd.DataFrame({"HH": prices})
+        seeded = VolatilityEngine(windows=(None, 20), decays=())
+        seeded.seed(df.iloc[:200], "HH")
+        streamed = VolatilityEngine(windows=(None, 20), decays=())
+        for price in prices[:200]:
+            streamed.update("HH", price)
+        expected = historicalVol(df.iloc[:200], "HH")
+        self.assertAlmostEqual(seeded.vol("HH"), expected, 10)
+        self.assertAlmostEqual(streamed.vol("HH"), expected, 10)
+        for price in prices[200:]:
+            seeded.update("HH", price)
+            streamed.update("HH", price)
+        expected = historicalVol(df, "HH")
+        for engine in (seeded, streamed):
+            self.assertAlmostEqual(engine.vol("HH"), expected, 10)
+            self.assertEqual(engine.lastPrice("HH"), prices[-1])
+        self.assertAlmostEqual(seeded.vol("HH", 20), streamed.vol("HH", 20), 10)
+
+    def test_errors(self):
+        """Bad windows, unknown tickers and non-positive prices are rejected"""
+        with self.assertRaises(ValueError):
+            RollingVolatility(1)
+        engine = VolatilityEngine()
+        with self.assertRaises(ValueError):
+            engine.vol("BRN")
+        with self.assertRaises(ValueError):
+            engine.update("BRN", -1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
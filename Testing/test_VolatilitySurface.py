@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+from Calculations.VolatilitySurface import VolatilitySurface, sviTotalVariance
+from Calculations.OptionsCalculator import OptionsCalculator
+
+
+class TestVolatilitySurface(unittest.TestCase):
+    """
+    Smiles are fitted to vols generated from known SVI parameters, so the fit
+    should reproduce them, and interpolated queries are checked against the slices.
+    """
+    def setUp(self):
+        self.forward = 80.0
+        self.strikes = self.forward * np.exp(np.linspace(-0.5, 0.5, 21))
+        self.slices = {0.25: np.array([0.01, 0.04, -0.4, 0.02, 0.15]),
+                       1.0: np.array([0.04, 0.08, -0.3, 0.05, 0.25])}
+        self.surface = VolatilitySurface()
+        for time, parameters in self.slices.items():
+            self.surface.fitExpiry(time, self.forward, self.strikes, self._vols(parameters, time))
+
+    def _vols(self, parameters, time):
+        """Implied vols of an SVI slice at the test strikes"""
+        return np.sqrt(sviTotalVariance(parameters, np.log(self.strikes / self.forward)) / time)
+
+    def test_fit(self):
+        """Fitted smiles reproduce the quoted vols"""
+        for time, parameters in self.slices.items():
+            np.testing.assert_allclose(self.surface.sigma(self.strikes, time), self._vols(parameters, time), atol=1e-6)
+        self.assertTrue(np.all(self.surface.fitErrors < 1e-6))
+
+    def test_interpolation(self):
+        """Total variance is linear in time between expiries and vol is flat outside them"""
+        strike = 90.0
+        k = np.log(strike / self.forward)
+        short, long = (float(sviTotalVariance(self.slices[time], k)) for time in (0.25, 1.0))
+        expected = np.sqrt((short + (long - short) / 3) / 0.5)
+        self.assertAlmostEqual(float(self.surface.sigma(strike, 0.5)), expected, places=6)
+        self.assertAlmostEqual(float(self.surface.sigma(strike, 0.1)), float(self.surface.sigma(strike, 0.25)))
+        self.assertAlmostEqual(float(self.surface.sigma(strike, 3.0)), float(self.surface.sigma(strike, 1.0)))
+        grid = self.surface.sigma(self.strikes[:, None], np.array([0.25, 0.5, 1.0]))
+        self.assertEqual(grid.shape, (21, 3))
+
+    def test_refit(self):
+        """Refitting one expiry replaces it and leaves the others unchanged"""
+        before = self.surface.sigma(self.strikes, 0.25)
+        shifted = np.array([0.06, 0.08, -0.3, 0.05, 0.25])
+        self.surface.fitExpiry(1.0, self.forward, self.strikes, self._vols(shifted, 1.0))
+        self.assertEqual(len(self.surface.expiries), 2)
+        np.testing.assert_allclose(self.surface.sigma(self.strikes, 0.25), before)
+        np.testing.assert_allclose(self.surface.sigma(self.strikes, 1.0), self._vols(shifted, 1.0), atol=1e-6)
+        self.surface.removeExpiry(0.25)
+        np.testing.assert_allclose(self.surface.sigma(self.strikes, 0.25), self._vols(shifted, 1.0), atol=1e-6)
+
+    def test_options_calculator(self):
+        """OptionsCalculator can take its sigma from the surface"""
+        option = OptionsCalculator.fromSurface(self.surface, 0.5, self.forward, 90.0)
+        self.assertAlmostEqual(option.sigma, float(self.surface.sigma(90.0, 0.5)))
+        self.assertGreater(option.Black76(True), 0)
+
+    def test_errors(self):
+        """Too few quotes and empty surfaces are rejected"""
+        with self.assertRaises(ValueError):
+            self.surface.fitExpiry(0.5, self.forward, self.strikes[:3], [0.2, 0.2, 0.2])
+        with self.assertRaises(ValueError):
+            VolatilitySurface().sigma(80.0, 0.5)
+        with self.assertRaises(ValueError):
+            self.surface.removeExpiry(0.7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import datetime
+import numpy as np
+from Calendar.CalendarComputations import timeBetween
+from Calendar.YearFraction import YearFractionIndex
+
+
+class TestYearFraction(unittest.TestCase):
+    """
+    The cumulative index must agree with np.busday_count, which is
+    what timeBetween used before the index existed, on forward counts.
+    """
+    def setUp(self):
+        rng = np.random.default_rng(8)
+        first = np.datetime64("2000-01-01")
+        self.dates_1 = first + rng.integers(0, 40 * 365, 500)
+        self.dates_2 = first + rng.integers(0, 40 * 365, 500)
+
+    def test_bus260(self):
+        """BUS/260 matches forward busday_count / 260 for many pairs, and backward counts are minus forward ones"""
+        index = YearFractionIndex("BUS/260")
+        dates_1, dates_2 = np.minimum(self.dates_1, self.dates_2), np.maximum(self.dates_1, self.dates_2)
+        expected = np.busday_count(dates_1, dates_2) / 260
+        np.testing.assert_allclose(index.yearFraction(dates_1, dates_2), expected)
+        np.testing.assert_allclose(index.yearFraction(dates_2, dates_1), -expected)
+
+    def test_backward_counts(self):
+        """Hand-computed counts, the same in the index and in the fallback outside it"""
+        # Sat Jan 6 to Wed Jan 10, 2024: Mon 8 and Tue 9; Mon Jan 8 to Mon Jan 15: five weekdays
+        pairs = [("2024-01-06", "2024-01-10", 2), ("2024-01-08", "2024-01-15", 5), ("2024-01-09", "2024-01-09", 0)]
+        index = YearFractionIndex("BUS/260")
+        fallback = YearFractionIndex("BUS/260", 2000, 2010)
+        for first, last, count in pairs:
+            date_1, date_2 = datetime.date.fromisoformat(first), datetime.date.fromisoformat(last)
+            self.assertEqual(index.dayCount(date_1, date_2), count)
+            self.assertEqual(index.dayCount(date_2, date_1), -count)
+            self.assertEqual(fallback.busdayCount(date_1, date_2), count)
+            self.assertEqual(fallback.busdayCount(date_2, date_1), -count)
+            self.assertAlmostEqual(timeBetween(date_2, date_1), -count / 260)
+
+    def test_bus252_holidays(self):
+        """BUS/252 skips exchange holidays: Jan 1, 2024 was a Monday holiday"""
+        index = YearFractionIndex("BUS/252")
+        self.assertEqual(index.dayCount(np.datetime64("2023-12-29"), np.datetime64("2024-01-03")), 2)
+        self.assertAlmostEqual(index.yearFraction(datetime.date(2023, 1, 1), datetime.date(2024, 1, 1)), 250 / 252)
+
+    def test_act365(self):
+        """ACT/365 counts calendar days"""
+        index = YearFractionIndex("ACT/365")
+        self.assertAlmostEqual(index.yearFraction(datetime.date(2023, 2, 7), datetime.date(2024, 2, 7)), 1.0)
+
+    def test_timeBetween(self):
+        """timeBetween keeps its business-day behaviour, including outside the index range"""
+        date_1, date_2 = datetime.date(2023, 2, 7), datetime.date(2023, 8, 31)
+        self.assertAlmostEqual(timeBetween(date_1, date_2), np.busday_count(date_1, date_2) / 260)
+        date_3 = datetime.date(2150, 1, 1)
+        self.assertAlmostEqual(timeBetween(date_1, date_3), np.busday_count(date_1, date_3) / 260)
+
+    def test_timeBetween_holidays_outside_index(self):
+        """BUS/252 keeps exchange holidays for dates beyond the index: Jan 1, 2085 is a Monday holiday"""
+        date_1, date_2 = datetime.date(2084, 12, 28), datetime.date(2085, 1, 3)
+        self.assertAlmostEqual(timeBetween(date_1, date_2, "BUS/252"), 3 / 252)
+        # The same count inside and outside the index
+        inside = timeBetween(datetime.date(2023, 12, 29), datetime.date(2024, 1, 3), "BUS/252")
+        outside = YearFractionIndex("BUS/252", 2000, 2010).busdayCount(datetime.date(2023, 12, 29),
+                                                                          datetime.date(2024, 1, 3)) / 252
+        self.assertAlmostEqual(inside, outside)
+
+    def test_errors(self):
+        """Unknown conventions and out-of-range dates are rejected"""
+        with self.assertRaises(ValueError):
+            YearFractionIndex("30/360")
+        with self.assertRaises(ValueError):
+            YearFractionIndex("ACT/365", 2000, 2001).yearFraction(datetime.date(1999, 1, 1), datetime.date(2000, 6, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
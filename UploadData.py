@@ -5,12 +5,18 @@ However, this code provides flexibility as to how far back in history, the user
 Those rows are then selected and returned as a dataframe.
 Furthermore, the only prices returned are those from the ticker requested by the user.
 This data is then stored in the flask directory.
+The csv is parsed once and cached by MarketData.defaultStore, and the stored
+copy is only rewritten when the selection differs from the previous upload.
 """
 import datetime
 import pandas as pd
+from MarketData import defaultStore, file
+from Data.ColumnarStore import ColumnarStore
 
-file = "CombinedEnergyFutures.csv" # Same directory so full path not needed
 tickers = ["HH", "BRN"]
+uploadFile = "Ticker Data.csv"
+columnarFile = "EnergyFutures.columnar" # Written by Data/CreateCsv.py
+_lastUpload = None # (ticker, date, data version) of the data currently in uploadFile
 
 def dataFromStartDate(ticker: str, date: datetime.date = (datetime.datetime.now() - datetime.timedelta(days=180)).date()) -> pd.DataFrame:
     """
@@ -27,8 +33,25 @@ def dataFromStartDate(ticker: str, date: datetime.date = (datetime.datetime.now(
         print("This ticker is not currently available")
         return pd.DataFrame()
 
-    fullData = pd.read_csv(file)
-    recentData = fullData[fullData['DATE'] >= date.strftime('%Y-%m-%d')]
-    tickerData = recentData[['DATE', ticker]]
-    tickerData.to_csv("Ticker Data.csv")
+    global _lastUpload
+    tickerData = defaultStore.slice(ticker, date)
+    upload = (ticker, date, defaultStore.version(file))
+    if upload != _lastUpload:
+        tickerData.to_csv(uploadFile)
+        _lastUpload = upload
     return tickerData
+
+def columnarDataFromStartDate(ticker: str, date: datetime.date = (datetime.datetime.now() - datetime.timedelta(days=180)).date(),
+                              directory: str = columnarFile) -> pd.DataFrame:
+    """
+    The same selection as dataFromStartDate but read from the columnar
+    binary store.  The prices are memory-mapped and not copied, and nothing
+    is written to disk.
+    :param ticker: string indicating commodity indicated by the user
+    :param date: datetime.date for the earliest data requested by the user
+    :param directory: columnar store directory
+    :return: dataframe with DATE and ticker columns
+    """
+    if ticker not in tickers:
+        raise ValueError("This ticker is not currently available")
+    return ColumnarStore(directory).frame([ticker], date)
@@ -1,7 +1,19 @@
-from flask import Flask, render_template, request
-import pandas as pd
-from UploadData import dataFromStartDate
-from Calculations.PVCalculator import PV
+import datetime
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Optional, Tuple
+from flask import Flask, Response, g, jsonify, render_template, request
+from MarketData import defaultStore
+from Calculations.PricingCache import cachedPV, pvCache
+from Calendar.ExpiryCalendar import defaultCalendar
+from Calendar.YearFraction import defaultYearFraction
+from Instrumentation import Profiler, metrics
+
+# pandas and the batch runner are imported on first use (or by warmUp) so that the server starts quickly
+if TYPE_CHECKING:
+    import pandas as pd
+    from Calculations.BatchRunner import BatchRunner
 
 Flask_App = Flask(__name__)
 
@@ -21,6 +33,30 @@ user, or even allow the user to input it.
 """
 monthsBack = {"BRN": 2, "HH": 1}
 
+# Fraction of requests profiled with cProfile, none by default
+profiler = Profiler(sampleRate=float(os.environ.get("OPTION_PRICING_PROFILE_RATE", "0")))
+
+@Flask_App.before_request
+def _startRequest():
+    """Start timing, and profiling if this request is sampled"""
+    g.started = time.perf_counter() if metrics.enabled else None
+    g.profile = profiler.start()
+
+@Flask_App.after_request
+def _finishRequest(response):
+    """Record the latency and status of the request under its endpoint"""
+    endpoint = request.endpoint or "unknown"
+    started = g.pop("started", None)
+    if started is not None:
+        metrics.record("flask." + endpoint, time.perf_counter() - started)
+        metrics.increment(f"flask.{endpoint}.status_{response.status_code}")
+    return response
+
+@Flask_App.teardown_request
+def _stopProfile(exception):
+    """Stop the profile of the request, which after_request would skip if the request raised"""
+    profiler.stop(g.pop("profile", None), request.method + " " + request.path)
+
 @Flask_App.route('/', methods=['GET'])
 def index():
     """
@@ -58,12 +94,16 @@ def _check_in_dict(ticker: str):
     if ticker not in monthsBack:
         raise ValueError("Currently there is no pricing available for this ticker")
 
-def _obtainDf(ticker: str) -> pd.DataFrame:
+def _obtainDf(ticker: str) -> Tuple["pd.DataFrame", Optional[tuple]]:
     """
     Obtaining the necessary dataframe
     which may be the one from the present csv
     or uploading may be required
+    Both come from the in-memory market data cache so the csv
+    is only parsed again when it changes on disk.
     :param ticker is a string indicator of the ticker
+    :return: the dataframe and the version of the csv it came from,
+    or None for uploaded data so that its prices are not cached
     """
     # validate ticker
     _check_in_dict(ticker)
@@ -73,7 +113,12 @@ def _obtainDf(ticker: str) -> pd.DataFrame:
     upload = request.form['Upload']
     # Check this was answered correctly
     upload = _yesNoValidator("upload", upload)
-    return dataFromStartDate(ticker) if upload else pd.read_csv(datasource)
+    with metrics.timer("flask.obtainDf"):
+        if upload:
+            from UploadData import dataFromStartDate
+            return dataFromStartDate(ticker), None
+        version, df = defaultStore.versionedFrame(datasource)
+        return df, version
 
 @Flask_App.route('/price/', methods=['POST'] )
 def price():
@@ -86,13 +131,14 @@ def price():
     is_call = request.form['Call']
     # Dataframe depends on whether an upload is requested
     try:
-        df = _obtainDf(ticker) # includes validation of ticker
+        df, version = _obtainDf(ticker) # includes validation of ticker
         strike = float(strike)
         # Call is true if yes, false if no and raises
         # an exception if neither
         is_call = _yesNoValidator("call_or_put", is_call)
-        # Use the PV Calculator to do the computation
-        result = PV(df, ticker, monthsBack[ticker], strike, is_call)
+        # Use the PV Calculator to do the computation, or an earlier
+        # result for the same option on the same data
+        result = cachedPV(df, version, ticker, monthsBack[ticker], strike, is_call)
         return render_template(
         'index.html',
         ticker=ticker,
@@ -112,6 +158,80 @@ def price():
         error=str(err)
         )
 
+_apiRunners = {} # (data version, date) -> BatchRunner reused by JSON requests
+_apiRunnersLock = threading.Lock() # The app serves requests on several threads
+
+def _apiRunner() -> "BatchRunner":
+    """
+    BatchRunner for the current market data, shared between requests
+    until the data file changes or the date rolls.
+    Requests arriving while it is rebuilt wait for it rather than each building one.
+    """
+    datasource = "CombinedEnergyFutures.csv"
+    version, df = defaultStore.versionedFrame(datasource)
+    key = (version, datetime.date.today())
+    with _apiRunnersLock:
+        runner = _apiRunners.get(key)
+        if runner is None:
+            from Calculations.BatchRunner import BatchRunner
+            runner = BatchRunner(df, workers=1, valuationDate=key[1])
+            _apiRunners.clear()
+            _apiRunners[key] = runner
+        return runner
+
+@Flask_App.route('/api/v1/price', methods=['POST'])
+def apiPrice():
+    """
+    JSON batch pricing.  The body is {"contracts": [...]} where each contract
+    has a ticker, strike and isCall (true/false or yes/no) and optionally a
+    deliveryMonth ("YYYY-MM", six months forward by default), quantity and
+    sigma and T overrides.  Every contract is answered with its pv, sigma, T,
+    expiry and an error message (null when it was priced).
+    Malformed requests are answered with status 400.
+    """
+    payload = request.get_json(silent=True)
+    contracts = payload.get("contracts") if isinstance(payload, dict) else None
+    if not isinstance(contracts, list) or not contracts:
+        return jsonify(error="The request body must be a JSON object with a non-empty contracts list"), 400
+    try:
+        results = _apiRunner().priceContracts(contracts)
+    except ValueError as err:
+        return jsonify(error=str(err)), 400
+    return jsonify(count=len(results), results=results)
+
+@Flask_App.route('/api/v1/stats', methods=['GET'])
+def apiStats():
+    """Hit ratios and sizes of the market data and pricing caches"""
+    return jsonify(marketData=defaultStore.stats(), pricing=pvCache.stats())
+
+@Flask_App.route('/api/v1/metrics', methods=['GET'])
+def apiMetrics():
+    """
+    Stage timings and counters, as Prometheus text or, with ?format=json, as JSON.
+    Collection is enabled by the environment variable OPTION_PRICING_METRICS=1.
+    """
+    if request.args.get("format") == "json":
+        return jsonify(metrics.snapshot())
+    return Response(metrics.prometheus(), mimetype="text/plain; version=0.0.4")
+
+@Flask_App.route('/api/v1/profiles', methods=['GET'])
+def apiProfiles():
+    """The most recent cProfile captures of sampled requests"""
+    return jsonify(sampleRate=profiler.sampleRate,
+                   profiles=[{"request": label, "seconds": seconds, "statistics": text}
+                             for label, seconds, text in profiler.profiles])
+
+def warmUp():
+    """
+    Load the market data and build the calendars before requests arrive,
+    so that no request has to wait for them.
+    """
+    defaultCalendar()
+    defaultYearFraction("BUS/260")
+    _apiRunner()
+
 if __name__ == '__main__':
+    # The threaded server handles requests concurrently while the data loads in the background
+    threading.Thread(target=warmUp, daemon=True).start()
     Flask_App.debug = True
-    Flask_App.run()
+    Flask_App.run(threaded=True)